@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from models import Estatistica
+
+GRANULARIDADES = ('hora', 'dia')
+
+UMA_HORA = timedelta(hours=1)
+UM_DIA = timedelta(days=1)
+
+
+def truncar_hora(momento: datetime) -> datetime:
+    return momento.replace(minute=0, second=0, microsecond=0)
+
+
+def truncar_dia(momento: datetime) -> datetime:
+    return momento.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def teto_hora(momento: datetime) -> datetime:
+    inicio_hora = truncar_hora(momento)
+    return inicio_hora if inicio_hora == momento else inicio_hora + UMA_HORA
+
+
+def limite_retencao(dias: int, agora: Optional[datetime] = None) -> datetime:
+    """
+    Início do período de retenção: respostas anteriores a ele são consolidadas
+
+    Alinhado à meia-noite, para que cada balde diário fique inteiro de um lado só.
+    """
+    if dias < 1:
+        raise ValueError("A retenção deve ser de pelo menos um dia")
+    return truncar_dia(agora or datetime.now()) - timedelta(days=dias)
+
+
+class AgregadosTemporais:
+    """
+    Contadores por pergunta agrupados em baldes de uma hora e de um dia.
+
+    Cada resposta é somada ao balde da sua hora e ao balde do seu dia no
+    momento da escrita. Uma consulta por intervalo soma os baldes diários
+    dos dias inteiros contidos no intervalo e os baldes horários das bordas,
+    sem reler as respostas individuais. A precisão é de uma hora: o início
+    do intervalo é arredondado para baixo e o fim para cima.
+    """
+
+    def __init__(self):
+        self.por_hora: Dict[datetime, Estatistica] = {}
+        self.por_dia: Dict[datetime, Estatistica] = {}
+
+    def adicionar(self, momento: datetime, respostas: Dict):
+        for baldes, chave in ((self.por_hora, truncar_hora(momento)),
+                              (self.por_dia, truncar_dia(momento))):
+            balde = baldes.get(chave)
+            if balde is None:
+                balde = baldes[chave] = Estatistica(total_respostas=0)
+            balde.total_respostas += 1
+            for pergunta, resposta in respostas.items():
+                balde.adicionar_analise_pergunta(pergunta, resposta)
+
+    def mesclar_hora(self, hora: datetime, estatistica: Estatistica):
+        """Soma contadores já agregados de uma hora (ex: respostas consolidadas) aos baldes"""
+        for baldes, chave in ((self.por_hora, hora), (self.por_dia, truncar_dia(hora))):
+            balde = baldes.get(chave)
+            if balde is None:
+                balde = baldes[chave] = Estatistica(total_respostas=0)
+            balde.mesclar(estatistica)
+
+    def consultar(self, inicio: Optional[datetime] = None,
+                  fim: Optional[datetime] = None) -> Estatistica:
+        """Soma os baldes que cobrem o intervalo [inicio, fim)"""
+        resultado = Estatistica(total_respostas=0)
+        if not self.por_dia:
+            return resultado
+
+        primeiro = min(self.por_dia)
+        ultimo = max(self.por_dia) + UM_DIA
+        inicio = max(truncar_hora(inicio), primeiro) if inicio else primeiro
+        fim = min(teto_hora(fim), ultimo) if fim else ultimo
+
+        cursor = inicio
+        while cursor < fim:
+            dia = truncar_dia(cursor)
+            proximo_dia = dia + UM_DIA
+            if cursor == dia and proximo_dia <= fim:
+                balde = self.por_dia.get(dia)
+                if balde:
+                    resultado.mesclar(balde)
+                cursor = proximo_dia
+                continue
+
+            limite = min(proximo_dia, fim)
+            while cursor < limite:
+                balde = self.por_hora.get(cursor)
+                if balde:
+                    resultado.mesclar(balde)
+                cursor += UMA_HORA
+
+        return resultado
+
+    def serie(self, granularidade: str = 'dia', inicio: Optional[datetime] = None,
+              fim: Optional[datetime] = None) -> List[Dict]:
+        """
+        Total de respostas por balde, em ordem cronológica
+
+        O intervalo tem a mesma precisão de uma hora de `consultar`, então a
+        soma da série é o total do intervalo. Dias cortados pelo intervalo
+        somam apenas as horas que ficam dentro dele.
+        """
+        if granularidade not in GRANULARIDADES:
+            raise ValueError(f"Granularidade inválida: {granularidade}")
+
+        inicio = truncar_hora(inicio) if inicio else None
+        fim = teto_hora(fim) if fim else None
+
+        def dentro(hora: datetime) -> bool:
+            return (inicio is None or hora >= inicio) and (fim is None or hora < fim)
+
+        if granularidade == 'hora':
+            return [
+                {'periodo': hora.isoformat(), 'total_respostas': self.por_hora[hora].total_respostas}
+                for hora in sorted(self.por_hora) if dentro(hora)
+            ]
+
+        serie = []
+        for dia in sorted(self.por_dia):
+            proximo_dia = dia + UM_DIA
+            if dentro(dia) and (fim is None or proximo_dia <= fim):
+                total = self.por_dia[dia].total_respostas
+            else:
+                horas = (dia + i * UMA_HORA for i in range(24))
+                total = sum(self.por_hora[hora].total_respostas
+                            for hora in horas if hora in self.por_hora and dentro(hora))
+            if total:
+                serie.append({'periodo': dia.isoformat(), 'total_respostas': total})
+        return serie
@@ -0,0 +1,130 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+from colunar import ArmazemColunar, SEM_RESPOSTA, para_microssegundos
+from pontuacao import pontuar_codigos, tabela_pontos
+from perguntas import CATEGORIAS_VIOLENCIA, RESPOSTAS_PREOCUPANTES
+
+
+class Analise:
+    """
+    Agregações vetorizadas (NumPy) sobre as respostas individuais.
+
+    As colunas do ArmazemColunar viram uma matriz int8 (respostas × perguntas)
+    sem decodificar nenhuma resposta; contagens, tabelas cruzadas, pontuações
+    e taxas por categoria saem de operações sobre essa matriz.
+    """
+
+    def __init__(self, armazem: ArmazemColunar, inicio: Optional[datetime] = None,
+                 fim: Optional[datetime] = None):
+        self.perguntas = armazem.perguntas
+        self.chaves = armazem.chaves
+        self.opcoes = armazem.opcoes
+
+        codigos = np.column_stack([
+            np.frombuffer(coluna, dtype=np.int8) for coluna in armazem.colunas
+        ]) if len(armazem) else np.empty((0, len(armazem.colunas)), dtype=np.int8)
+
+        if inicio or fim:
+            timestamps = np.frombuffer(armazem.timestamps, dtype=np.int64)
+            mascara = np.ones(len(timestamps), dtype=bool)
+            if inicio:
+                mascara &= timestamps >= para_microssegundos(inicio)
+            if fim:
+                mascara &= timestamps < para_microssegundos(fim)
+            codigos = codigos[mascara]
+
+        self.codigos = codigos
+
+    @property
+    def total(self) -> int:
+        return len(self.codigos)
+
+    def _indice(self, pergunta_id: int) -> int:
+        chave = str(pergunta_id)
+        if chave not in self.chaves:
+            raise ValueError(f"Pergunta inexistente: {pergunta_id}")
+        return self.chaves.index(chave)
+
+    def contagens(self) -> Dict:
+        """Contagens por pergunta e opção (mesmo formato de `analise` nas estatísticas)"""
+        analise = {}
+        for i, (chave, opcoes) in enumerate(zip(self.chaves, self.opcoes)):
+            coluna = self.codigos[:, i]
+            contagens = np.bincount(coluna[coluna != SEM_RESPOSTA], minlength=len(opcoes))
+            analise[chave] = {opcao: int(n) for opcao, n in zip(opcoes, contagens) if n}
+        return analise
+
+    def tabela_cruzada(self, pergunta_a: int, pergunta_b: int) -> Dict:
+        """Tabela de contingência entre as opções de duas perguntas"""
+        a, b = self._indice(pergunta_a), self._indice(pergunta_b)
+        opcoes_a, opcoes_b = self.opcoes[a], self.opcoes[b]
+
+        coluna_a = self.codigos[:, a].astype(np.int64)
+        coluna_b = self.codigos[:, b].astype(np.int64)
+        validas = (coluna_a != SEM_RESPOSTA) & (coluna_b != SEM_RESPOSTA)
+
+        tabela = np.bincount(
+            coluna_a[validas] * len(opcoes_b) + coluna_b[validas],
+            minlength=len(opcoes_a) * len(opcoes_b)
+        ).reshape(len(opcoes_a), len(opcoes_b))
+
+        return {
+            'linhas': opcoes_a,
+            'colunas': opcoes_b,
+            'tabela': tabela.tolist(),
+            'total': int(validas.sum())
+        }
+
+    def pontuacoes(self) -> np.ndarray:
+        """Pontuação de cada resposta, igual a `Resposta.calcular_pontuacao`"""
+        return pontuar_codigos(self.codigos, tabela_pontos(self.perguntas))
+
+    def histograma_pontuacao(self) -> Dict:
+        pontuacoes = self.pontuacoes()
+        histograma = np.bincount(pontuacoes) if len(pontuacoes) else np.zeros(0, dtype=np.int64)
+        return {
+            'histograma': {int(p): int(n) for p, n in enumerate(histograma) if n},
+            'niveis_risco': {
+                'alto': int((pontuacoes >= 30).sum()),
+                'medio': int(((pontuacoes >= 15) & (pontuacoes < 30)).sum()),
+                'baixo': int((pontuacoes < 15).sum())
+            },
+            'media': round(float(pontuacoes.mean()), 2) if len(pontuacoes) else 0,
+            'mediana': float(np.median(pontuacoes)) if len(pontuacoes) else 0,
+            'total': len(pontuacoes)
+        }
+
+    def _sinais_por_categoria(self) -> np.ndarray:
+        """Matriz booleana (respostas × categorias): algum sinal preocupante na categoria"""
+        preocupantes = np.zeros((len(self.chaves), max(map(len, self.opcoes)) + 1), dtype=bool)
+        for i, opcoes in enumerate(self.opcoes):
+            for codigo, opcao in enumerate(opcoes):
+                preocupantes[i, codigo] = opcao in RESPOSTAS_PREOCUPANTES
+
+        sinais = preocupantes[np.arange(len(self.chaves)), self.codigos]
+        return np.column_stack([
+            sinais[:, [self._indice(pid) for pid in perguntas_ids]].any(axis=1)
+            for perguntas_ids in CATEGORIAS_VIOLENCIA.values()
+        ]) if self.total else np.zeros((0, len(CATEGORIAS_VIOLENCIA)), dtype=bool)
+
+    def taxas_categorias(self) -> Dict:
+        """Percentual de respondentes com ao menos um sinal preocupante em cada categoria"""
+        sinais = self._sinais_por_categoria()
+        return {
+            categoria: {
+                'respondentes_com_sinais': int(sinais[:, j].sum()),
+                'percentual': round(float(sinais[:, j].mean()) * 100, 2) if self.total else 0
+            }
+            for j, categoria in enumerate(CATEGORIAS_VIOLENCIA)
+        }
+
+    def coocorrencia_categorias(self) -> Dict:
+        """Quantos respondentes apresentam sinais em cada par de categorias"""
+        sinais = self._sinais_por_categoria().astype(np.int64)
+        matriz = sinais.T @ sinais
+        categorias: List[str] = list(CATEGORIAS_VIOLENCIA)
+        return {
+            'categorias': categorias,
+            'matriz': matriz.tolist()
+        }
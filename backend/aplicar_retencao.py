@@ -0,0 +1,40 @@
+"""
+Aplica a política de retenção uma vez (por exemplo, a partir do cron)
+
+Uso:
+    python aplicar_retencao.py [--dias 365]
+
+Respostas individuais com mais de `--dias` dias (padrão: RETENCAO_DIAS) são
+somadas aos contadores por hora e removidas do armazenamento; as
+estatísticas agregadas não mudam.
+"""
+
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import db
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Consolida e remove respostas antigas')
+    parser.add_argument('--dias', type=int, default=int(os.getenv('RETENCAO_DIAS', '0')))
+    args = parser.parse_args()
+
+    if args.dias < 1:
+        print("Erro: informe --dias ou defina RETENCAO_DIAS", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        resultado = db.aplicar_retencao(args.dias)
+    finally:
+        db.fechar()
+
+    print(f"{resultado['removidas']} respostas anteriores a {resultado['limite']} consolidadas e removidas")
+
+
+if __name__ == '__main__':
+    main()
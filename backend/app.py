@@ -1,80 +1,117 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
-from database import db
 import os
+import time
 from dotenv import load_dotenv
 
-# Importar função de registro de blueprints
-from routes import register_blueprints
-
+# Carregar .env antes de importar o banco, que lê sua configuração do ambiente
 load_dotenv()
 
-app = Flask(__name__)
-CORS(app)
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
+# `db` só lê os dados no primeiro uso (ou em `aquecer_armazenamento`)
+from database import db
 
-# Registrar todas as rotas modularizadas
-register_blueprints(app)
+# Importar função de registro de blueprints
+from routes import register_blueprints
 
 
-@app.route('/api/health', methods=['GET'])
-def health_check():
+def create_app(aquecer: bool = False) -> Flask:
     """
-    Endpoint de health check para verificar se a API está funcionando
+    Cria e configura a aplicação Flask
 
-    Returns:
-        JSON indicando status da API
-    """
-    return jsonify({
-        'status': 'ok',
-        'message': 'Junta AÍ API está funcionando',
-        'version': '1.0.0'
-    }), 200
+    O armazenamento não é carregado aqui: ele é criado na primeira requisição
+    que o usa, ou já na criação do app com `aquecer=True`.
 
+    Args:
+        aquecer: carrega o armazenamento antes de devolver o app
 
-@app.route('/', methods=['GET'])
-def index():
+    Returns:
+        Aplicação com as rotas registradas
     """
-    Rota raiz da API
+    app = Flask(__name__)
+    CORS(app)
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
+
+    # Registrar todas as rotas modularizadas
+    register_blueprints(app)
+
+    @app.route('/api/health', methods=['GET'])
+    def health_check():
+        """
+        Endpoint de health check para verificar se a API está funcionando
+
+        Returns:
+            JSON indicando status da API
+        """
+        return jsonify({
+            'status': 'ok',
+            'message': 'Junta AÍ API está funcionando',
+            'version': '1.0.0'
+        }), 200
+
+    @app.route('/', methods=['GET'])
+    def index():
+        """
+        Rota raiz da API
+
+        Returns:
+            JSON com informações sobre a API
+        """
+        return jsonify({
+            'projeto': 'Junta AÍ',
+            'descricao': 'API para plataforma de conscientização sobre violência em relacionamentos',
+            'versao': '1.0.0',
+            'endpoints': {
+                'questionario': '/api/perguntas, /api/questionario',
+                'estatisticas': '/api/estatisticas',
+                'apoio': '/api/recursos-apoio',
+                'health': '/api/health'
+            },
+            'documentacao': 'Acesse os endpoints acima para utilizar a API'
+        }), 200
+
+    @app.errorhandler(404)
+    def not_found(error):
+        """Handler para rotas não encontradas"""
+        return jsonify({
+            'erro': 'Rota não encontrada',
+            'status': 404
+        }), 404
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        """Handler para erros internos do servidor"""
+        return jsonify({
+            'erro': 'Erro interno do servidor',
+            'status': 500
+        }), 500
+
+    if aquecer:
+        aquecer_armazenamento()
+
+    return app
+
+
+def aquecer_armazenamento():
+    """
+    Carrega o armazenamento agora, em vez de na primeira requisição que o usa
 
-    Returns:
-        JSON com informações sobre a API
+    Chamado antes de o servidor aceitar tráfego, para que nenhuma requisição
+    pague a leitura dos dados e a montagem dos índices.
     """
-    return jsonify({
-        'projeto': 'Junta AÍ',
-        'descricao': 'API para plataforma de conscientização sobre violência em relacionamentos',
-        'versao': '1.0.0',
-        'endpoints': {
-            'questionario': '/api/perguntas, /api/questionario',
-            'estatisticas': '/api/estatisticas',
-            'apoio': '/api/recursos-apoio',
-            'health': '/api/health'
-        },
-        'documentacao': 'Acesse os endpoints acima para utilizar a API'
-    }), 200
-
-
-@app.errorhandler(404)
-def not_found(error):
-    """Handler para rotas não encontradas"""
-    return jsonify({
-        'erro': 'Rota não encontrada',
-        'status': 404
-    }), 404
-
-
-@app.errorhandler(500)
-def internal_error(error):
-    """Handler para erros internos do servidor"""
-    return jsonify({
-        'erro': 'Erro interno do servidor',
-        'status': 500
-    }), 500
+    inicio = time.perf_counter()
+    db.aquecer()
+    print(f"Armazenamento carregado em {time.perf_counter() - inicio:.2f}s")
+
+
+# Instância usada por `flask run` e por servidores WSGI (app:app).
+# DATABASE_AQUECER=true carrega o armazenamento já na importação.
+app = create_app(aquecer=os.getenv('DATABASE_AQUECER', 'false').lower() == 'true')
 
 
 if __name__ == '__main__':
+    # Servidor de desenvolvimento; em produção use `python servidor.py` (gunicorn)
     port = int(os.getenv('PORT', 5000))
-    debug = os.getenv('FLASK_ENV', 'development') == 'development'
+    debug = os.getenv('FLASK_ENV', 'production') == 'development'
 
     print(f"""
     ╔══════════════════════════════════════════╗
@@ -92,4 +129,8 @@ if __name__ == '__main__':
     ╚══════════════════════════════════════════╝
     """)
 
+    # Com o reloader do modo debug, só o processo que atende as requisições carrega os dados
+    if not debug or os.getenv('WERKZEUG_RUN_MAIN') == 'true':
+        aquecer_armazenamento()
+
     app.run(debug=debug, port=port, host='0.0.0.0')
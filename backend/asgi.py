@@ -0,0 +1,181 @@
+"""
+Ponto de entrada ASGI da API
+
+O servidor ASGI (uvicorn) cuida das conexões num event loop; cada requisição
+roda no app Flask num pool de threads próprio, então rotas que esperam o
+disco (gravação de respostas, fsync do log) nunca bloqueiam o loop.
+
+Uso (a partir de backend/):
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from app import app as app_wsgi, aquecer_armazenamento
+from database import db
+
+
+class AplicacaoAsgi:
+    """
+    Adapta o app WSGI (Flask) ao protocolo ASGI.
+
+    O corpo da requisição é lido no event loop e o app roda numa thread do
+    pool; os pedaços da resposta voltam ao loop um a um, então exportações
+    em fluxo continuam sendo enviadas sem montar o arquivo na memória. O
+    tamanho do pool limita quantas requisições são processadas ao mesmo
+    tempo; as demais esperam na fila sem ocupar o loop, que continua
+    aceitando conexões. Corpos maiores que `tamanho_maximo_corpo` bytes são
+    recusados com 413 antes de serem lidos por inteiro.
+
+    No `lifespan`, o armazenamento é carregado antes de o servidor aceitar
+    requisições e fechado (log gravado em disco) no desligamento.
+    """
+
+    def __init__(self, app_wsgi: Callable, threads: int, tamanho_maximo_corpo: int):
+        self.app_wsgi = app_wsgi
+        self.tamanho_maximo_corpo = tamanho_maximo_corpo
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='asgi')
+
+    async def __call__(self, scope: Dict, receive: Callable, send: Callable):
+        if scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        else:
+            raise ValueError(f"Tipo de conexão não suportado: {scope['type']}")
+
+    async def _lifespan(self, receive: Callable, send: Callable):
+        loop = asyncio.get_running_loop()
+        while True:
+            mensagem = await receive()
+            if mensagem['type'] == 'lifespan.startup':
+                try:
+                    await loop.run_in_executor(self._executor, aquecer_armazenamento)
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensagem['type'] == 'lifespan.shutdown':
+                await loop.run_in_executor(self._executor, db.fechar)
+                self._executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope: Dict, receive: Callable, send: Callable):
+        tamanho_declarado = next(
+            (valor for nome, valor in scope['headers'] if nome == b'content-length'), b'0'
+        )
+        if tamanho_declarado.isdigit() and int(tamanho_declarado) > self.tamanho_maximo_corpo:
+            await self._recusar_corpo(send)
+            return
+
+        # O Content-Length pode faltar (chunked) ou não corresponder ao que chega
+        corpo = io.BytesIO()
+        while True:
+            mensagem = await receive()
+            if mensagem['type'] == 'http.disconnect':
+                return
+            corpo.write(mensagem.get('body', b''))
+            if corpo.tell() > self.tamanho_maximo_corpo:
+                await self._recusar_corpo(send)
+                return
+            if not mensagem.get('more_body'):
+                break
+        corpo.seek(0)
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._executar, scope, corpo, send, loop)
+
+    async def _recusar_corpo(self, send: Callable):
+        corpo = json.dumps({'erro': 'Corpo da requisição muito grande', 'status': 413}).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': 413,
+            'headers': [(b'content-type', b'application/json'),
+                        (b'content-length', str(len(corpo)).encode()),
+                        (b'connection', b'close')]
+        })
+        await send({'type': 'http.response.body', 'body': corpo})
+
+    def _executar(self, scope: Dict, corpo: io.BytesIO, send: Callable, loop: asyncio.AbstractEventLoop):
+        """Roda o app WSGI (na thread do pool) e repassa a resposta ao loop"""
+        def enviar(mensagem: Dict):
+            # Espera o envio: o ritmo do cliente limita o quanto a thread produz
+            asyncio.run_coroutine_threadsafe(send(mensagem), loop).result()
+
+        inicio: Optional[Dict] = None
+        iniciada = False
+
+        def start_response(status: str, cabecalhos: List[Tuple[str, str]], exc_info=None):
+            nonlocal inicio
+            if exc_info and iniciada:
+                raise exc_info[1].with_traceback(exc_info[2])
+            inicio = {
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(nome.lower().encode('latin-1'), valor.encode('latin-1'))
+                            for nome, valor in cabecalhos]
+            }
+
+        resposta = self.app_wsgi(self._environ(scope, corpo), start_response)
+        try:
+            for pedaco in resposta:
+                if not pedaco:
+                    continue
+                if not iniciada:
+                    enviar(inicio)
+                    iniciada = True
+                enviar({'type': 'http.response.body', 'body': pedaco, 'more_body': True})
+            if not iniciada:
+                enviar(inicio)
+            enviar({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(resposta, 'close'):
+                resposta.close()
+
+    @staticmethod
+    def _environ(scope: Dict, corpo: io.BytesIO) -> Dict:
+        """Environ WSGI (PEP 3333) equivalente ao escopo ASGI"""
+        servidor = scope.get('server') or ('localhost', 80)
+        raiz, caminho = scope.get('root_path', ''), scope['path']
+        if raiz and caminho.startswith(raiz):
+            caminho = caminho[len(raiz):]
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': raiz.encode('utf-8').decode('latin-1'),
+            'PATH_INFO': caminho.encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope['query_string'].decode('latin-1'),
+            'SERVER_NAME': servidor[0],
+            'SERVER_PORT': str(servidor[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': corpo,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False
+        }
+        if scope.get('client'):
+            environ['REMOTE_ADDR'] = scope['client'][0]
+
+        for nome, valor in scope['headers']:
+            nome = nome.decode('latin-1').upper().replace('-', '_')
+            valor = valor.decode('latin-1')
+            chave = nome if nome in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f'HTTP_{nome}'
+            environ[chave] = f'{environ[chave]},{valor}' if chave in environ else valor
+        return environ
+
+
+# ASGI_THREADS: requisições processadas ao mesmo tempo por processo
+# ASGI_CORPO_MAX_MB: tamanho máximo do corpo de uma requisição
+app = AplicacaoAsgi(
+    app_wsgi,
+    threads=int(os.getenv('ASGI_THREADS', '32')),
+    tamanho_maximo_corpo=int(float(os.getenv('ASGI_CORPO_MAX_MB', '16')) * 1024 * 1024)
+)
@@ -0,0 +1,128 @@
+"""
+Leituras de estatísticas com vários workers e um escritor: contadores locais x compartilhados
+
+Cada worker é um processo separado sobre o mesmo log. Com contadores locais,
+cada leitura reaplica antes as respostas que o escritor anexou; com o bloco
+compartilhado, os workers só copiam os contadores. Mede-se a vazão de cada
+worker por segundo de CPU (a vazão total cresce com o número de núcleos
+enquanto esse custo não depender do número de workers) e, ao final, se
+todos enxergam o mesmo total que foi gravado.
+
+Uso (a partir de backend/):
+    python -m benchmarks.contadores_compartilhados [--workers 1 2 4] [--segundos 3] [--escritas 500]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.inicializacao_snapshot import anexar, gerar
+from database import Database
+from perguntas import PERGUNTAS
+
+RESPOSTAS = {str(p['id']): p['opcoes'][0] for p in PERGUNTAS}
+
+
+def _abrir(diretorio: str, compartilhado: bool) -> Database:
+    database = Database(filename=os.path.join(diretorio, 'data.json'), modo='log',
+                        log_filename=os.path.join(diretorio, 'respostas.log'), fsync='never')
+    if compartilhado:
+        database.compartilhar_contadores(24 * 400)
+    return database
+
+
+def _escritor(diretorio: str, compartilhado: bool, segundos: float, escritas: int):
+    """Grava `escritas` respostas por segundo durante `segundos`"""
+    database = _abrir(diretorio, compartilhado)
+    gravadas = 0
+    inicio = time.perf_counter()
+    while (decorrido := time.perf_counter() - inicio) < segundos:
+        if gravadas < decorrido * escritas:
+            database.salvar_resposta(RESPOSTAS)
+            gravadas += 1
+        else:
+            time.sleep(0.001)
+    database.fechar()
+    print(json.dumps({'gravadas': gravadas}))
+
+
+def _leitor(diretorio: str, compartilhado: bool, segundos: float):
+    """Lê estatísticas sem pausa enquanto o escritor grava; depois, o total final"""
+    database = _abrir(diretorio, compartilhado)
+    leituras = 0
+    cpu = time.process_time()
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < segundos:
+        database.obter_estatisticas()
+        leituras += 1
+    cpu = time.process_time() - cpu
+
+    # Espera o escritor terminar (marcado pelo arquivo 'fim') para conferir o total
+    while not os.path.exists(os.path.join(diretorio, 'fim')):
+        time.sleep(0.01)
+    total = database.obter_estatisticas()['total_respostas']
+    database.fechar()
+    print(json.dumps({'leituras': leituras, 'cpu': cpu, 'total': total}))
+
+
+def _processo(papel: str, diretorio: str, compartilhado: bool, segundos: float, escritas: int):
+    return subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.contadores_compartilhados', '--papel', papel,
+         '--diretorio', diretorio, '--segundos', str(segundos), '--escritas', str(escritas)]
+        + (['--compartilhado'] if compartilhado else []),
+        stdout=subprocess.PIPE, text=True
+    )
+
+
+def medir(respostas: int, workers: int, compartilhado: bool, segundos: float, escritas: int):
+    with tempfile.TemporaryDirectory() as diretorio:
+        anexar(os.path.join(diretorio, 'respostas.log'), gerar(1, respostas))
+        # Carga inicial (e criação do bloco) antes de começar a medir
+        _abrir(diretorio, compartilhado).fechar()
+
+        leitores = [_processo('leitor', diretorio, compartilhado, segundos, escritas) for _ in range(workers)]
+        escritor = _processo('escritor', diretorio, compartilhado, segundos, escritas)
+        gravadas = json.loads(escritor.communicate()[0])['gravadas']
+        open(os.path.join(diretorio, 'fim'), 'w').close()
+        resultados = [json.loads(leitor.communicate()[0]) for leitor in leitores]
+
+        if compartilhado:
+            database = _abrir(diretorio, True)
+            database._compartilhados.remover()
+            database.fechar()
+
+    consistente = all(r['total'] == respostas + gravadas for r in resultados)
+    por_cpu = sum(r['leituras'] / r['cpu'] for r in resultados) / workers
+    return gravadas, por_cpu, consistente
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--respostas', type=int, default=50000, help='respostas já no log')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--segundos', type=float, default=3)
+    parser.add_argument('--escritas', type=int, default=500, help='respostas gravadas por segundo')
+    parser.add_argument('--papel', choices=['escritor', 'leitor'], help=argparse.SUPPRESS)
+    parser.add_argument('--diretorio', help=argparse.SUPPRESS)
+    parser.add_argument('--compartilhado', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.papel == 'escritor':
+        return _escritor(args.diretorio, args.compartilhado, args.segundos, args.escritas)
+    if args.papel == 'leitor':
+        return _leitor(args.diretorio, args.compartilhado, args.segundos)
+
+    print(f"{'workers':>7}  {'contadores':>12}  {'leituras/s CPU por worker':>26}  {'gravadas':>8}  consistente")
+    for workers in args.workers:
+        for compartilhado in (False, True):
+            gravadas, por_cpu, consistente = medir(args.respostas, workers, compartilhado,
+                                                   args.segundos, args.escritas)
+            print(f"{workers:>7}  {'compartilhado' if compartilhado else 'local':>12}  "
+                  f"{por_cpu:>26.0f}  {gravadas:>8}  {'sim' if consistente else 'NÃO'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Vazão de salvar_resposta com group commit para diferentes tamanhos de lote
+
+Uso (a partir de backend/):
+    python -m benchmarks.escrita_em_lote [--threads 32] [--respostas 200]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from database import Database
+
+RESPOSTAS = {str(i): 'Às vezes' for i in range(1, 13)}
+
+
+def medir(tamanho_lote: int, threads: int, respostas_por_thread: int,
+          espera_maxima_ms: float, fsync: str) -> float:
+    """Dispara `threads` clientes simultâneos e retorna respostas por segundo"""
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = Database(filename=os.path.join(diretorio, 'data.json'), modo='log', fsync=fsync)
+        if tamanho_lote > 1:
+            database.iniciar_escritor(tamanho_lote, espera_maxima_ms)
+
+        def cliente():
+            for _ in range(respostas_por_thread):
+                database.salvar_resposta(RESPOSTAS)
+
+        clientes = [threading.Thread(target=cliente) for _ in range(threads)]
+        inicio = time.perf_counter()
+        for c in clientes:
+            c.start()
+        for c in clientes:
+            c.join()
+        duracao = time.perf_counter() - inicio
+
+        database.fechar()
+        return threads * respostas_por_thread / duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--respostas', type=int, default=200, help='respostas por thread')
+    parser.add_argument('--espera-ms', type=float, default=2.0)
+    parser.add_argument('--fsync', default='always')
+    parser.add_argument('--lotes', default='1,8,32,128')
+    args = parser.parse_args()
+
+    print(f"{'lote':>6} {'respostas/s':>14}")
+    for tamanho in (int(t) for t in args.lotes.split(',')):
+        vazao = medir(tamanho, args.threads, args.respostas, args.espera_ms, args.fsync)
+        print(f"{tamanho:>6} {vazao:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Teste de estresse: milhares de envios simultâneos de várias threads e processos
+
+Ao final reabre o banco e verifica que nenhuma resposta foi perdida ou
+duplicada e que os ids são únicos e contíguos.
+
+Uso (a partir de backend/):
+    python -m benchmarks.estresse_concorrencia [--processos 4] [--threads 16] [--respostas 100]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from database import Database
+
+RESPOSTAS = {str(i): 'Raramente' for i in range(1, 13)}
+
+
+def _abrir(diretorio: str, tamanho_lote: int) -> Database:
+    database = Database(filename=os.path.join(diretorio, 'data.json'), modo='log', fsync='never')
+    if tamanho_lote > 1:
+        database.iniciar_escritor(tamanho_lote, espera_maxima_ms=2)
+    return database
+
+
+def _worker(diretorio: str, threads: int, respostas: int, tamanho_lote: int):
+    database = _abrir(diretorio, tamanho_lote)
+    falhas = []
+
+    def cliente():
+        for _ in range(respostas):
+            if not database.salvar_resposta(RESPOSTAS):
+                falhas.append(1)
+
+    clientes = [threading.Thread(target=cliente) for _ in range(threads)]
+    for c in clientes:
+        c.start()
+    for c in clientes:
+        c.join()
+    database.fechar()
+
+    if falhas:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processos', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--respostas', type=int, default=100, help='respostas por thread')
+    parser.add_argument('--lote', type=int, default=1, help='tamanho do lote (1 = sem escritor)')
+    args = parser.parse_args()
+
+    esperado = args.processos * args.threads * args.respostas
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        inicio = time.perf_counter()
+        processos = [
+            multiprocessing.Process(target=_worker,
+                                    args=(diretorio, args.threads, args.respostas, args.lote))
+            for _ in range(args.processos)
+        ]
+        for p in processos:
+            p.start()
+        for p in processos:
+            p.join()
+        duracao = time.perf_counter() - inicio
+
+        database = _abrir(diretorio, 1)
+        ids = list(database.respostas.ids)
+        total = database.obter_estatisticas()['total_respostas']
+        database.fechar()
+
+        with open(database.log_filename, 'rb') as f:
+            linhas = [json.loads(linha) for linha in f]
+
+    erros = []
+    if any(p.exitcode != 0 for p in processos):
+        erros.append('algum worker falhou ao salvar respostas')
+    if len(ids) != esperado or total != esperado or len(linhas) != esperado:
+        erros.append(f'esperado {esperado} respostas, memória={len(ids)} '
+                     f'estatísticas={total} log={len(linhas)}')
+    if sorted(ids) != list(range(1, esperado + 1)):
+        erros.append(f'ids duplicados ou com lacunas ({len(set(ids))} únicos)')
+
+    print(f'{esperado} respostas em {duracao:.2f}s ({esperado / duracao:.0f}/s)')
+    if erros:
+        for erro in erros:
+            print(f'FALHA: {erro}')
+        sys.exit(1)
+    print('OK: nenhuma resposta perdida ou duplicada')
+
+
+if __name__ == '__main__':
+    main()
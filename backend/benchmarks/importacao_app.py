@@ -0,0 +1,66 @@
+"""
+Tempo de `import app` e da primeira requisição para diferentes volumes de respostas no log
+
+Cada medição roda num processo novo, com DATABASE_LOG apontando para um log
+gerado com o número de respostas indicado (sem snapshot nem escritor em lote).
+
+Uso (a partir de backend/):
+    python -m benchmarks.importacao_app [--respostas 0 50000 200000] [--repeticoes 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from benchmarks.inicializacao_snapshot import anexar, gerar
+
+MEDIR = '''
+import json, time
+inicio = time.perf_counter()
+import app
+importacao = time.perf_counter() - inicio
+inicio = time.perf_counter()
+resposta = app.app.test_client().get('/api/estatisticas')
+primeira = time.perf_counter() - inicio
+assert resposta.status_code == 200
+print(json.dumps([importacao, primeira]))
+'''
+
+
+def medir(diretorio: str, repeticoes: int):
+    ambiente = {
+        **os.environ,
+        'DATABASE_BACKEND': 'json',
+        'DATABASE_MODE': 'log',
+        'DATABASE_JSON': os.path.join(diretorio, 'data.json'),
+        'DATABASE_LOG': os.path.join(diretorio, 'respostas.log'),
+        'DATABASE_COMPACTAR_MB': '0',
+        'DATABASE_LOTE_TAMANHO': '1',
+        'DATABASE_AQUECER': 'false'
+    }
+    tempos = []
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, '-c', MEDIR], env=ambiente, check=True,
+                               capture_output=True, text=True).stdout
+        tempos.append(json.loads(saida.strip().splitlines()[-1]))
+    return min(t[0] for t in tempos), min(t[1] for t in tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--respostas', type=int, nargs='+', default=[0, 50000, 200000])
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'respostas':>10}  {'import app':>12}  {'1ª requisição':>14}")
+    for total in args.respostas:
+        with tempfile.TemporaryDirectory() as diretorio:
+            anexar(os.path.join(diretorio, 'respostas.log'), gerar(1, total))
+            importacao, primeira = medir(diretorio, args.repeticoes)
+        print(f"{total:>10}  {importacao * 1000:>9.0f} ms  {primeira * 1000:>11.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Tempo de inicialização no modo 'log': reaplicando o log inteiro x a partir do snapshot
+
+Uso (a partir de backend/):
+    python -m benchmarks.inicializacao_snapshot [--respostas 200000] [--cauda 1000]
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from database import Database
+from perguntas import PERGUNTAS
+
+
+def gerar(primeiro_id: int, total: int):
+    inicio = datetime(2024, 1, 1)
+    for i in range(primeiro_id, primeiro_id + total):
+        yield {
+            'id': i,
+            'respostas': {str(p['id']): random.choice(p['opcoes']) for p in PERGUNTAS},
+            'timestamp': (inicio + timedelta(seconds=i * 7)).isoformat()
+        }
+
+
+def anexar(caminho: str, entradas):
+    with open(caminho, 'a', encoding='utf-8') as f:
+        for entrada in entradas:
+            f.write(json.dumps(entrada, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+
+def abrir(diretorio: str):
+    inicio = time.perf_counter()
+    db = Database(filename=os.path.join(diretorio, 'data.json'), modo='log',
+                  log_filename=os.path.join(diretorio, 'respostas.log'), fsync='never')
+    return db, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--respostas', type=int, default=200000)
+    parser.add_argument('--cauda', type=int, default=1000,
+                        help='respostas gravadas depois do snapshot')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        log = os.path.join(diretorio, 'respostas.log')
+        anexar(log, gerar(1, args.respostas))
+        tamanho_antes = os.path.getsize(log)
+
+        db, tempo_log = abrir(diretorio)
+        esperado = db.obter_estatisticas()
+
+        inicio = time.perf_counter()
+        db.compactar()
+        tempo_compactacao = time.perf_counter() - inicio
+        db.fechar()
+
+        anexar(log, gerar(args.respostas + 1, args.cauda))
+        db, _ = abrir(diretorio)
+        db.fechar()
+
+        db, tempo_snapshot = abrir(diretorio)
+        assert db.obter_estatisticas()['total_respostas'] == esperado['total_respostas'] + args.cauda
+        db.fechar()
+
+        print(f"{args.respostas} respostas + {args.cauda} após o snapshot")
+        print(f"  log inteiro: {tempo_log * 1000:8.1f} ms   ({tamanho_antes / 2**20:.1f} MiB de log)")
+        print(f"  compactação: {tempo_compactacao * 1000:8.1f} ms")
+        print(f"  snapshot:    {tempo_snapshot * 1000:8.1f} ms   "
+              f"({os.path.getsize(log) / 2**20:.2f} MiB de log, "
+              f"snapshot de {os.path.getsize(db.snapshot_filename) / 2**20:.1f} MiB)   "
+              f"({tempo_log / tempo_snapshot:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Memória e tempo de agregação: lista de dicts (formato antigo) x ArmazemColunar
+
+Uso (a partir de backend/):
+    python -m benchmarks.memoria_colunar [--respostas 200000]
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Tuple
+from colunar import ArmazemColunar
+from perguntas import PERGUNTAS
+
+
+def gerar(total: int):
+    inicio = datetime(2024, 1, 1)
+    for i in range(total):
+        yield {
+            'id': i + 1,
+            'respostas': {str(p['id']): random.choice(p['opcoes']) for p in PERGUNTAS},
+            'timestamp': (inicio + timedelta(seconds=i * 7)).isoformat()
+        }
+
+
+def medir_memoria(construir) -> Tuple[object, int]:
+    tracemalloc.start()
+    estrutura = construir()
+    usado, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return estrutura, usado
+
+
+def contar_dicts(entradas):
+    analise = {}
+    for entrada in entradas:
+        for pergunta, resposta in entrada['respostas'].items():
+            contagens = analise.setdefault(pergunta, {})
+            contagens[resposta] = contagens.get(resposta, 0) + 1
+    return analise
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--respostas', type=int, default=200000)
+    args = parser.parse_args()
+
+    # As duas estruturas são montadas a partir das linhas do log, como na inicialização
+    linhas = [json.dumps(entrada, ensure_ascii=False) for entrada in gerar(args.respostas)]
+
+    def construir_dicts():
+        return [json.loads(linha) for linha in linhas]
+
+    def construir_colunar():
+        armazem = ArmazemColunar(PERGUNTAS)
+        for linha in linhas:
+            e = json.loads(linha)
+            armazem.adicionar(e['id'], datetime.fromisoformat(e['timestamp']), e['respostas'])
+        return armazem
+
+    dicts, memoria_dicts = medir_memoria(construir_dicts)
+    armazem, memoria_colunar = medir_memoria(construir_colunar)
+
+    inicio = time.perf_counter()
+    esperado = contar_dicts(dicts)
+    tempo_dicts = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    obtido = armazem.contar()
+    tempo_colunar = time.perf_counter() - inicio
+
+    assert esperado == obtido
+
+    print(f"{args.respostas} respostas")
+    print(f"  memória  lista de dicts: {memoria_dicts / 2**20:8.1f} MiB   "
+          f"colunar: {memoria_colunar / 2**20:8.1f} MiB   ({memoria_dicts / memoria_colunar:.0f}x)")
+    print(f"  agregação lista de dicts: {tempo_dicts * 1000:7.1f} ms   "
+          f"colunar: {tempo_colunar * 1000:7.1f} ms   ({tempo_dicts / tempo_colunar:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
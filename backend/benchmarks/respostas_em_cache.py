@@ -0,0 +1,52 @@
+"""
+Requisições por segundo nas rotas estáticas e de estatísticas com o cache de
+corpos pré-serializados, comparadas a um app WSGI mínimo e a jsonify a cada requisição
+
+Uso (a partir de backend/):
+    python -m benchmarks.respostas_em_cache [--requisicoes 5000]
+"""
+
+import argparse
+import time
+from flask import Flask, jsonify
+from flask_cors import CORS
+from app import app
+from routes.apoio import DICAS_SEGURANCA
+
+
+def medir(cliente, url: str, requisicoes: int, cabecalhos: dict) -> float:
+    cliente.get(url, headers=cabecalhos)
+    inicio = time.perf_counter()
+    for _ in range(requisicoes):
+        cliente.get(url, headers=cabecalhos)
+    return requisicoes / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requisicoes', type=int, default=5000)
+    args = parser.parse_args()
+
+    # Referências com a mesma pilha do app (Flask + CORS): rota vazia e a rota
+    # antiga, que monta e serializa o payload com jsonify a cada requisição
+    referencia = Flask('referencia')
+    CORS(referencia)
+    referencia.add_url_rule('/vazio', 'vazio', lambda: ('', 200))
+    referencia.add_url_rule('/dicas', 'dicas', lambda: (jsonify(DICAS_SEGURANCA), 200))
+
+    gzip = {'Accept-Encoding': 'gzip, br'}
+    casos = [
+        ('rota vazia', referencia.test_client(), '/vazio', {}),
+        ('dicas com jsonify', referencia.test_client(), '/dicas', {}),
+        ('dicas pré-serializadas', app.test_client(), '/api/recursos-apoio/dicas-seguranca', {}),
+        ('dicas comprimidas', app.test_client(), '/api/recursos-apoio/dicas-seguranca', gzip),
+        ('perguntas comprimidas', app.test_client(), '/api/perguntas', gzip),
+        ('estatísticas em cache', app.test_client(), '/api/estatisticas', gzip),
+    ]
+
+    for nome, cliente, url, cabecalhos in casos:
+        print(f"{nome:>24}: {medir(cliente, url, args.requisicoes, cabecalhos):8.0f} req/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Vazão e latência (p50/p99) da API servida por WSGI (app.run) e por ASGI (uvicorn asgi:app)
+
+Cada servidor roda num processo próprio, com dados num diretório temporário
+e fsync a cada lote gravado. Um gerador de carga assíncrono mantém N conexões
+keep-alive enviando uma mistura de leituras de /api/estatisticas e envios
+de /api/questionario durante alguns segundos por nível de concorrência.
+
+Uso (a partir de backend/):
+    python -m benchmarks.servidor_asgi [--conexoes 16 64 256] [--segundos 5] [--envios 0.2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from perguntas import PERGUNTAS
+
+SERVIDORES = {
+    'wsgi (app.run)': [
+        sys.executable, '-c',
+        'import os\n'
+        'from app import app, aquecer_armazenamento\n'
+        'aquecer_armazenamento()\n'
+        "app.run(port=int(os.environ['PORT']), threaded=True)"
+    ],
+    'asgi (uvicorn)': [
+        sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', '{porta}', '--log-level', 'warning'
+    ]
+}
+
+
+def _requisicoes(host: str):
+    corpo = json.dumps({'respostas': {str(p['id']): p['opcoes'][0] for p in PERGUNTAS}}).encode()
+    leitura = f'GET /api/estatisticas HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode()
+    envio = (f'POST /api/questionario HTTP/1.1\r\nHost: {host}\r\n'
+             f'Content-Type: application/json\r\nContent-Length: {len(corpo)}\r\n\r\n').encode() + corpo
+    return leitura, envio
+
+
+async def _cliente(porta: int, fim: float, envios: float, latencias: list, erros: list):
+    leitura, envio = _requisicoes(f'127.0.0.1:{porta}')
+    writer = None
+    try:
+        while time.perf_counter() < fim:
+            inicio = time.perf_counter()
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', porta)
+            writer.write(envio if random.random() < envios else leitura)
+            await writer.drain()
+
+            cabecalho = await reader.readuntil(b'\r\n\r\n')
+            linhas = cabecalho.decode('latin-1').lower().split('\r\n')
+            tamanho = next(int(linha.split(':', 1)[1]) for linha in linhas
+                           if linha.startswith('content-length:'))
+            await reader.readexactly(tamanho)
+
+            if linhas[0].split(' ')[1] != '200':
+                erros.append(1)
+            latencias.append(time.perf_counter() - inicio)
+
+            # O servidor de desenvolvimento encerra a conexão depois de alguns envios
+            if 'connection: close' in linhas:
+                writer.close()
+                writer = None
+    except (OSError, asyncio.IncompleteReadError, StopIteration):
+        erros.append(1)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+async def gerar_carga(porta: int, conexoes: int, segundos: float, envios: float):
+    latencias, erros = [], []
+    fim = time.perf_counter() + segundos
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_cliente(porta, fim, envios, latencias, erros) for _ in range(conexoes)))
+    return latencias, len(erros), time.perf_counter() - inicio
+
+
+def _iniciar(nome: str, porta: int, diretorio: str) -> subprocess.Popen:
+    ambiente = {
+        **os.environ,
+        'PORT': str(porta),
+        'FLASK_ENV': 'production',
+        'DATABASE_BACKEND': 'json',
+        'DATABASE_MODE': 'log',
+        'DATABASE_JSON': os.path.join(diretorio, 'data.json'),
+        'DATABASE_LOG': os.path.join(diretorio, 'respostas.log'),
+        'DATABASE_FSYNC': 'always'
+    }
+    comando = [parte.format(porta=porta) for parte in SERVIDORES[nome]]
+    processo = subprocess.Popen(comando, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    for _ in range(200):
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{porta}/api/health', timeout=1)
+            return processo
+        except OSError:
+            time.sleep(0.05)
+    processo.kill()
+    raise RuntimeError(f'O servidor {nome} não respondeu')
+
+
+def percentil(valores: list, p: float) -> float:
+    return valores[min(len(valores) - 1, int(len(valores) * p))] if valores else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--conexoes', type=int, nargs='+', default=[16, 64, 256])
+    parser.add_argument('--segundos', type=float, default=5)
+    parser.add_argument('--envios', type=float, default=0.2, help='fração das requisições que são envios')
+    parser.add_argument('--porta', type=int, default=5077)
+    args = parser.parse_args()
+
+    print(f"{'servidor':>15}  {'conexões':>8}  {'req/s':>7}  {'p50 ms':>7}  {'p99 ms':>7}  {'erros':>5}")
+    for nome in SERVIDORES:
+        for conexoes in args.conexoes:
+            with tempfile.TemporaryDirectory() as diretorio:
+                processo = _iniciar(nome, args.porta, diretorio)
+                try:
+                    latencias, erros, duracao = asyncio.run(
+                        gerar_carga(args.porta, conexoes, args.segundos, args.envios)
+                    )
+                finally:
+                    processo.terminate()
+                    processo.wait()
+
+            latencias.sort()
+            print(f"{nome:>15}  {conexoes:>8}  {len(latencias) / duracao:>7.0f}  "
+                  f"{percentil(latencias, 0.5) * 1000:>7.1f}  {percentil(latencias, 0.99) * 1000:>7.1f}  "
+                  f"{erros:>5}")
+
+
+if __name__ == '__main__':
+    main()
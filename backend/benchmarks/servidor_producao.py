@@ -0,0 +1,91 @@
+"""
+Vazão do servidor de produção (servidor.py) conforme o número de workers
+
+Para cada quantidade de workers, sobe o servidor sobre um log já com
+`--respostas` respostas (fsync a cada lote) e aplica a mesma carga de
+benchmarks.servidor_asgi: N conexões keep-alive misturando leituras de
+/api/estatisticas e envios de /api/questionario. Mostra também quanto o
+servidor levou para ficar pronto: os dados são carregados uma vez no
+processo principal, então esse tempo não cresce com o número de workers.
+
+A vazão só escala até o número de núcleos da máquina (mostrado no início);
+acima disso os workers disputam a mesma CPU.
+
+Uso (a partir de backend/):
+    python -m benchmarks.servidor_producao [--workers 1 2 4 8] [--conexoes 64] [--segundos 5]
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from benchmarks.inicializacao_snapshot import anexar, gerar
+from benchmarks.servidor_asgi import gerar_carga, percentil
+from servidor import _nucleos
+
+
+def _iniciar(workers: int, porta: int, diretorio: str):
+    ambiente = {
+        **os.environ,
+        'PORT': str(porta),
+        'HOST': '127.0.0.1',
+        'SERVIDOR_WORKERS': str(workers),
+        'DATABASE_BACKEND': 'json',
+        'DATABASE_MODE': 'log',
+        'DATABASE_JSON': os.path.join(diretorio, 'data.json'),
+        'DATABASE_LOG': os.path.join(diretorio, 'respostas.log'),
+        'DATABASE_FSYNC': 'always'
+    }
+    inicio = time.perf_counter()
+    processo = subprocess.Popen([sys.executable, 'servidor.py'], env=ambiente,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    for _ in range(600):
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{porta}/api/health', timeout=1)
+            return processo, time.perf_counter() - inicio
+        except OSError:
+            time.sleep(0.05)
+    processo.kill()
+    raise RuntimeError(f'O servidor com {workers} workers não respondeu')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--respostas', type=int, default=50000, help='respostas já no log')
+    parser.add_argument('--conexoes', type=int, default=64)
+    parser.add_argument('--segundos', type=float, default=5)
+    parser.add_argument('--envios', type=float, default=0.2, help='fração das requisições que são envios')
+    parser.add_argument('--porta', type=int, default=5078)
+    args = parser.parse_args()
+
+    print(f"Núcleos disponíveis: {_nucleos()}")
+    print(f"{'workers':>7}  {'pronto s':>8}  {'req/s':>7}  {'ganho':>6}  {'p50 ms':>7}  {'p99 ms':>7}  {'erros':>5}")
+    base = None
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as diretorio:
+            anexar(os.path.join(diretorio, 'respostas.log'), gerar(1, args.respostas))
+            processo, pronto = _iniciar(workers, args.porta, diretorio)
+            try:
+                latencias, erros, duracao = asyncio.run(
+                    gerar_carga(args.porta, args.conexoes, args.segundos, args.envios)
+                )
+            finally:
+                processo.terminate()
+                processo.wait()
+
+        latencias.sort()
+        vazao = len(latencias) / duracao
+        base = base or vazao
+        print(f"{workers:>7}  {pronto:>8.2f}  {vazao:>7.0f}  {vazao / base:>5.2f}x  "
+              f"{percentil(latencias, 0.5) * 1000:>7.1f}  {percentil(latencias, 0.99) * 1000:>7.1f}  "
+              f"{erros:>5}")
+
+
+if __name__ == '__main__':
+    main()
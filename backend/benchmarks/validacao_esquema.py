@@ -0,0 +1,59 @@
+"""
+Custo da validação por requisição: varredura das listas de opções x EsquemaQuestionario
+
+Uso (a partir de backend/):
+    python -m benchmarks.validacao_esquema [--repeticoes 200000]
+"""
+
+import argparse
+import random
+import timeit
+from questionarios import ESQUEMA
+from models import Resposta
+from perguntas import PERGUNTAS
+
+
+def validar_por_lista(respostas):
+    """Validação anterior da rota /questionario/validar, mais a pontuação pelo model"""
+    if len(respostas) != len(PERGUNTAS):
+        return None
+    for pergunta in PERGUNTAS:
+        pergunta_id = str(pergunta['id'])
+        if pergunta_id not in respostas or respostas[pergunta_id] not in pergunta['opcoes']:
+            return None
+    return Resposta(id=None, respostas=respostas).calcular_pontuacao()
+
+
+def validar_por_esquema(respostas):
+    codigos, erro = ESQUEMA.validar(respostas)
+    return None if erro else ESQUEMA.pontuar(codigos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=200000)
+    args = parser.parse_args()
+
+    # Pior caso para a varredura: todas as respostas na última opção
+    casos = {
+        'válido (opções aleatórias)': {str(p['id']): random.choice(p['opcoes']) for p in PERGUNTAS},
+        'válido (última opção)': {str(p['id']): p['opcoes'][-1] for p in PERGUNTAS},
+        'inválido (última pergunta)': {
+            **{str(p['id']): p['opcoes'][0] for p in PERGUNTAS},
+            str(PERGUNTAS[-1]['id']): 'Talvez'
+        }
+    }
+
+    for nome, respostas in casos.items():
+        assert validar_por_lista(respostas) == validar_por_esquema(respostas)
+        tempos = [
+            min(timeit.repeat(lambda: validar(respostas), number=args.repeticoes, repeat=3))
+            / args.repeticoes * 1e6
+            for validar in (validar_por_lista, validar_por_esquema)
+        ]
+        print(f"{nome:28} lista: {tempos[0]:6.2f} µs   esquema: {tempos[1]:6.2f} µs   "
+              f"({tempos[0] / tempos[1]:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
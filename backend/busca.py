@@ -0,0 +1,190 @@
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Peso de cada campo indexado; um termo no nome vale mais que na descrição
+PESOS_CAMPOS = {'nome': 3.0, 'descricao': 1.0}
+
+# Fator aplicado à relevância conforme o tipo de correspondência do termo
+PESO_EXATO = 1.0
+PESO_PREFIXO = 0.8
+PESO_APROXIMADO = 0.5
+
+# Termos mais curtos que isso não são completados por prefixo nem corrigidos
+TAMANHO_MINIMO_PREFIXO = 2
+TAMANHO_MINIMO_APROXIMADO = 4
+
+_TOKEN = re.compile(r'\w+')
+# Sinais diacríticos que sobram após a decomposição NFKD ('ê' -> 'e' + '\u0302')
+_DIACRITICOS = re.compile(r'[\u0300-\u036f]')
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas e sem acentos: 'Violência' -> 'violencia'"""
+    texto = texto.casefold()
+    if texto.isascii():
+        return texto
+    return _DIACRITICOS.sub('', unicodedata.normalize('NFKD', texto))
+
+
+def tokenizar(texto: Optional[str]) -> List[str]:
+    return _TOKEN.findall(normalizar(texto)) if texto else []
+
+
+def _remocoes(termo: str) -> Set[str]:
+    """Variações do termo com uma letra a menos (vizinhança de remoção)"""
+    return {termo[:i] + termo[i + 1:] for i in range(len(termo))}
+
+
+def _distancia_ate_um(a: str, b: str) -> bool:
+    """True se `a` e `b` diferem por no máximo uma edição (incluindo transposição)"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    if a[i + 1:] == b[i + 1:]:
+        return True
+    # Transposição de duas letras vizinhas: 'violnecia' x 'violencia'
+    return (i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i]
+            and a[i + 2:] == b[i + 2:])
+
+
+class IndiceBusca:
+    """
+    Índice invertido sobre os termos (sem acento) do nome e da descrição.
+
+    Cada termo aponta para os ids que o contêm e o peso somado dos campos.
+    Um termo da consulta casa com o termo exato, com termos que começam por
+    ele (vocabulário ordenado + bisect) e, a partir de 4 letras, com termos
+    a uma edição de distância (vizinhança de remoção, como no SymSpell).
+    Todos os termos da consulta precisam casar; a relevância é a soma do
+    melhor casamento de cada termo, e empates são desfeitos pelo id.
+    """
+
+    def __init__(self, recursos: Iterable[Dict] = ()):
+        self._postagens: Dict[str, Dict[int, float]] = {}
+        self._termos_por_recurso: Dict[int, Set[str]] = {}
+        self._vocabulario: List[str] = []
+        self._vizinhos: Dict[str, Set[str]] = {}
+        for recurso in recursos:
+            self.indexar(recurso)
+
+    def __len__(self) -> int:
+        return len(self._termos_por_recurso)
+
+    def indexar(self, recurso: Dict):
+        """Adiciona o recurso ao índice, substituindo a versão anterior do mesmo id"""
+        recurso_id = recurso['id']
+        self.remover(recurso_id)
+
+        pesos: Dict[str, float] = {}
+        for campo, peso in PESOS_CAMPOS.items():
+            for termo in set(tokenizar(recurso.get(campo))):
+                pesos[termo] = pesos.get(termo, 0.0) + peso
+
+        for termo, peso in pesos.items():
+            postagens = self._postagens.get(termo)
+            if postagens is None:
+                postagens = self._postagens[termo] = {}
+                self._adicionar_ao_vocabulario(termo)
+            postagens[recurso_id] = peso
+        self._termos_por_recurso[recurso_id] = set(pesos)
+
+    def remover(self, recurso_id: int) -> bool:
+        termos = self._termos_por_recurso.pop(recurso_id, None)
+        if termos is None:
+            return False
+
+        for termo in termos:
+            postagens = self._postagens[termo]
+            del postagens[recurso_id]
+            if not postagens:
+                del self._postagens[termo]
+                self._remover_do_vocabulario(termo)
+        return True
+
+    def _adicionar_ao_vocabulario(self, termo: str):
+        insort(self._vocabulario, termo)
+        for variacao in _remocoes(termo) | {termo}:
+            self._vizinhos.setdefault(variacao, set()).add(termo)
+
+    def _remover_do_vocabulario(self, termo: str):
+        del self._vocabulario[bisect_left(self._vocabulario, termo)]
+        for variacao in _remocoes(termo) | {termo}:
+            vizinhos = self._vizinhos[variacao]
+            vizinhos.discard(termo)
+            if not vizinhos:
+                del self._vizinhos[variacao]
+
+    def _com_prefixo(self, prefixo: str) -> Iterable[str]:
+        posicao = bisect_left(self._vocabulario, prefixo)
+        while posicao < len(self._vocabulario) and self._vocabulario[posicao].startswith(prefixo):
+            yield self._vocabulario[posicao]
+            posicao += 1
+
+    def _aproximados(self, termo: str) -> Set[str]:
+        candidatos = set()
+        for variacao in _remocoes(termo) | {termo}:
+            candidatos |= self._vizinhos.get(variacao, set())
+        return {c for c in candidatos if _distancia_ate_um(termo, c)}
+
+    def _casar_termo(self, termo: str) -> Dict[int, float]:
+        """Melhor relevância de cada recurso para um termo da consulta"""
+        casamentos = [(termo, PESO_EXATO)]
+        if len(termo) >= TAMANHO_MINIMO_PREFIXO:
+            casamentos += [(t, PESO_PREFIXO) for t in self._com_prefixo(termo) if t != termo]
+        if len(termo) >= TAMANHO_MINIMO_APROXIMADO:
+            casamentos += [(t, PESO_APROXIMADO) for t in self._aproximados(termo) if t != termo]
+
+        relevancia: Dict[int, float] = {}
+        for termo_indexado, fator in casamentos:
+            for recurso_id, peso in self._postagens.get(termo_indexado, {}).items():
+                valor = peso * fator
+                if valor > relevancia.get(recurso_id, 0.0):
+                    relevancia[recurso_id] = valor
+        return relevancia
+
+    def buscar(self, consulta: str, filtro: Optional[Callable[[int], bool]] = None,
+               limite: Optional[int] = None, deslocamento: int = 0) -> Tuple[int, List[Tuple[int, float]]]:
+        """
+        Ids que casam com todos os termos da consulta, do mais ao menos relevante
+
+        Returns:
+            (total de resultados, página [(id, relevância), ...])
+        """
+        termos = list(dict.fromkeys(tokenizar(consulta)))
+        if not termos:
+            return 0, []
+
+        # Começa pelo termo mais seletivo para cortar candidatos cedo
+        resultados = None
+        for relevancia in sorted((self._casar_termo(t) for t in termos), key=len):
+            if resultados is None:
+                resultados = relevancia
+            else:
+                resultados = {
+                    recurso_id: total + relevancia[recurso_id]
+                    for recurso_id, total in resultados.items() if recurso_id in relevancia
+                }
+            if not resultados:
+                return 0, []
+
+        if filtro is not None:
+            resultados = {i: r for i, r in resultados.items() if filtro(i)}
+
+        chave = lambda item: (-item[1], item[0])
+        if limite is None:
+            pagina = sorted(resultados.items(), key=chave)[deslocamento:]
+        else:
+            pagina = heapq.nsmallest(deslocamento + limite, resultados.items(), key=chave)[deslocamento:]
+        return len(resultados), [(i, round(r, 4)) for i, r in pagina]
@@ -0,0 +1,194 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from busca import IndiceBusca, normalizar
+from geo import IndiceEspacial
+
+# Estado usado pelos recursos de abrangência nacional
+NACIONAL = 'BR'
+
+
+def chave_natural(recurso: Dict) -> Tuple[str, str, str]:
+    """Identifica o mesmo serviço entre importações: estado, nome e endereço normalizados"""
+    return (
+        recurso.get('estado', NACIONAL),
+        ' '.join(normalizar(recurso.get('nome') or '').split()),
+        ' '.join(normalizar(recurso.get('endereco') or '').split())
+    )
+
+
+class CatalogoRecursos:
+    """
+    Recursos de apoio com índices em memória por id, estado, tipo e estado+tipo.
+
+    Cada consulta é uma busca em dicionário seguida apenas da junção dos
+    recursos do estado com os nacionais; os índices são refeitos a cada
+    alteração do catálogo. Os resultados seguem a ordem de inserção.
+    Os índices de busca textual e espacial são atualizados recurso a recurso.
+    """
+
+    def __init__(self, recursos: Iterable[Dict] = ()):
+        self._recursos: List[Dict] = list(recursos)
+        self.indice_busca = IndiceBusca(self._recursos)
+        self.indice_espacial = IndiceEspacial(self._recursos)
+        self.reconstruir_indices()
+
+    def reconstruir_indices(self):
+        # Monta os índices em variáveis locais e só então os publica, para que
+        # leituras concorrentes nunca vejam um índice pela metade
+        posicao_por_id, por_id, por_chave = {}, {}, {}
+        por_estado, por_tipo, por_estado_tipo = {}, {}, {}
+
+        for posicao, recurso in enumerate(self._recursos):
+            estado, tipo = recurso.get('estado', NACIONAL), recurso.get('tipo')
+            posicao_por_id[recurso['id']] = posicao
+            por_id[recurso['id']] = recurso
+            por_chave[chave_natural(recurso)] = recurso['id']
+            por_estado.setdefault(estado, []).append(recurso)
+            por_tipo.setdefault(tipo, []).append(recurso)
+            por_estado_tipo.setdefault((estado, tipo), []).append(recurso)
+
+        self._posicao = posicao_por_id
+        self._por_id = por_id
+        self._por_chave = por_chave
+        self._por_estado = por_estado
+        self._por_tipo = por_tipo
+        self._por_estado_tipo = por_estado_tipo
+
+    def __len__(self) -> int:
+        return len(self._recursos)
+
+    def todos(self) -> List[Dict]:
+        return list(self._recursos)
+
+    def obter(self, recurso_id: int) -> Optional[Dict]:
+        return self._por_id.get(recurso_id)
+
+    def _ordenar(self, recursos: List[Dict]) -> List[Dict]:
+        return sorted(recursos, key=lambda r: self._posicao[r['id']])
+
+    def listar(self, estado: Optional[str] = None, tipo: Optional[str] = None) -> List[Dict]:
+        """
+        Recursos nacionais, mais os do estado quando informado, opcionalmente de um tipo
+
+        Mesma semântica de `Database.obter_recursos_apoio`: sem estado, só os nacionais.
+        """
+        estados = [NACIONAL] if not estado or estado == NACIONAL else [estado, NACIONAL]
+
+        if tipo:
+            grupos = [self._por_estado_tipo.get((e, tipo), []) for e in estados]
+        else:
+            grupos = [self._por_estado.get(e, []) for e in estados]
+
+        if len(grupos) == 1:
+            return list(grupos[0])
+        return self._ordenar(grupos[0] + grupos[1])
+
+    def por_tipo(self, tipo: str) -> List[Dict]:
+        """Recursos de um tipo em todos os estados"""
+        return list(self._por_tipo.get(tipo, []))
+
+    def estados(self) -> List[str]:
+        return sorted(self._por_estado)
+
+    def buscar(self, termo: str, estado: Optional[str] = None, tipo: Optional[str] = None,
+               limite: Optional[int] = None, deslocamento: int = 0) -> Dict:
+        """
+        Busca textual ordenada por relevância, opcionalmente restrita a estado (+ BR) e tipo
+
+        Returns:
+            {'total': int, 'resultados': [recurso, ...]} com a página pedida
+        """
+        filtro = None
+        if estado or tipo:
+            estados = {estado, NACIONAL} if estado else None
+
+            def filtro(recurso_id):
+                recurso = self._por_id[recurso_id]
+                return ((estados is None or recurso.get('estado', NACIONAL) in estados)
+                        and (not tipo or recurso.get('tipo') == tipo))
+
+        total, pagina = self.indice_busca.buscar(termo, filtro, limite, deslocamento)
+        return {
+            'total': total,
+            'resultados': [self._por_id[recurso_id] for recurso_id, _ in pagina]
+        }
+
+    def proximos(self, latitude: float, longitude: float, raio_km: float,
+                 tipo: Optional[str] = None, limite: int = 10) -> List[Dict]:
+        """Recursos georreferenciados mais próximos do ponto, com `distancia_km`"""
+        filtro = (lambda recurso_id: self._por_id[recurso_id].get('tipo') == tipo) if tipo else None
+        return [
+            {**self._por_id[recurso_id], 'distancia_km': round(distancia, 2)}
+            for recurso_id, distancia in self.indice_espacial.proximos(
+                latitude, longitude, raio_km, limite, filtro
+            )
+        ]
+
+    def adicionar(self, recurso: Dict):
+        self.adicionar_varios([recurso])
+
+    def _inserir(self, recurso: Dict):
+        """Insere ou substitui pelo id, sem refazer os índices por estado e tipo"""
+        posicao = self._posicao.get(recurso['id'])
+        if posicao is not None:
+            self._recursos[posicao] = recurso
+        else:
+            self._posicao[recurso['id']] = len(self._recursos)
+            self._recursos.append(recurso)
+        self.indice_busca.indexar(recurso)
+        self.indice_espacial.indexar(recurso)
+
+    def adicionar_varios(self, recursos: Iterable[Dict]):
+        """Insere ou substitui (pelo id) vários recursos e refaz os índices uma vez"""
+        for recurso in recursos:
+            self._inserir(recurso)
+        self.reconstruir_indices()
+
+    def importar(self, recursos: Iterable[Dict],
+                 ao_gravar: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Insere ou atualiza recursos pela chave natural, consumindo `recursos` sob demanda
+
+        Um recurso cuja chave natural já existe mantém o id atual; os novos
+        recebem ids a partir do maior existente. Os índices por estado e tipo
+        são refeitos uma única vez, ao final.
+
+        Args:
+            recursos: Recursos validados, sem id
+            ao_gravar: Chamado com cada recurso já com id (ex: para persistir em lotes)
+
+        Returns:
+            Dicionário com o total de recursos inseridos e atualizados
+        """
+        por_chave = dict(self._por_chave)
+        proximo_id = max(self._por_id, default=0) + 1
+        inseridos = atualizados = 0
+
+        try:
+            for recurso in recursos:
+                chave = chave_natural(recurso)
+                recurso_id = por_chave.get(chave)
+                if recurso_id is None:
+                    recurso_id = por_chave[chave] = proximo_id
+                    proximo_id += 1
+                    inseridos += 1
+                else:
+                    atualizados += 1
+
+                recurso = {'id': recurso_id, **recurso}
+                self._inserir(recurso)
+                if ao_gravar:
+                    ao_gravar(recurso)
+        finally:
+            self.reconstruir_indices()
+
+        return {'inseridos': inseridos, 'atualizados': atualizados}
+
+    def remover(self, recurso_id: int) -> bool:
+        posicao = self._posicao.get(recurso_id)
+        if posicao is None:
+            return False
+        del self._recursos[posicao]
+        self.indice_busca.remover(recurso_id)
+        self.indice_espacial.remover(recurso_id)
+        self.reconstruir_indices()
+        return True
@@ -0,0 +1,185 @@
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from perguntas import VERSAO_INICIAL
+
+# Código usado quando a pergunta não foi respondida ou a resposta não está em `opcoes`
+SEM_RESPOSTA = -1
+
+EPOCH = datetime(1970, 1, 1)
+UM_MICROSSEGUNDO = timedelta(microseconds=1)
+
+
+def para_microssegundos(momento: datetime) -> int:
+    """Converte um datetime (sem fuso, como os gravados pela aplicação) em µs desde 1970"""
+    return (momento - EPOCH) // UM_MICROSSEGUNDO
+
+
+def de_microssegundos(valor: int) -> datetime:
+    return EPOCH + timedelta(microseconds=valor)
+
+
+class ArmazemColunar:
+    """
+    Respostas guardadas em colunas compactas em vez de uma lista de dicts.
+
+    Cada pergunta ocupa um `array('b')` com o índice da opção escolhida
+    (1 byte por resposta); ids e timestamps (µs desde 1970) ficam em
+    `array('q')` e a versão do questionário em `array('H')`. Uma resposta
+    completa custa 12 + 18 bytes, contra centenas de bytes de um dict com
+    chaves e textos em português. Todas as linhas têm as mesmas perguntas:
+    versões de mapeamentos diferentes ficam em armazéns separados.
+
+    Respostas gravadas antes de uma mudança nas opções podem trazer perguntas
+    ou opções que não existem nas colunas: esses valores ficam em `extras`,
+    por id, para que `obter` devolva a entrada como foi gravada. Eles não
+    entram nas colunas, então contagens e leituras por código os ignoram.
+    """
+
+    def __init__(self, perguntas: List[Dict]):
+        self.perguntas = perguntas
+        self.chaves = [str(p['id']) for p in perguntas]
+        self.opcoes = [list(p['opcoes']) for p in perguntas]
+        self._codigos = [{opcao: i for i, opcao in enumerate(opcoes)} for opcoes in self.opcoes]
+        self._indices_chaves = {chave: i for i, chave in enumerate(self.chaves)}
+
+        self.ids = array('q')
+        self.timestamps = array('q')
+        self.questionarios = array('H')
+        self.colunas = [array('b') for _ in perguntas]
+        # {id: {pergunta_id: valor}} dos valores fora das colunas (normalmente vazio)
+        self.extras: Dict[int, Dict] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def codificar(self, respostas: Dict) -> List[int]:
+        """Converte {pergunta_id: opção} em um código por pergunta"""
+        return [
+            codigos.get(respostas.get(chave), SEM_RESPOSTA)
+            for chave, codigos in zip(self.chaves, self._codigos)
+        ]
+
+    def decodificar(self, codigos: List[int]) -> Dict:
+        return {
+            chave: opcoes[codigo]
+            for chave, opcoes, codigo in zip(self.chaves, self.opcoes, codigos)
+            if codigo != SEM_RESPOSTA
+        }
+
+    def adicionar(self, id: int, timestamp: datetime, respostas: Dict, questionario: int = VERSAO_INICIAL):
+        self.ids.append(id)
+        self.timestamps.append(para_microssegundos(timestamp))
+        self.questionarios.append(questionario)
+        codigos = self.codificar(respostas)
+        for coluna, codigo in zip(self.colunas, codigos):
+            coluna.append(codigo)
+
+        fora = {
+            chave: valor for chave, valor in respostas.items()
+            if chave not in self._indices_chaves or codigos[self._indices_chaves[chave]] == SEM_RESPOSTA
+        }
+        if fora:
+            self.extras[id] = fora
+
+    def obter(self, indice: int) -> Dict:
+        """Reconstrói a entrada no mesmo formato gravado no log"""
+        respostas = self.decodificar([coluna[indice] for coluna in self.colunas])
+        if self.extras:
+            respostas.update(self.extras.get(self.ids[indice], {}))
+        return {
+            'id': self.ids[indice],
+            'respostas': respostas,
+            'timestamp': de_microssegundos(self.timestamps[indice]).isoformat(),
+            'questionario': self.questionarios[indice]
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        for indice in range(len(self)):
+            yield self.obter(indice)
+
+    def iterar_codigos(self, inicio_us: Optional[int] = None, fim_us: Optional[int] = None,
+                       ate: Optional[int] = None, bloco: int = 4096) -> Iterator[Tuple[int, List[int]]]:
+        """
+        (timestamp em µs, códigos) de cada resposta em [inicio_us, fim_us), em ordem de gravação
+
+        As colunas são fatiadas em blocos de `bloco` linhas, então a memória extra
+        não depende do total. `ate` limita a leitura às linhas existentes num
+        momento anterior, para iterar sem segurar travas enquanto outras são gravadas.
+        """
+        total = len(self) if ate is None else ate
+        for comeco in range(0, total, bloco):
+            final = min(comeco + bloco, total)
+            colunas = [coluna[comeco:final] for coluna in self.colunas]
+            for timestamp, *codigos in zip(self.timestamps[comeco:final], *colunas):
+                if (inicio_us is None or timestamp >= inicio_us) and (fim_us is None or timestamp < fim_us):
+                    yield timestamp, codigos
+
+    def contar(self) -> Dict:
+        """
+        Contagens por pergunta e resposta no mesmo formato de `obter_estatisticas`
+
+        `bytes.count` percorre cada coluna em C, sem criar objetos por resposta.
+        """
+        analise = {}
+        for chave, opcoes, coluna in zip(self.chaves, self.opcoes, self.colunas):
+            dados = coluna.tobytes()
+            contagens = {
+                opcao: dados.count(codigo.to_bytes(1, 'little', signed=True))
+                for codigo, opcao in enumerate(opcoes)
+            }
+            contagens = {opcao: count for opcao, count in contagens.items() if count}
+            if contagens:
+                analise[chave] = contagens
+        return analise
+
+    def copiar(self) -> 'ArmazemColunar':
+        """Cópia independente das colunas (cópia de memória, sem decodificar)"""
+        copia = ArmazemColunar(self.perguntas)
+        copia.ids = self.ids[:]
+        copia.timestamps = self.timestamps[:]
+        copia.questionarios = self.questionarios[:]
+        copia.colunas = [coluna[:] for coluna in self.colunas]
+        copia.extras = dict(self.extras)
+        return copia
+
+    def separar(self, limite_us: int) -> Tuple['ArmazemColunar', 'ArmazemColunar']:
+        """
+        Divide as respostas em (anteriores a `limite_us`, demais), em dois armazéns novos
+
+        O original não é alterado, então leituras em andamento sobre ele seguem válidas.
+        """
+        remover = [i for i, timestamp in enumerate(self.timestamps) if timestamp < limite_us]
+        if not remover:
+            return ArmazemColunar(self.perguntas), self.copiar()
+
+        manter = [i for i, timestamp in enumerate(self.timestamps) if timestamp >= limite_us]
+        return self._selecionar(remover), self._selecionar(manter)
+
+    def _selecionar(self, indices: List[int]) -> 'ArmazemColunar':
+        selecao = ArmazemColunar(self.perguntas)
+        if self.extras:
+            selecionados = {self.ids[i] for i in indices}
+            selecao.extras = {id: valores for id, valores in self.extras.items() if id in selecionados}
+        # As respostas chegam em ordem de horário: o caso comum é um único trecho contíguo
+        if indices and indices[-1] - indices[0] + 1 == len(indices):
+            trecho = slice(indices[0], indices[-1] + 1)
+            selecao.ids = self.ids[trecho]
+            selecao.timestamps = self.timestamps[trecho]
+            selecao.questionarios = self.questionarios[trecho]
+            selecao.colunas = [coluna[trecho] for coluna in self.colunas]
+            return selecao
+
+        selecao.ids = array('q', (self.ids[i] for i in indices))
+        selecao.timestamps = array('q', (self.timestamps[i] for i in indices))
+        selecao.questionarios = array('H', (self.questionarios[i] for i in indices))
+        selecao.colunas = [array('b', (coluna[i] for i in indices)) for coluna in self.colunas]
+        return selecao
+
+    def memoria_bytes(self) -> int:
+        """Bytes ocupados pelos dados das colunas"""
+        return sum(len(c) * c.itemsize for c in self.todas_colunas())
+
+    def todas_colunas(self) -> List[array]:
+        """Colunas na ordem em que são gravadas no snapshot"""
+        return [self.ids, self.timestamps, self.questionarios, *self.colunas]
@@ -0,0 +1,388 @@
+import hashlib
+import time
+from datetime import datetime
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from agregados import GRANULARIDADES, AgregadosTemporais, UMA_HORA, UM_DIA, teto_hora, truncar_hora
+from colunar import EPOCH
+from models import Estatistica
+from perguntas import VERSAO_INICIAL
+from questionarios import RegistroQuestionarios
+
+# Janela padrão de baldes horários no bloco compartilhado (~400 dias)
+HORAS_PADRAO = 24 * 400
+
+# Campos do cabeçalho (int64)
+SEQUENCIA = 0      # ímpar enquanto um escritor altera o bloco
+VALIDO = 1         # 0: alguma resposta não cabe no layout, leitores usam o caminho local
+ULTIMO_ID = 2      # maior id já somado ao bloco
+REGISTROS = 3      # respostas somadas (inclui as consolidadas pela retenção)
+HORA_ANTERIOR = 4  # hora mais recente somada a `anterior` (-1: nenhuma)
+CAMPOS_CABECALHO = 8
+
+# Tentativas de leitura sem escritor concorrente antes de desistir do bloco. Entre
+# elas a thread cede a CPU ao escritor, com pausas que dobram até ESPERA_MAXIMA_S
+TENTATIVAS_LEITURA = 32
+ESPERA_INICIAL_S = 0.00001
+ESPERA_MAXIMA_S = 0.001
+
+# Consultas convertidas guardadas por processo até a próxima escrita
+MAXIMO_CONSULTAS_MEMORIZADAS = 256
+
+
+def _indice_hora(momento: datetime) -> int:
+    return (momento - EPOCH) // UMA_HORA
+
+
+class ContadoresCompartilhados:
+    """
+    Contadores agregados num segmento de memória compartilhada entre processos.
+
+    Com vários workers sobre o mesmo log, cada um teria de reaplicar as
+    respostas gravadas pelos outros antes de responder estatísticas. Aqui os
+    contadores ficam num bloco único (`multiprocessing.shared_memory`) em
+    matrizes int64 versão × pergunta × opção, uma global e uma por balde
+    horário. Baldes mais antigos que a janela de `horas` são somados a
+    `anterior`. Quem grava soma ao bloco sob a trava de arquivo do log; quem
+    lê copia as fatias que precisa sem trava nem chamada de sistema, usando
+    o contador de sequência do cabeçalho para descartar leituras feitas no
+    meio de uma escrita (seqlock).
+
+    O bloco é só um cache: o log continua sendo a fonte dos dados. Cada
+    escrita confere se o bloco está em dia (`ULTIMO_ID`) e, se não estiver,
+    ele é reconstruído a partir dos contadores locais do processo.
+    """
+
+    def __init__(self, identificador: str, registro: RegistroQuestionarios, horas: int = HORAS_PADRAO):
+        if horas < 24:
+            raise ValueError("A janela compartilhada deve ter pelo menos 24 horas")
+
+        self.horas = horas
+        definicoes = [registro.obter(v['versao']) for v in registro.listar()]
+        self._indice_versao = {d.versao: i for i, d in enumerate(definicoes)}
+        self._chaves = [d.esquema.chaves for d in definicoes]
+        self._opcoes = [d.esquema.opcoes for d in definicoes]
+        self._mapeamentos = [d.mapeamento for d in definicoes]
+        # pergunta → (índice da pergunta, {opção: código}) de cada versão
+        self._layout = [
+            {chave: (i, {opcao: j for j, opcao in enumerate(opcoes)})
+             for i, (chave, opcoes) in enumerate(zip(chaves, opcoes_versao))}
+            for chaves, opcoes_versao in zip(self._chaves, self._opcoes)
+        ]
+
+        versoes = len(definicoes)
+        perguntas = max(len(chaves) for chaves in self._chaves)
+        opcoes = max(len(o) for opcoes_versao in self._opcoes for o in opcoes_versao)
+        formas = {
+            'cabecalho': (CAMPOS_CABECALHO,),
+            'horas_baldes': (horas,),
+            'total': (versoes,),
+            'contagens': (versoes, perguntas, opcoes),
+            'total_anterior': (versoes,),
+            'anterior': (versoes, perguntas, opcoes),
+            'total_hora': (versoes, horas),
+            'contagens_hora': (versoes, horas, perguntas, opcoes)
+        }
+        tamanho = sum(int(np.prod(forma)) for forma in formas.values()) * 8
+
+        # O nome depende do layout: versões do código com outro questionário usam outro bloco
+        assinatura = repr((identificador, horas, self._mapeamentos, self._chaves, self._opcoes))
+        self.nome = 'juntaai-' + hashlib.sha1(assinatura.encode('utf-8')).hexdigest()[:20]
+        try:
+            self._memoria = shared_memory.SharedMemory(self.nome, create=True, size=tamanho)
+        except FileExistsError:
+            self._memoria = shared_memory.SharedMemory(self.nome)
+        # O bloco pertence a todos os workers: não deve ser removido quando este processo sair
+        resource_tracker.unregister(self._memoria._name, 'shared_memory')
+
+        self._memoria_consultas: Dict[Tuple, Tuple[int, object]] = {}
+
+        deslocamento = 0
+        for nome, forma in formas.items():
+            setattr(self, nome, np.ndarray(forma, dtype=np.int64, buffer=self._memoria.buf,
+                                           offset=deslocamento))
+            deslocamento += int(np.prod(forma)) * 8
+
+    def em_dia(self, ultimo_id: int, registros: int) -> bool:
+        """Se o bloco já contém exatamente as respostas do estado local informado"""
+        cabecalho = self.cabecalho
+        return (self._consistente() and cabecalho[ULTIMO_ID] == ultimo_id
+                and cabecalho[REGISTROS] == registros)
+
+    def _consistente(self) -> bool:
+        """Inicializado e sem alteração interrompida (sequência par e positiva)"""
+        sequencia = self.cabecalho[SEQUENCIA]
+        return sequencia > 0 and sequencia % 2 == 0
+
+    def ultimo_id(self) -> int:
+        return int(self.cabecalho[ULTIMO_ID])
+
+    # Escrita: sempre sob a trava de arquivo do log, então há um único escritor por vez
+
+    def reconstruir(self, estatisticas: Dict[int, Estatistica],
+                    temporais: Dict[int, AgregadosTemporais], ultimo_id: int):
+        """Substitui o conteúdo do bloco pelos contadores locais de um processo em dia com o log"""
+        cabecalho = self.cabecalho
+        # Ímpar mesmo se um escritor caiu no meio de uma alteração (sequência já ímpar)
+        cabecalho[SEQUENCIA] = cabecalho[SEQUENCIA] // 2 * 2 + 1
+        for nome in ('total', 'contagens', 'total_anterior', 'anterior', 'total_hora', 'contagens_hora'):
+            getattr(self, nome).fill(0)
+        self.horas_baldes.fill(-1)
+        cabecalho[VALIDO] = 1
+        cabecalho[HORA_ANTERIOR] = -1
+
+        for versao, estatistica in estatisticas.items():
+            indice = self._indice_versao.get(versao)
+            if indice is None:
+                continue
+            self.total[indice] = estatistica.total_respostas
+            if not self._somar_analise(self.contagens[indice], indice, estatistica.analise):
+                cabecalho[VALIDO] = 0
+
+        # Em ordem cronológica, para que só as horas fora da janela caiam em `anterior`
+        baldes = sorted(
+            (hora, versao, balde)
+            for versao, agregados in temporais.items() if versao in self._indice_versao
+            for hora, balde in agregados.por_hora.items()
+        )
+        for hora, versao, balde in baldes:
+            indice = self._indice_versao[versao]
+            total, contagens = self._balde(_indice_hora(hora), indice)
+            total[indice] += balde.total_respostas
+            if not self._somar_analise(contagens, indice, balde.analise):
+                cabecalho[VALIDO] = 0
+
+        cabecalho[ULTIMO_ID] = ultimo_id
+        cabecalho[REGISTROS] = sum(e.total_respostas for e in estatisticas.values())
+        cabecalho[SEQUENCIA] += 1
+
+    def adicionar(self, entradas: List[Dict], ultimo_id_anterior: int) -> bool:
+        """
+        Soma respostas recém-gravadas ao bloco
+
+        Returns:
+            False (sem alterar nada) se o bloco não estava em dia com `ultimo_id_anterior`
+            ou ficou pela metade, por exemplo depois de um worker cair entre gravar no
+            log e somar aqui
+        """
+        cabecalho = self.cabecalho
+        if not self._consistente() or cabecalho[ULTIMO_ID] != ultimo_id_anterior:
+            return False
+
+        cabecalho[SEQUENCIA] += 1
+        for entrada in entradas:
+            cabecalho[REGISTROS] += 1
+            indice = self._indice_versao.get(entrada.get('questionario', VERSAO_INICIAL))
+            if indice is None:
+                continue
+            momento = datetime.fromisoformat(entrada['timestamp'])
+            for total, contagens in ((self.total, self.contagens[indice]),
+                                     self._balde(_indice_hora(momento), indice)):
+                total[indice] += 1
+                if not self._somar_analise(contagens, indice, entrada['respostas']):
+                    cabecalho[VALIDO] = 0
+        cabecalho[ULTIMO_ID] = max(cabecalho[ULTIMO_ID], max(e['id'] for e in entradas))
+        cabecalho[SEQUENCIA] += 1
+        return True
+
+    def _balde(self, hora: int, indice: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(totais por versão, contagens da versão) onde somar uma resposta da hora `hora`"""
+        posicao = hora % self.horas
+        atual = self.horas_baldes[posicao]
+        if atual != hora:
+            if atual > hora:
+                # Mais antiga que a janela
+                self._avancar_anterior(hora)
+                return self.total_anterior, self.anterior[indice]
+            if atual >= 0:
+                # A posição guardava uma hora que saiu da janela
+                self.total_anterior += self.total_hora[:, posicao]
+                self.anterior += self.contagens_hora[:, posicao]
+                self._avancar_anterior(int(atual))
+                self.total_hora[:, posicao] = 0
+                self.contagens_hora[:, posicao] = 0
+            self.horas_baldes[posicao] = hora
+        return self.total_hora[:, posicao], self.contagens_hora[indice, posicao]
+
+    def _avancar_anterior(self, hora: int):
+        self.cabecalho[HORA_ANTERIOR] = max(self.cabecalho[HORA_ANTERIOR], hora)
+
+    def _somar_analise(self, contagens: np.ndarray, indice: int, analise: Dict) -> bool:
+        """Soma um dict {pergunta: opção} ou {pergunta: {opção: n}}; False se algo não cabe no layout"""
+        layout = self._layout[indice]
+        cabe = True
+        for pergunta, valor in analise.items():
+            pergunta_layout = layout.get(str(pergunta))
+            if pergunta_layout is None:
+                cabe = False
+                continue
+            linha, codigos = pergunta_layout
+            for opcao, quantidade in (valor.items() if isinstance(valor, dict) else ((valor, 1),)):
+                codigo = codigos.get(opcao)
+                if codigo is None:
+                    cabe = False
+                else:
+                    contagens[linha, codigo] += quantidade
+        return cabe
+
+    # Leitura: sem trava; None quando o bloco não responde e o chamador deve usar o estado local
+
+    def _ler(self, chave: Tuple, ler, converter):
+        """
+        Copia as fatias com `ler` fora de qualquer escrita e as converte com `converter`
+
+        O resultado convertido fica guardado junto com a sequência em que foi
+        lido: enquanto nenhum escritor alterar o bloco, a mesma consulta não
+        copia nem converte nada de novo. `ler` devolve False quando o bloco não
+        consegue responder a consulta.
+
+        Se uma escrita estiver em andamento, espera o escritor terminar cedendo
+        a CPU (a primeira pausa só devolve a vez; as seguintes dobram até
+        ESPERA_MAXIMA_S). Esgotadas as tentativas, devolve None e o chamador
+        responde pelos contadores locais, sincronizados com o log sob a trava do processo.
+        """
+        cabecalho = self.cabecalho
+        memorizado = self._memoria_consultas.get(chave)
+        if memorizado is not None and memorizado[0] == cabecalho[SEQUENCIA]:
+            return memorizado[1]
+
+        espera = 0.0
+        for tentativa in range(TENTATIVAS_LEITURA):
+            if tentativa:
+                time.sleep(espera)
+                espera = min(ESPERA_MAXIMA_S, espera * 2 or ESPERA_INICIAL_S)
+            sequencia = cabecalho[SEQUENCIA]
+            if sequencia == 0 or not cabecalho[VALIDO]:
+                return None
+            if sequencia % 2:
+                continue
+            lido = ler()
+            if cabecalho[SEQUENCIA] != sequencia:
+                continue
+            if lido is False:
+                return None
+            resultado = converter(*lido)
+            if len(self._memoria_consultas) >= MAXIMO_CONSULTAS_MEMORIZADAS:
+                self._memoria_consultas.clear()
+            self._memoria_consultas[chave] = (sequencia, resultado)
+            return resultado
+        return None
+
+    def _indices(self, versoes: Iterable[int]) -> Optional[List[int]]:
+        indices = [self._indice_versao.get(v) for v in versoes]
+        return None if None in indices else indices
+
+    def consultar(self, versoes: Iterable[int], inicio: Optional[datetime] = None,
+                  fim: Optional[datetime] = None) -> Optional[Estatistica]:
+        """Mesmo resultado de `AgregadosTemporais.consultar` (precisão de uma hora) somado entre versões"""
+        indices = self._indices(versoes)
+        if indices is None:
+            return None
+        primeira = _indice_hora(truncar_hora(inicio)) if inicio else None
+        ultima = _indice_hora(teto_hora(fim)) if fim else None
+
+        def ler():
+            if primeira is None and ultima is None:
+                return self.total[indices], self.contagens[indices]
+
+            hora_anterior = self.cabecalho[HORA_ANTERIOR]
+            if hora_anterior >= 0 and (
+                (primeira is not None and primeira <= hora_anterior)
+                or (ultima is not None and ultima <= hora_anterior)
+            ):
+                # Parte de `anterior` pode estar no intervalo e parte fora
+                return False
+
+            horas_baldes = self.horas_baldes
+            mascara = horas_baldes >= 0
+            if primeira is not None:
+                mascara &= horas_baldes >= primeira
+            if ultima is not None:
+                mascara &= horas_baldes < ultima
+            posicoes = np.flatnonzero(mascara)
+            total = self.total_hora[np.ix_(indices, posicoes)].sum(axis=1)
+            contagens = self.contagens_hora[np.ix_(indices, posicoes)].sum(axis=1)
+            if primeira is None and hora_anterior >= 0:
+                total = total + self.total_anterior[indices]
+                contagens = contagens + self.anterior[indices]
+            return total, contagens
+
+        def converter(totais, contagens):
+            resultado = Estatistica(total_respostas=0)
+            for indice, total, matriz in zip(indices, totais.tolist(), contagens):
+                resultado.mesclar(Estatistica(total, self._analise(indice, matriz)))
+            return resultado
+
+        resultado = self._ler(('consultar', tuple(indices), primeira, ultima), ler, converter)
+        if resultado is None:
+            return None
+        # Cópia: quem chama pode alterar o resultado sem afetar o memorizado
+        return Estatistica(resultado.total_respostas,
+                           {pergunta: dict(contagens) for pergunta, contagens in resultado.analise.items()})
+
+    def _analise(self, indice: int, matriz: np.ndarray) -> Dict:
+        """Matriz pergunta × opção de uma versão no formato de `Estatistica.analise`"""
+        analise = {}
+        for chave, opcoes, linha in zip(self._chaves[indice], self._opcoes[indice], matriz.tolist()):
+            contagens = {opcao: n for opcao, n in zip(opcoes, linha) if n}
+            if contagens:
+                analise[chave] = contagens
+        return analise
+
+    def serie(self, granularidade: str, versoes: Iterable[int], inicio: Optional[datetime] = None,
+              fim: Optional[datetime] = None) -> Optional[List[Dict]]:
+        """Mesmo resultado de `AgregadosTemporais.serie`, somado entre versões"""
+        if granularidade not in GRANULARIDADES:
+            raise ValueError(f"Granularidade inválida: {granularidade}")
+        indices = self._indices(versoes)
+        if indices is None:
+            return None
+
+        # Mesma precisão de uma hora de `consultar`: o recorte é feito nas horas
+        # e só então elas são agrupadas por período
+        horas_periodo = (UMA_HORA if granularidade == 'hora' else UM_DIA) // UMA_HORA
+        primeira = _indice_hora(truncar_hora(inicio)) if inicio else None
+        ultima = _indice_hora(teto_hora(fim)) if fim else None
+
+        def ler():
+            hora_anterior = self.cabecalho[HORA_ANTERIOR]
+            if hora_anterior >= 0 and (primeira is None or primeira <= hora_anterior):
+                # Os baldes em `anterior` não podem ser separados por período
+                return False
+            posicoes = np.flatnonzero(self.horas_baldes >= 0)
+            return self.horas_baldes[posicoes], self.total_hora[np.ix_(indices, posicoes)].sum(axis=0)
+
+        def converter(horas_baldes, totais):
+            return self._pontos_serie(horas_baldes, totais, primeira, ultima, horas_periodo)
+
+        serie = self._ler(('serie', tuple(indices), granularidade, primeira, ultima), ler, converter)
+        return None if serie is None else [dict(ponto) for ponto in serie]
+
+    @staticmethod
+    def _pontos_serie(horas: np.ndarray, totais: np.ndarray, primeira: Optional[int],
+                      ultima: Optional[int], horas_periodo: int) -> List[Dict]:
+        mascara = totais > 0
+        if primeira is not None:
+            mascara &= horas >= primeira
+        if ultima is not None:
+            mascara &= horas < ultima
+        soma = {}
+        for indice_periodo, total in zip((horas[mascara] // horas_periodo).tolist(), totais[mascara].tolist()):
+            soma[indice_periodo] = soma.get(indice_periodo, 0) + total
+        return [
+            {'periodo': (EPOCH + indice_periodo * horas_periodo * UMA_HORA).isoformat(),
+             'total_respostas': soma[indice_periodo]}
+            for indice_periodo in sorted(soma)
+        ]
+
+    def fechar(self):
+        """Desfaz o mapeamento neste processo; o bloco continua disponível aos demais"""
+        for nome in ('cabecalho', 'horas_baldes', 'total', 'contagens', 'total_anterior',
+                     'anterior', 'total_hora', 'contagens_hora'):
+            setattr(self, nome, None)
+        self._memoria.close()
+
+    def remover(self):
+        """Apaga o segmento do sistema (ex: ao desativar o recurso ou em testes)"""
+        shared_memory.SharedMemory(self.nome).unlink()
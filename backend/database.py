@@ -1,12 +1,329 @@
 import json
 import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Tuple
+from models import Estatistica
+from agregados import AgregadosTemporais, limite_retencao, truncar_hora
+from catalogo import CatalogoRecursos
+from colunar import ArmazemColunar, de_microssegundos, para_microssegundos
+from contadores_compartilhados import HORAS_PADRAO, ContadoresCompartilhados
+from escritor_lote import EscritorEmLote
+from perguntas import VERSAO_INICIAL
+from questionarios import REGISTRO
+from snapshot import escrever_snapshot, ler_preambulo, ler_snapshot, marcar_compactacao, publicar, serializar_contadores
+
+try:
+    import fcntl
+except ImportError:  # Windows: apenas a trava entre threads
+    fcntl = None
+
+BACKENDS = ('json', 'sqlite')
+MODOS_ARMAZENAMENTO = ('json', 'log')
+POLITICAS_FSYNC = ('always', 'interval', 'never')
+
+# Leitura do log em blocos de até 1 MiB
+TAMANHO_BLOCO_LOG = 1 << 20
+
+RECURSOS_APOIO_PADRAO = [
+    {
+        'id': 1,
+        'nome': '190 - Central de Atendimento à Mulher',
+        'descricao': 'Atendimento 24h para denúncias e orientações',
+        'telefone': '180',
+        'tipo': 'emergencia',
+        'estado': 'BR'
+    },
+    {
+        'id': 2,
+        'nome': 'Delegacia da Mulher',
+        'descricao': 'Registro de boletim de ocorrência e medidas protetivas',
+        'telefone': '190',
+        'tipo': 'policial',
+        'estado': 'BR'
+    },
+    {
+        'id': 3,
+        'nome': 'CRAS - Centro de Referência de Assistência Social',
+        'descricao': 'Apoio psicológico e social gratuito',
+        'tipo': 'apoio',
+        'estado': 'BR'
+    },
+    {
+        'id': 4,
+        'nome': 'Casa da Mulher Brasileira',
+        'descricao': 'Atendimento humanizado e multiprofissional',
+        'tipo': 'apoio',
+        'estado': 'BR'
+    }
+]
+
+
+class Armazenamento(ABC):
+    """Interface comum aos backends de armazenamento usados pelas rotas"""
+
+    _escritor: Optional[EscritorEmLote] = None
+    _retencao: Optional[threading.Thread] = None
+    _parar_retencao: Optional[threading.Event] = None
+
+    def iniciar_escritor(self, tamanho_lote: int, espera_maxima_ms: float):
+        """
+        Passa a persistir as respostas em lotes por uma thread de escrita
+
+        Args:
+            tamanho_lote: Máximo de respostas por commit
+            espera_maxima_ms: Tempo máximo que um lote espera por novas respostas
+        """
+        self._escritor = EscritorEmLote(self._gravar_lote, tamanho_lote, espera_maxima_ms)
+
+    def salvar_resposta(self, respostas: Dict, questionario: Optional[int] = None) -> bool:
+        """
+        Persiste um conjunto de respostas; retorna False em caso de erro
+
+        Args:
+            respostas: {pergunta_id: opção}, já validado
+            questionario: versão do questionário respondida (padrão: a atual)
+        """
+        try:
+            entrada = {
+                'respostas': respostas,
+                'timestamp': datetime.now().isoformat(),
+                'questionario': questionario or REGISTRO.atual.versao
+            }
+            if self._escritor:
+                self._escritor.gravar(entrada)
+            else:
+                self._gravar_lote([entrada])
+            return True
+        except Exception as e:
+            print(f"Erro ao salvar resposta: {e}")
+            return False
+
+    def salvar_respostas(self, conjuntos: List[Dict], questionario: Optional[int] = None) -> bool:
+        """Persiste vários conjuntos de respostas com uma única escrita durável"""
+        try:
+            timestamp = datetime.now().isoformat()
+            questionario = questionario or REGISTRO.atual.versao
+            self._gravar_lote([
+                {'respostas': respostas, 'timestamp': timestamp, 'questionario': questionario}
+                for respostas in conjuntos
+            ])
+            return True
+        except Exception as e:
+            print(f"Erro ao salvar respostas: {e}")
+            return False
+
+    @abstractmethod
+    def _gravar_lote(self, entradas: List[Dict]):
+        """Persiste várias entradas com uma única escrita durável"""
+
+    @abstractmethod
+    def obter_estatisticas(self, inicio: Optional[datetime] = None, fim: Optional[datetime] = None,
+                           versoes: Optional[Tuple[int, ...]] = None) -> Dict:
+        """
+        Contagens agregadas por pergunta e resposta no intervalo [inicio, fim)
+
+        Args:
+            versoes: versões do questionário somadas, todas do mesmo mapeamento
+                (padrão: as compatíveis com a versão atual)
+        """
+
+    @abstractmethod
+    def obter_serie(self, granularidade: str = 'dia', inicio: Optional[datetime] = None,
+                    fim: Optional[datetime] = None, versoes: Optional[Tuple[int, ...]] = None) -> List[Dict]:
+        """Total de respostas por hora ou por dia, em ordem cronológica"""
+
+    @staticmethod
+    def _versoes_consultadas(versoes: Optional[Tuple[int, ...]]) -> Tuple[int, ...]:
+        return tuple(versoes) if versoes else REGISTRO.compativeis(REGISTRO.atual.versao)
+
+    @abstractmethod
+    def obter_versao(self) -> int:
+        """Contador que muda sempre que as respostas armazenadas mudam"""
+
+    @abstractmethod
+    def obter_colunas(self) -> ArmazemColunar:
+        """Cópia das respostas individuais do mapeamento atual do questionário, para análises"""
+
+    @abstractmethod
+    def iterar_respostas(self, inicio: Optional[datetime] = None,
+                         fim: Optional[datetime] = None) -> Iterator[Tuple[datetime, List[int]]]:
+        """
+        (momento, códigos das opções por pergunta) de cada resposta no intervalo, em fluxo
+
+        Só respostas do mapeamento atual do questionário, cujas perguntas são as de
+        `REGISTRO.atual`. Os códigos seguem `ArmazemColunar.codificar` (SEM_RESPOSTA quando
+        não respondida).
+        """
+
+    @abstractmethod
+    def obter_recursos_apoio(self, estado: Optional[str] = None,
+                             tipo: Optional[str] = None) -> List[Dict]:
+        """Recursos nacionais (BR), mais os do estado quando informado, opcionalmente de um tipo"""
+
+    @abstractmethod
+    def obter_recurso_apoio(self, recurso_id: int) -> Optional[Dict]:
+        """Recurso de apoio pelo id, de qualquer estado"""
+
+    @abstractmethod
+    def buscar_recursos_apoio(self, termo: str, estado: Optional[str] = None,
+                              tipo: Optional[str] = None, limite: Optional[int] = None,
+                              deslocamento: int = 0) -> Dict:
+        """Busca textual em nome e descrição: {'total', 'resultados'} ordenados por relevância"""
+
+    @abstractmethod
+    def importar_recursos_apoio(self, recursos: Iterable[Dict]) -> Dict:
+        """
+        Insere ou atualiza recursos pela chave natural (estado, nome, endereço)
+
+        Os recursos são consumidos sob demanda e os índices refeitos uma vez.
+
+        Returns:
+            Dicionário com o total de recursos inseridos e atualizados
+        """
+
+    @abstractmethod
+    def obter_recursos_proximos(self, latitude: float, longitude: float, raio_km: float,
+                                tipo: Optional[str] = None, limite: int = 10) -> List[Dict]:
+        """Até `limite` recursos a no máximo `raio_km` do ponto, do mais perto ao mais longe"""
+
+    @abstractmethod
+    def aplicar_retencao(self, dias: int) -> Dict:
+        """
+        Consolida e remove as respostas individuais com mais de `dias` dias
+
+        As respostas removidas continuam somadas em contadores por hora, então
+        `obter_estatisticas` e `obter_serie` devolvem o mesmo resultado antes e
+        depois. Só as leituras das respostas individuais (exportações e
+        análises cruzadas) passam a cobrir apenas o período retido.
+
+        Returns:
+            Dicionário com o limite aplicado e o total de respostas removidas
+        """
+
+    def iniciar_retencao(self, dias: int, intervalo_s: float):
+        """Aplica a retenção agora e depois a cada `intervalo_s` segundos, em segundo plano"""
+        if self._retencao is not None:
+            return
+
+        def executar():
+            while True:
+                try:
+                    self.aplicar_retencao(dias)
+                except Exception as e:
+                    print(f"Erro ao aplicar a retenção: {e}")
+                if self._parar_retencao.wait(intervalo_s):
+                    return
+
+        self._parar_retencao = threading.Event()
+        self._retencao = threading.Thread(target=executar, name='retencao', daemon=True)
+        self._retencao.start()
+
+    def preparar_fork(self):
+        """
+        Deixa o estado em memória pronto para ser herdado por processos filhos
+
+        Chamado no processo pai, sem tarefas em segundo plano rodando, antes
+        de cada fork; os filhos continuam a partir do estado herdado.
+        """
+
+    def remover_compartilhados(self):
+        """
+        Apaga os recursos compartilhados entre processos (ex: o bloco de contadores)
+
+        Chamado por quem gerencia os workers quando nenhum deles usa mais o armazenamento.
+        """
+
+    def parar_tarefas(self):
+        """Grava as respostas pendentes e encerra as threads de segundo plano"""
+        if self._retencao:
+            self._parar_retencao.set()
+            self._retencao.join()
+            self._retencao = None
+        if self._escritor:
+            self._escritor.parar()
+            self._escritor = None
+
+    def fechar(self):
+        """Grava as respostas pendentes e libera arquivos e conexões abertos"""
+        self.parar_tarefas()
+
+
+class Database(Armazenamento):
+    """
+    Armazenamento das respostas e recursos de apoio.
+
+    Modos:
+        - 'json': reescreve o arquivo `filename` inteiro a cada resposta (legado)
+        - 'log': cada resposta é anexada como uma linha JSON compacta em
+          `log_filename`; `filename` é lido apenas na inicialização como semente
+          e recursos importados ficam em `<log>.recursos.json`
+
+    Políticas de fsync (modo 'log'):
+        - 'always': fsync após cada escrita (uma por lote com o escritor em lote)
+        - 'interval': fsync no máximo a cada `fsync_interval` segundos
+        - 'never': apenas flush, o sistema operacional decide quando gravar
+    """
+
+    def __init__(self, filename='data.json', modo='json', log_filename=None,
+                 fsync='always', fsync_interval=1.0):
+        if modo not in MODOS_ARMAZENAMENTO:
+            raise ValueError(f"Modo de armazenamento inválido: {modo}")
+        if fsync not in POLITICAS_FSYNC:
+            raise ValueError(f"Política de fsync inválida: {fsync}")
 
-class Database:
-    def __init__(self, filename='data.json'):
         self.filename = filename
-        self.data = self._load_data()
+        self.modo = modo
+        self.log_filename = log_filename or f"{os.path.splitext(filename)[0]}.log"
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._ultimo_fsync = 0.0
+        self._log = None
+        self._offset_log = 0
+        self._ultimo_id = 0
+
+        # Trava entre threads deste processo; entre processos usa-se flock no arquivo .lock
+        self._lock = threading.RLock()
+        self._lock_filename = f"{self.log_filename if modo == 'log' else filename}.lock"
+
+        # Snapshot do estado + compactação do log (modo 'log')
+        self.snapshot_filename = f"{os.path.splitext(self.log_filename)[0]}.snapshot"
+        self._inode_log = None
+        self._lock_compactacao = threading.Lock()
+        self._compactador = None
+        self._parar_compactacao = threading.Event()
+
+        # Contadores em memória compartilhada entre os processos do mesmo log (modo 'log')
+        self._compartilhados: Optional[ContadoresCompartilhados] = None
+
+        # Assinatura do data.json na última leitura ou escrita deste processo (modo 'json')
+        self._assinatura_json = None
+        respostas_semente = self._ler_semente()
+
+        # No modo 'log' a semente não é reescrita; recursos importados ficam em arquivo próprio
+        self.recursos_filename = f"{os.path.splitext(self.log_filename)[0]}.recursos.json"
+        self._assinatura_recursos = None
+        self._lock_recursos = threading.Lock()
+        self._sincronizar_catalogo()
+
+        if self.modo == 'log':
+            # 'a+b': escritas sempre no fim (O_APPEND) e leitura por os.pread no mesmo inode
+            self._log = open(self.log_filename, 'a+b')
+            with self._trava_arquivo():
+                self._carregar_estado(respostas_semente)
+                self._sincronizar(descartar_parcial=True)
+        else:
+            self._carregar_semente(respostas_semente)
+
+        # Perguntas ou opções que não existem mais no questionário: mantidas na
+        # entrada (e na regravação do data.json), mas fora das colunas
+        fora_das_colunas = sum(len(armazem.extras) for armazem in self.armazens.values())
+        if fora_das_colunas:
+            print(f"{fora_das_colunas} respostas têm perguntas ou opções fora do questionário; "
+                  f"esses valores são mantidos, mas ficam fora das exportações e análises cruzadas")
 
     def _load_data(self):
         if os.path.exists(self.filename):
@@ -14,85 +331,857 @@ class Database:
                 return json.load(f)
         return {
             'respostas': [],
-            'recursos_apoio': [
-                {
-                    'id': 1,
-                    'nome': '190 - Central de Atendimento à Mulher',
-                    'descricao': 'Atendimento 24h para denúncias e orientações',
-                    'telefone': '180',
-                    'tipo': 'emergencia',
-                    'estado': 'BR'
-                },
-                {
-                    'id': 2,
-                    'nome': 'Delegacia da Mulher',
-                    'descricao': 'Registro de boletim de ocorrência e medidas protetivas',
-                    'telefone': '190',
-                    'tipo': 'policial',
-                    'estado': 'BR'
-                },
-                {
-                    'id': 3,
-                    'nome': 'CRAS - Centro de Referência de Assistência Social',
-                    'descricao': 'Apoio psicológico e social gratuito',
-                    'tipo': 'apoio',
-                    'estado': 'BR'
-                },
-                {
-                    'id': 4,
-                    'nome': 'Casa da Mulher Brasileira',
-                    'descricao': 'Atendimento humanizado e multiprofissional',
-                    'tipo': 'apoio',
-                    'estado': 'BR'
-                }
-            ]
+            'recursos_apoio': [dict(r) for r in RECURSOS_APOIO_PADRAO]
         }
 
-    def _save_data(self):
-        with open(self.filename, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, ensure_ascii=False, indent=2)
+    def _ler_semente(self) -> List[Dict]:
+        """
+        Lê o arquivo JSON e devolve as respostas; o restante fica em `self.data`
 
-    def salvar_resposta(self, respostas: Dict) -> bool:
+        A assinatura é anotada antes da leitura: se outro processo regravar o
+        arquivo nesse meio-tempo, a próxima sincronização o relê.
+        """
         try:
-            entrada = {
-                'id': len(self.data['respostas']) + 1,
-                'respostas': respostas,
-                'timestamp': datetime.now().isoformat()
-            }
-            self.data['respostas'].append(entrada)
-            self._save_data()
-            return True
-        except Exception as e:
-            print(f"Erro ao salvar resposta: {e}")
-            return False
+            self._assinatura_json = self._assinatura_arquivo(self.filename)
+        except FileNotFoundError:
+            self._assinatura_json = None
 
-    def obter_estatisticas(self) -> Dict:
-        total = len(self.data['respostas'])
-        if total == 0:
-            return {
-                'total_respostas': 0,
-                'analise': {}
+        # As respostas da semente passam para o armazém colunar e os recursos para o catálogo
+        self.data = self._load_data()
+        respostas_semente = self.data.pop('respostas', [])
+        # Contadores por hora das respostas removidas pela retenção (persistidos no modo 'json')
+        self._consolidado = self._ler_consolidado(self.data.pop('consolidado', None))
+        # Maior id já gravado, mesmo que a resposta tenha sido removida pela retenção
+        self._ultimo_id_semente = self.data.pop('ultimo_id', 0)
+        self.catalogo = CatalogoRecursos(self.data.pop('recursos_apoio', []))
+        return respostas_semente
+
+    @contextmanager
+    def _trava_arquivo(self):
+        """Exclusão mútua entre threads e entre processos que usam os mesmos arquivos"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self._lock_filename, 'a') as trava:
+                fcntl.flock(trava.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(trava.fileno(), fcntl.LOCK_UN)
+
+    def _zerar_estado(self):
+        # Um armazém colunar por mapeamento do questionário e contadores por versão
+        self.armazens = {
+            mapeamento: ArmazemColunar(perguntas)
+            for mapeamento, perguntas in REGISTRO.mapeamentos().items()
+        }
+        self._estatisticas: Dict[int, Estatistica] = {}
+        self._temporais: Dict[int, AgregadosTemporais] = {}
+        self._ultimo_id = 0
+        self._offset_log = 0
+
+    def _carregar_estado(self, respostas_semente: Optional[List[Dict]] = None):
+        """
+        Monta o estado a partir do snapshot, se ele valer para o log atual
+
+        Com snapshot, só o trecho do log posterior a ele precisa ser reaplicado
+        (por `_sincronizar`). Sem snapshot válido, parte das respostas da
+        semente e o log inteiro é reaplicado.
+        """
+        info = os.fstat(self._log.fileno())
+        self._inode_log = info.st_ino
+
+        mapeamentos = REGISTRO.mapeamentos()
+        snapshot = ler_snapshot(self.snapshot_filename, mapeamentos)
+        offset = snapshot.offset_para(info.st_ino) if snapshot else None
+        if offset is not None and offset <= info.st_size:
+            # Mapeamentos publicados depois do snapshot começam vazios
+            self.armazens = {
+                mapeamento: snapshot.armazens.get(mapeamento) or ArmazemColunar(perguntas)
+                for mapeamento, perguntas in mapeamentos.items()
             }
+            self._estatisticas = snapshot.estatisticas
+            self._temporais = snapshot.temporais
+            self._ultimo_id = snapshot.cabecalho['ultimo_id']
+            self._offset_log = offset
+            return
+
+        if respostas_semente is None:
+            semente = self._load_data()
+            respostas_semente = semente.get('respostas', [])
+            self._consolidado = self._ler_consolidado(semente.get('consolidado'))
+            self._ultimo_id_semente = semente.get('ultimo_id', 0)
+        self._carregar_semente(respostas_semente)
 
-        # Análise agregada
-        analise = {}
-        for resposta_obj in self.data['respostas']:
-            for pergunta, resposta in resposta_obj['respostas'].items():
-                if pergunta not in analise:
-                    analise[pergunta] = {}
-                if resposta not in analise[pergunta]:
-                    analise[pergunta][resposta] = 0
-                analise[pergunta][resposta] += 1
+    def _carregar_semente(self, respostas_semente: List[Dict]):
+        """Estado inicial a partir das respostas e dos contadores consolidados do arquivo JSON"""
+        self._zerar_estado()
+        for entrada in respostas_semente:
+            self._registrar(entrada)
+        self._ultimo_id = max(self._ultimo_id, self._ultimo_id_semente)
+        for versao, por_hora in self._consolidado.items():
+            estatistica, temporais = self._contadores(versao)
+            for hora, balde in por_hora.items():
+                estatistica.mesclar(balde)
+                temporais.mesclar_hora(hora, balde)
 
+    @staticmethod
+    def _ler_consolidado(dados: Optional[Dict]) -> Dict[int, Dict[datetime, Estatistica]]:
+        dados = dados or {}
+        if 'por_hora' in dados:
+            # Formato anterior às versões do questionário: tudo é da versão inicial
+            dados = {'versoes': {VERSAO_INICIAL: dados}}
         return {
-            'total_respostas': total,
-            'analise': analise
+            int(versao): {
+                datetime.fromisoformat(hora): Estatistica(balde['total_respostas'], balde['analise'])
+                for hora, balde in consolidado['por_hora'].items()
+            }
+            for versao, consolidado in dados.get('versoes', {}).items()
         }
 
-    def obter_recursos_apoio(self, estado: Optional[str] = None) -> List[Dict]:
-        recursos = self.data['recursos_apoio']
-        if estado:
-            return [r for r in recursos if r['estado'] == estado or r['estado'] == 'BR']
-        return [r for r in recursos if r['estado'] == 'BR']
+    @property
+    def respostas(self) -> ArmazemColunar:
+        """Respostas individuais do mapeamento atual do questionário"""
+        return self.armazens[REGISTRO.atual.mapeamento]
+
+    def _contadores(self, versao: int) -> Tuple[Estatistica, AgregadosTemporais]:
+        estatistica = self._estatisticas.get(versao)
+        if estatistica is None:
+            estatistica = self._estatisticas[versao] = Estatistica(total_respostas=0)
+            self._temporais[versao] = AgregadosTemporais()
+        return estatistica, self._temporais[versao]
+
+    def _sincronizar(self, descartar_parcial: bool = False):
+        """
+        Aplica as linhas do log ainda não vistas por este processo
+
+        Na inicialização aplica o log a partir do snapshot (ou inteiro); depois,
+        lê apenas o que outros processos anexaram desde a última leitura. Só
+        linhas completas são consumidas, então é seguro chamar sem a trava de arquivo.
+        No modo 'json', relê o data.json se outro processo o regravou.
+
+        Args:
+            descartar_parcial: trunca um registro incompleto no fim do log (deixado
+                por uma queda durante a escrita). Exige a trava de arquivo.
+        """
+        if self._log is None:
+            if self.modo == 'json':
+                self._recarregar_json()
+            return
+
+        with self._lock:
+            self._verificar_compactacao()
+
+            tamanho = os.fstat(self._log.fileno()).st_size
+            if tamanho <= self._offset_log:
+                return
+
+            self._aplicar_log(tamanho)
+
+            if descartar_parcial and self._offset_log < tamanho:
+                os.ftruncate(self._log.fileno(), self._offset_log)
+
+    def _recarregar_json(self):
+        """Refaz o estado a partir do data.json se ele mudou desde a última leitura ou escrita"""
+        with self._lock:
+            try:
+                assinatura = self._assinatura_arquivo(self.filename)
+            except FileNotFoundError:
+                return
+            if assinatura != self._assinatura_json:
+                self._carregar_semente(self._ler_semente())
+
+    def _aplicar_log(self, ate: int):
+        """Registra as linhas completas do log aberto entre `_offset_log` e `ate`"""
+        fd = self._log.fileno()
+        tamanho_bloco = TAMANHO_BLOCO_LOG
+        while self._offset_log < ate:
+            bloco = os.pread(fd, min(tamanho_bloco, ate - self._offset_log), self._offset_log)
+            fim = bloco.rfind(b'\n') + 1
+            if not fim:
+                if self._offset_log + len(bloco) >= ate:
+                    return
+                # Linha maior que o bloco: lê um bloco maior
+                tamanho_bloco *= 2
+                continue
+
+            for linha in bloco[:fim].split(b'\n')[:-1]:
+                try:
+                    entrada = json.loads(linha)
+                except ValueError:
+                    return
+                self._registrar(entrada)
+                self._offset_log += len(linha) + 1
+
+    def _verificar_compactacao(self):
+        """
+        Troca para o log novo se ele foi compactado (por este ou outro processo)
+
+        A compactação publica primeiro o snapshot e depois o log novo, que é o
+        antigo a partir de `corte`. Quem ainda não tinha lido até o corte termina
+        de ler pelo arquivo antigo (ainda aberto) e continua no novo; se o
+        snapshot já for de uma compactação posterior, o estado é recarregado.
+        """
+        try:
+            inode_atual = os.stat(self.log_filename).st_ino
+        except FileNotFoundError:
+            return
+        if inode_atual == self._inode_log:
+            return
+
+        log_antigo, self._log = self._log, open(self.log_filename, 'a+b')
+        inode_novo = os.fstat(self._log.fileno()).st_ino
+        preambulo = ler_preambulo(self.snapshot_filename)
+
+        try:
+            if preambulo and preambulo[0] == self._inode_log and preambulo[2] == inode_novo:
+                corte = preambulo[1]
+                log_novo, self._log = self._log, log_antigo
+                self._aplicar_log(corte)
+                self._log = log_novo
+                if self._offset_log >= corte:
+                    self._offset_log -= corte
+                    self._inode_log = inode_novo
+                    return
+            self._carregar_estado()
+        finally:
+            log_antigo.close()
+
+    def _registrar(self, entrada: Dict):
+        """Inclui uma resposta já persistida na memória e nos contadores agregados"""
+        momento = datetime.fromisoformat(entrada['timestamp'])
+        questionario = entrada.get('questionario', VERSAO_INICIAL)
+        try:
+            armazem = self.armazens[REGISTRO.obter(questionario).mapeamento]
+        except ValueError:
+            # Versão desconhecida por este código: fica só no log e nos contadores
+            armazem = None
+        if armazem is not None:
+            armazem.adicionar(entrada['id'], momento, entrada['respostas'], questionario)
+        self._ultimo_id = max(self._ultimo_id, entrada['id'])
+        self._agregar(*self._contadores(questionario), momento, entrada['respostas'])
+
+    @staticmethod
+    def _agregar(estatistica: Estatistica, temporais: AgregadosTemporais,
+                 momento: datetime, respostas: Dict):
+        estatistica.total_respostas += 1
+        for pergunta, resposta in respostas.items():
+            estatistica.adicionar_analise_pergunta(pergunta, resposta)
+        temporais.adicionar(momento, respostas)
+
+    def _save_data(self):
+        # Grava em arquivo temporário e renomeia: leitores nunca veem um JSON pela metade
+        temporario = f"{self.filename}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({
+                **self.data,
+                'respostas': [entrada for armazem in self.armazens.values() for entrada in armazem],
+                'ultimo_id': self._ultimo_id,
+                'recursos_apoio': self.catalogo.todos(),
+                'consolidado': {
+                    'versoes': {
+                        str(versao): {
+                            'por_hora': {
+                                hora.isoformat(): estatistica.to_dict()
+                                for hora, estatistica in sorted(por_hora.items())
+                            }
+                        }
+                        for versao, por_hora in sorted(self._consolidado.items())
+                    }
+                }
+            }, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.filename)
+        # A própria escrita não deve provocar uma releitura
+        self._assinatura_json = self._assinatura_arquivo(self.filename)
+
+    def _append_log(self, entradas: List[Dict]):
+        dados = ''.join(
+            json.dumps(entrada, ensure_ascii=False, separators=(',', ':')) + '\n'
+            for entrada in entradas
+        ).encode('utf-8')
+        self._log.write(dados)
+        self._log.flush()
+        self._offset_log += len(dados)
+
+        if self.fsync == 'always':
+            os.fsync(self._log.fileno())
+        elif self.fsync == 'interval':
+            agora = time.monotonic()
+            if agora - self._ultimo_fsync >= self.fsync_interval:
+                os.fsync(self._log.fileno())
+                self._ultimo_fsync = agora
+
+    @contextmanager
+    def _trava_compactacao(self, bloquear: bool = True):
+        """Uma compactação por vez entre threads e processos; produz False se já houver outra"""
+        if not self._lock_compactacao.acquire(blocking=bloquear):
+            yield False
+            return
+        try:
+            if fcntl is None:
+                yield True
+                return
+            with open(f"{self.snapshot_filename}.lock", 'a') as trava:
+                try:
+                    fcntl.flock(trava.fileno(), fcntl.LOCK_EX | (0 if bloquear else fcntl.LOCK_NB))
+                except BlockingIOError:
+                    yield False
+                    return
+                try:
+                    yield True
+                finally:
+                    fcntl.flock(trava.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._lock_compactacao.release()
+
+    def compactar(self, bloquear: bool = True) -> bool:
+        """
+        Grava um snapshot do estado e remove do log tudo o que ele já cobre
+
+        O estado é copiado sob a trava (cópia de memória das colunas e pickle
+        dos contadores) e o snapshot é escrito sem travas. Só a cópia do
+        trecho gravado nesse meio-tempo para o log novo e as duas trocas de
+        arquivo acontecem com as escritas bloqueadas.
+
+        Args:
+            bloquear: se False, desiste quando outra compactação estiver em andamento
+
+        Returns:
+            True se o log foi compactado
+        """
+        if self.modo != 'log':
+            raise ValueError("A compactação só se aplica ao modo 'log'")
+
+        with self._trava_compactacao(bloquear) as obtida:
+            if not obtida:
+                return False
+
+            with self._lock:
+                self._sincronizar()
+                inode, corte = self._inode_log, self._offset_log
+                cabecalho = {
+                    'ultimo_id': self._ultimo_id,
+                    'criado_em': datetime.now().isoformat()
+                }
+                contadores = serializar_contadores(self._estatisticas, self._temporais)
+                armazens = {mapeamento: armazem.copiar() for mapeamento, armazem in self.armazens.items()}
+
+            temporario = f"{self.snapshot_filename}.tmp"
+            escrever_snapshot(temporario, cabecalho, contadores, armazens, inode, corte)
+
+            with self._trava_arquivo():
+                self._sincronizar()
+                if self._inode_log != inode:
+                    os.remove(temporario)
+                    return False
+
+                log_temporario = f"{self.log_filename}.compactando"
+                with open(log_temporario, 'wb') as novo:
+                    posicao = corte
+                    while posicao < self._offset_log:
+                        tamanho = min(TAMANHO_BLOCO_LOG, self._offset_log - posicao)
+                        bloco = os.pread(self._log.fileno(), tamanho, posicao)
+                        novo.write(bloco)
+                        posicao += len(bloco)
+                    novo.flush()
+                    os.fsync(novo.fileno())
+                    inode_novo = os.fstat(novo.fileno()).st_ino
+
+                marcar_compactacao(temporario, inode_novo)
+                publicar(temporario, self.snapshot_filename)
+                publicar(log_temporario, self.log_filename)
+                self._sincronizar()
+
+        return True
+
+    def iniciar_compactacao(self, intervalo_s: float, tamanho_minimo_bytes: int):
+        """
+        Compacta o log em segundo plano quando o trecho após o último snapshot passar do limite
+
+        Entre vários processos só um compacta por vez; os demais pulam a rodada.
+        """
+        if self.modo != 'log' or self._compactador is not None:
+            return
+
+        def executar():
+            while not self._parar_compactacao.wait(intervalo_s):
+                try:
+                    if self._offset_log >= tamanho_minimo_bytes:
+                        self.compactar(bloquear=False)
+                except Exception as e:
+                    print(f"Erro ao compactar o log: {e}")
+
+        self._parar_compactacao = threading.Event()
+        self._compactador = threading.Thread(target=executar, name='compactador-log', daemon=True)
+        self._compactador.start()
+
+    def compartilhar_contadores(self, horas: int):
+        """
+        Passa a manter os contadores também num bloco de memória compartilhada
+
+        Todos os processos sobre o mesmo log usam o mesmo bloco: quem grava soma
+        nele e as estatísticas são lidas dele, sem reaplicar as respostas que os
+        outros processos anexaram ao log. O bloco é reconstruído com o estado
+        deste processo se não estiver em dia com o log.
+
+        Args:
+            horas: baldes horários mantidos no bloco; consultas que começam antes
+                dessa janela são respondidas pelos contadores locais
+        """
+        if self.modo != 'log':
+            raise ValueError("Os contadores compartilhados só se aplicam ao modo 'log'")
+        if self._compartilhados is not None:
+            return
+
+        compartilhados = ContadoresCompartilhados(os.path.realpath(self.log_filename), REGISTRO, horas)
+        with self._trava_arquivo():
+            self._sincronizar()
+            if not compartilhados.em_dia(self._ultimo_id, self._total_registrado()):
+                compartilhados.reconstruir(self._estatisticas, self._temporais, self._ultimo_id)
+            self._compartilhados = compartilhados
+
+    def remover_compartilhados(self):
+        # O segmento sobrevive aos processos (ver ContadoresCompartilhados); sem
+        # remoção, cada log distinto deixaria um bloco em /dev/shm
+        with self._lock:
+            if self._compartilhados is not None:
+                self._compartilhados.remover()
+                self._compartilhados.fechar()
+                self._compartilhados = None
+
+    def _total_registrado(self) -> int:
+        return sum(estatistica.total_respostas for estatistica in self._estatisticas.values())
+
+    def _publicar(self, registros: List[Dict], ultimo_id_anterior: int):
+        """Soma respostas recém-gravadas ao bloco compartilhado (sob a trava de arquivo)"""
+        if not self._compartilhados.adicionar(registros, ultimo_id_anterior):
+            # Bloco atrasado (ex: um processo caiu depois de gravar no log): o estado
+            # deste processo acabou de ser sincronizado e já inclui `registros`
+            self._compartilhados.reconstruir(self._estatisticas, self._temporais, self._ultimo_id)
+
+    def preparar_fork(self):
+        # Os filhos herdam os índices e contadores já em dia com o log e só
+        # leem o que for anexado depois do fork
+        if self.modo == 'log':
+            with self._trava_arquivo():
+                self._sincronizar()
+
+    def parar_tarefas(self):
+        super().parar_tarefas()
+        if self._compactador is not None:
+            self._parar_compactacao.set()
+            self._compactador.join()
+            self._compactador = None
+
+    def fechar(self):
+        """Garante que o log foi gravado em disco e libera o arquivo"""
+        super().fechar()
+        with self._lock:
+            if self._log and not self._log.closed:
+                self._log.flush()
+                os.fsync(self._log.fileno())
+                self._log.close()
+            if self._compartilhados is not None:
+                self._compartilhados.fechar()
+                self._compartilhados = None
+
+    def _gravar_lote(self, entradas: List[Dict]):
+        with self._trava_arquivo():
+            # Incorpora o que outros processos gravaram antes de alocar ids,
+            # para que os ids continuem únicos e crescentes entre processos
+            self._sincronizar()
+
+            ultimo_id_anterior = self._ultimo_id
+            registros = [
+                {'id': ultimo_id_anterior + i, **entrada}
+                for i, entrada in enumerate(entradas, start=1)
+            ]
+
+            if self.modo == 'log':
+                self._append_log(registros)
+            for registro in registros:
+                self._registrar(registro)
+            if self._compartilhados is not None:
+                self._publicar(registros, ultimo_id_anterior)
+            if self.modo == 'json':
+                self._save_data()
+
+    def obter_estatisticas(self, inicio: Optional[datetime] = None, fim: Optional[datetime] = None,
+                           versoes: Optional[Tuple[int, ...]] = None) -> Dict:
+        # Contadores mantidos a cada escrita, por versão do questionário: custo
+        # O(versões × perguntas × opções), independente do número de respostas
+        # armazenadas. Com intervalo, somam-se apenas os baldes horários/diários
+        # que o cobrem. A soma é feita numa Estatistica nova, então as rotas
+        # podem enriquecer o resultado sem afetar os contadores.
+        versoes = self._versoes_consultadas(versoes)
+        if self._compartilhados is not None:
+            resultado = self._compartilhados.consultar(versoes, inicio, fim)
+            if resultado is not None:
+                return {
+                    'total_respostas': resultado.total_respostas,
+                    'analise': resultado.analise
+                }
+
+        with self._lock:
+            self._sincronizar()
+            resultado = Estatistica(total_respostas=0)
+            for versao in versoes:
+                if versao not in self._estatisticas:
+                    continue
+                if inicio or fim:
+                    resultado.mesclar(self._temporais[versao].consultar(inicio, fim))
+                else:
+                    resultado.mesclar(self._estatisticas[versao])
+            return {
+                'total_respostas': resultado.total_respostas,
+                'analise': resultado.analise
+            }
+
+    def obter_serie(self, granularidade: str = 'dia', inicio: Optional[datetime] = None,
+                    fim: Optional[datetime] = None, versoes: Optional[Tuple[int, ...]] = None) -> List[Dict]:
+        versoes = self._versoes_consultadas(versoes)
+        if self._compartilhados is not None:
+            serie = self._compartilhados.serie(granularidade, versoes, inicio, fim)
+            if serie is not None:
+                return serie
+
+        with self._lock:
+            self._sincronizar()
+            series = [
+                self._temporais[versao].serie(granularidade, inicio, fim)
+                for versao in versoes if versao in self._temporais
+            ]
+
+        if len(series) == 1:
+            return series[0]
+        totais = {}
+        for serie in series:
+            for ponto in serie:
+                totais[ponto['periodo']] = totais.get(ponto['periodo'], 0) + ponto['total_respostas']
+        return [{'periodo': periodo, 'total_respostas': totais[periodo]} for periodo in sorted(totais)]
+
+    def obter_versao(self) -> int:
+        # Maior id gravado por qualquer processo, como no backend SQLite: só cresce,
+        # inclusive depois de a retenção remover respostas e de o arquivo ser relido
+        if self._compartilhados is not None:
+            return self._compartilhados.ultimo_id()
+        with self._lock:
+            self._sincronizar()
+            return self._ultimo_id
+
+    def obter_colunas(self) -> ArmazemColunar:
+        with self._lock:
+            self._sincronizar()
+            return self.respostas.copiar()
+
+    def iterar_respostas(self, inicio: Optional[datetime] = None,
+                         fim: Optional[datetime] = None) -> Iterator[Tuple[datetime, List[int]]]:
+        with self._lock:
+            self._sincronizar()
+            armazem, total = self.respostas, len(self.respostas)
+
+        # As colunas só crescem: as `total` primeiras linhas podem ser lidas sem a trava
+        for timestamp, codigos in armazem.iterar_codigos(
+            para_microssegundos(inicio) if inicio else None,
+            para_microssegundos(fim) if fim else None,
+            ate=total
+        ):
+            yield de_microssegundos(timestamp), codigos
+
+    def aplicar_retencao(self, dias: int) -> Dict:
+        """
+        Remove da memória e do disco as respostas anteriores ao período de retenção
+
+        Os contadores globais e por hora/dia já incluem essas respostas e não
+        são tocados. No modo 'json' a parte delas é guardada por versão e hora
+        em `consolidado` no próprio arquivo, para ser somada de novo ao carregar.
+        No modo 'log' os contadores vão no snapshot e a remoção chega ao disco
+        pela compactação (feita aqui, a menos que outra esteja em andamento);
+        por isso, nesse modo, o snapshot não pode ser apagado.
+        """
+        limite = limite_retencao(dias)
+        removidas = 0
+        with self._trava_arquivo():
+            self._sincronizar()
+            for mapeamento, armazem in list(self.armazens.items()):
+                antigas, self.armazens[mapeamento] = armazem.separar(para_microssegundos(limite))
+                removidas += len(antigas)
+                if self.modo == 'json':
+                    self._consolidar(antigas)
+            if self.modo == 'json' and removidas:
+                self._save_data()
+
+        if self.modo == 'log' and removidas:
+            self.compactar(bloquear=False)
+
+        return {'limite': limite.isoformat(), 'removidas': removidas}
+
+    def _consolidar(self, antigas: ArmazemColunar):
+        """Soma as respostas removidas aos contadores por versão e hora salvos em `consolidado`"""
+        for questionario, (timestamp, codigos) in zip(antigas.questionarios, antigas.iterar_codigos()):
+            por_hora = self._consolidado.setdefault(questionario, {})
+            hora = truncar_hora(de_microssegundos(timestamp))
+            balde = por_hora.get(hora)
+            if balde is None:
+                balde = por_hora[hora] = Estatistica(total_respostas=0)
+            balde.total_respostas += 1
+            for pergunta, resposta in antigas.decodificar(codigos).items():
+                balde.adicionar_analise_pergunta(pergunta, resposta)
+
+    def contadores_consolidados(self) -> Dict[int, Dict[datetime, Estatistica]]:
+        """
+        Contadores por versão e hora das respostas que não estão mais em memória
+
+        São as removidas pela retenção (vindas do `consolidado` do data.json ou
+        do snapshot): os baldes horários menos as respostas ainda guardadas.
+        """
+        with self._lock:
+            self._sincronizar()
+            guardadas: Dict[int, AgregadosTemporais] = {}
+            for armazem in self.armazens.values():
+                for entrada in armazem:
+                    temporais = guardadas.setdefault(entrada['questionario'], AgregadosTemporais())
+                    temporais.adicionar(datetime.fromisoformat(entrada['timestamp']), entrada['respostas'])
+
+            consolidado = {}
+            for versao, temporais in self._temporais.items():
+                restantes = guardadas.get(versao, AgregadosTemporais()).por_hora
+                for hora, balde in temporais.por_hora.items():
+                    restante = restantes.get(hora, Estatistica(total_respostas=0))
+                    total = balde.total_respostas - restante.total_respostas
+                    if total <= 0:
+                        continue
+                    analise = {}
+                    for pergunta, contagens in balde.analise.items():
+                        contagens_restantes = restante.analise.get(pergunta, {})
+                        for resposta, contagem in contagens.items():
+                            contagem -= contagens_restantes.get(resposta, 0)
+                            if contagem > 0:
+                                analise.setdefault(pergunta, {})[resposta] = contagem
+                    consolidado.setdefault(versao, {})[hora] = Estatistica(total, analise)
+            return consolidado
+
+    def _sincronizar_catalogo(self):
+        """Recarrega o catálogo se outro processo importou recursos desde a última leitura"""
+        if self.modo != 'log':
+            self._sincronizar()
+            return
+        try:
+            assinatura = self._assinatura_arquivo(self.recursos_filename)
+        except FileNotFoundError:
+            return
+        if assinatura != self._assinatura_recursos:
+            with open(self.recursos_filename, 'r', encoding='utf-8') as f:
+                catalogo = CatalogoRecursos(json.load(f))
+            self.catalogo, self._assinatura_recursos = catalogo, assinatura
+
+    @staticmethod
+    def _assinatura_arquivo(caminho: str):
+        info = os.stat(caminho)
+        return info.st_ino, info.st_size, info.st_mtime_ns
+
+    def _salvar_recursos(self, catalogo: CatalogoRecursos):
+        temporario = f"{self.recursos_filename}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(catalogo.todos(), f, ensure_ascii=False, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.recursos_filename)
+        return self._assinatura_arquivo(self.recursos_filename)
+
+    @contextmanager
+    def _trava_recursos(self):
+        """Uma importação de recursos por vez, sem bloquear a gravação de respostas"""
+        with self._lock_recursos:
+            if fcntl is None:
+                yield
+                return
+            with open(f"{self.recursos_filename}.lock", 'a') as trava:
+                fcntl.flock(trava.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(trava.fileno(), fcntl.LOCK_UN)
+
+    def importar_recursos_apoio(self, recursos: Iterable[Dict]) -> Dict:
+        if self.modo == 'json':
+            # O catálogo vai no data.json: importa sobre a versão gravada por último
+            with self._trava_arquivo():
+                self._sincronizar()
+                catalogo = CatalogoRecursos(self.catalogo.todos())
+                resultado = catalogo.importar(recursos)
+                self.catalogo = catalogo
+                self._save_data()
+            return resultado
+
+        with self._trava_recursos():
+            self._sincronizar_catalogo()
+            # Importa numa cópia e só então a publica: leitores nunca veem o catálogo pela metade
+            catalogo = CatalogoRecursos(self.catalogo.todos())
+            resultado = catalogo.importar(recursos)
+            self._assinatura_recursos = self._salvar_recursos(catalogo)
+            self.catalogo = catalogo
+        return resultado
+
+    def obter_recursos_apoio(self, estado: Optional[str] = None,
+                             tipo: Optional[str] = None) -> List[Dict]:
+        self._sincronizar_catalogo()
+        return self.catalogo.listar(estado, tipo)
+
+    def obter_recurso_apoio(self, recurso_id: int) -> Optional[Dict]:
+        self._sincronizar_catalogo()
+        return self.catalogo.obter(recurso_id)
+
+    def buscar_recursos_apoio(self, termo: str, estado: Optional[str] = None,
+                              tipo: Optional[str] = None, limite: Optional[int] = None,
+                              deslocamento: int = 0) -> Dict:
+        self._sincronizar_catalogo()
+        return self.catalogo.buscar(termo, estado, tipo, limite, deslocamento)
+
+    def obter_recursos_proximos(self, latitude: float, longitude: float, raio_km: float,
+                                tipo: Optional[str] = None, limite: int = 10) -> List[Dict]:
+        self._sincronizar_catalogo()
+        return self.catalogo.proximos(latitude, longitude, raio_km, tipo, limite)
+
+
+def criar_database() -> Armazenamento:
+    """
+    Instancia o backend escolhido em DATABASE_BACKEND ('json' ou 'sqlite')
+
+    Returns:
+        Armazenamento configurado a partir das variáveis de ambiente, ainda
+        sem as tarefas em segundo plano (ver `iniciar_tarefas`)
+    """
+    backend = os.getenv('DATABASE_BACKEND', 'json')
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de armazenamento inválido: {backend}")
+
+    if backend == 'sqlite':
+        from database_sqlite import SQLiteDatabase
+        armazenamento = SQLiteDatabase(os.getenv('DATABASE_FILE', 'junta_ai.db'))
+    else:
+        armazenamento = Database(
+            filename=os.getenv('DATABASE_JSON', 'data.json'),
+            modo=os.getenv('DATABASE_MODE', 'log'),
+            log_filename=os.getenv('DATABASE_LOG'),
+            fsync=os.getenv('DATABASE_FSYNC', 'always'),
+            fsync_interval=float(os.getenv('DATABASE_FSYNC_INTERVAL', '1.0'))
+        )
+        # Estatísticas lidas de um bloco de memória compartilhada entre os workers do mesmo
+        # log. Desativado por padrão: o bloco só é removido por servidor.py, que o ativa
+        if armazenamento.modo == 'log' and os.getenv('DATABASE_COMPARTILHADO', 'false').lower() == 'true':
+            try:
+                armazenamento.compartilhar_contadores(
+                    int(os.getenv('DATABASE_COMPARTILHADO_HORAS', str(HORAS_PADRAO)))
+                )
+            except OSError as e:
+                print(f"Contadores compartilhados indisponíveis, usando os locais: {e}")
+
+    return armazenamento
+
+
+def iniciar_tarefas(armazenamento: Armazenamento):
+    """
+    Inicia as threads de segundo plano configuradas no ambiente
+
+    Ficam separadas de `criar_database` porque threads não sobrevivem a um
+    fork: um servidor com workers pré-criados carrega os dados uma vez no
+    processo principal e inicia as tarefas em cada worker.
+    """
+    # Snapshot + compactação quando o log passar de DATABASE_COMPACTAR_MB (0 desativa)
+    compactar_mb = float(os.getenv('DATABASE_COMPACTAR_MB', '64'))
+    if isinstance(armazenamento, Database) and compactar_mb > 0:
+        armazenamento.iniciar_compactacao(
+            float(os.getenv('DATABASE_COMPACTAR_INTERVALO_S', '60')),
+            int(compactar_mb * 1024 * 1024)
+        )
+
+    # Retenção: respostas com mais de RETENCAO_DIAS dias viram contadores por hora (0 desativa)
+    retencao_dias = int(os.getenv('RETENCAO_DIAS', '0'))
+    if retencao_dias > 0:
+        armazenamento.iniciar_retencao(retencao_dias, float(os.getenv('RETENCAO_INTERVALO_S', '3600')))
+
+    # Group commit: DATABASE_LOTE_TAMANHO=1 grava cada resposta na própria requisição
+    tamanho_lote = int(os.getenv('DATABASE_LOTE_TAMANHO', '64'))
+    if tamanho_lote > 1:
+        armazenamento.iniciar_escritor(
+            tamanho_lote,
+            float(os.getenv('DATABASE_LOTE_ESPERA_MS', '2'))
+        )
+
+
+class ArmazenamentoPreguicoso:
+    """
+    Acesso ao armazenamento configurado, criado apenas no primeiro uso.
+
+    Importar `database` (e, com ele, o app e as rotas) não lê nenhum arquivo
+    de dados: o backend é construído por `criar_database` na primeira chamada
+    a um de seus métodos ou explicitamente por `aquecer()`, por exemplo antes
+    de o servidor aceitar requisições. Os atributos são repassados ao
+    armazenamento real, então `db` é usado como antes.
+
+    Com workers pré-criados, o processo principal usa `carregar()` (dados
+    sem threads) e `preparar_fork()`; cada worker herda o estado e inicia
+    as suas tarefas no primeiro uso.
+    """
+
+    def __init__(self, fabrica: Callable[[], Armazenamento],
+                 iniciar_tarefas: Callable[[Armazenamento], None]):
+        self._fabrica = fabrica
+        self._iniciar_tarefas = iniciar_tarefas
+        # Dados carregados / dados carregados e tarefas em segundo plano rodando
+        self._armazenamento: Optional[Armazenamento] = None
+        self._em_uso: Optional[Armazenamento] = None
+        self._lock = threading.Lock()
+
+    @property
+    def inicializado(self) -> bool:
+        return self._armazenamento is not None
+
+    def carregar(self) -> Armazenamento:
+        """Cria o armazenamento (carga dos dados e índices) sem iniciar threads"""
+        with self._lock:
+            if self._armazenamento is None:
+                self._armazenamento = self._fabrica()
+            return self._armazenamento
+
+    def aquecer(self) -> Armazenamento:
+        """Cria o armazenamento agora (carga dos dados, índices, threads de escrita)"""
+        armazenamento = self._em_uso
+        if armazenamento is None:
+            armazenamento = self.carregar()
+            with self._lock:
+                if self._em_uso is None:
+                    self._iniciar_tarefas(armazenamento)
+                    self._em_uso = armazenamento
+                armazenamento = self._em_uso
+        return armazenamento
+
+    def preparar_fork(self):
+        """
+        Chamado no processo principal antes de cada fork de worker
+
+        Encerra as threads de segundo plano (um filho herdaria só as travas e
+        filas delas) e põe o estado em dia, para que o worker não releia os dados.
+        """
+        with self._lock:
+            armazenamento, self._em_uso = self._armazenamento, None
+            if armazenamento is not None:
+                armazenamento.parar_tarefas()
+                armazenamento.preparar_fork()
+
+    def fechar(self):
+        """Fecha o armazenamento, se ele chegou a ser criado"""
+        with self._lock:
+            armazenamento, self._armazenamento, self._em_uso = self._armazenamento, None, None
+        if armazenamento is not None:
+            armazenamento.fechar()
+
+    def __getattr__(self, nome):
+        return getattr(self.aquecer(), nome)
+
 
-db = Database()
+db = ArmazenamentoPreguicoso(criar_database, iniciar_tarefas)
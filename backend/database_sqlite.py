@@ -0,0 +1,489 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
+from agregados import GRANULARIDADES, limite_retencao, teto_hora, truncar_hora
+from catalogo import CatalogoRecursos
+from colunar import ArmazemColunar
+from database import Armazenamento, RECURSOS_APOIO_PADRAO
+from models import Estatistica
+from perguntas import VERSAO_INICIAL
+from questionarios import REGISTRO
+
+CAMPOS_RECURSO = ('id', 'nome', 'descricao', 'telefone', 'tipo', 'estado',
+                  'endereco', 'site', 'horario', 'latitude', 'longitude')
+
+# Colunas criadas depois da primeira versão do schema, adicionadas a bancos existentes
+COLUNAS_ADICIONAIS = {
+    'recursos_apoio': {'latitude': 'REAL', 'longitude': 'REAL'},
+    'respostas': {'questionario': f'INTEGER NOT NULL DEFAULT {VERSAO_INICIAL}'},
+    'respostas_itens': {'questionario': f'INTEGER NOT NULL DEFAULT {VERSAO_INICIAL}'}
+}
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS respostas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    respostas TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_respostas_timestamp ON respostas (timestamp);
+
+CREATE TABLE IF NOT EXISTS respostas_itens (
+    resposta_id INTEGER NOT NULL REFERENCES respostas (id),
+    timestamp TEXT NOT NULL,
+    pergunta TEXT NOT NULL,
+    resposta TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_itens_timestamp
+    ON respostas_itens (timestamp, pergunta, resposta);
+
+CREATE TABLE IF NOT EXISTS recursos_apoio (
+    id INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL,
+    descricao TEXT,
+    telefone TEXT,
+    tipo TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'BR',
+    endereco TEXT,
+    site TEXT,
+    horario TEXT,
+    latitude REAL,
+    longitude REAL
+);
+CREATE INDEX IF NOT EXISTS idx_recursos_estado_tipo ON recursos_apoio (estado, tipo);
+'''
+
+# Contadores por versão do questionário e hora ('AAAA-MM-DDTHH') das respostas
+# removidas pela retenção, com as colunas copiadas ao recriar tabelas antigas
+TABELAS_CONSOLIDADO = {
+    'consolidado_respostas': ('''
+CREATE TABLE IF NOT EXISTS consolidado_respostas (
+    questionario INTEGER NOT NULL,
+    balde TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    PRIMARY KEY (questionario, balde)
+);''', 'balde, total'),
+    'consolidado_itens': ('''
+CREATE TABLE IF NOT EXISTS consolidado_itens (
+    questionario INTEGER NOT NULL,
+    balde TEXT NOT NULL,
+    pergunta TEXT NOT NULL,
+    resposta TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    PRIMARY KEY (questionario, balde, pergunta, resposta)
+);''', 'balde, pergunta, resposta, total')
+}
+SCHEMA += ''.join(ddl for ddl, _ in TABELAS_CONSOLIDADO.values())
+
+# Índices sobre colunas adicionais: criados depois de `_atualizar_schema`
+INDICES_ADICIONAIS = '''
+CREATE INDEX IF NOT EXISTS idx_respostas_questionario ON respostas (questionario, timestamp);
+CREATE INDEX IF NOT EXISTS idx_itens_questionario
+    ON respostas_itens (questionario, timestamp, pergunta, resposta);
+'''
+
+SQL_INSERIR_RESPOSTA = 'INSERT INTO respostas (timestamp, respostas, questionario) VALUES (?, ?, ?)'
+SQL_INSERIR_RESPOSTA_COM_ID = (
+    'INSERT INTO respostas (id, timestamp, respostas, questionario) VALUES (?, ?, ?, ?)'
+)
+SQL_INSERIR_ITEM = (
+    'INSERT INTO respostas_itens (resposta_id, timestamp, pergunta, resposta, questionario) '
+    'VALUES (?, ?, ?, ?, ?)'
+)
+SQL_INSERIR_RECURSO = (
+    f"INSERT OR REPLACE INTO recursos_apoio ({', '.join(CAMPOS_RECURSO)}) "
+    f"VALUES ({', '.join('?' for _ in CAMPOS_RECURSO)})"
+)
+# As versões do questionário são passadas como uma lista JSON num único parâmetro
+SQL_FILTRO_VERSOES = 'questionario IN (SELECT value FROM json_each(?))'
+SQL_FILTRO_INTERVALO = f'WHERE timestamp >= ? AND timestamp < ? AND {SQL_FILTRO_VERSOES}'
+SQL_TOTAL = f'SELECT COUNT(*) FROM respostas {SQL_FILTRO_INTERVALO}'
+SQL_ANALISE = (
+    f'SELECT pergunta, resposta, COUNT(*) FROM respostas_itens {SQL_FILTRO_INTERVALO} '
+    'GROUP BY pergunta, resposta'
+)
+SQL_SERIE = (
+    f'SELECT substr(timestamp, 1, ?) AS balde, COUNT(*) FROM respostas {SQL_FILTRO_INTERVALO} '
+    'GROUP BY balde ORDER BY balde'
+)
+SQL_FILTRO_CONSOLIDADO = f'WHERE balde >= ? AND balde < ? AND {SQL_FILTRO_VERSOES}'
+SQL_TOTAL_CONSOLIDADO = f'SELECT COALESCE(SUM(total), 0) FROM consolidado_respostas {SQL_FILTRO_CONSOLIDADO}'
+SQL_ANALISE_CONSOLIDADA = (
+    f'SELECT pergunta, resposta, SUM(total) FROM consolidado_itens {SQL_FILTRO_CONSOLIDADO} '
+    'GROUP BY pergunta, resposta'
+)
+SQL_SERIE_CONSOLIDADA = (
+    f'SELECT substr(balde, 1, ?) AS b, SUM(total) FROM consolidado_respostas {SQL_FILTRO_CONSOLIDADO} '
+    'GROUP BY b'
+)
+# O WHERE evita a ambiguidade de sintaxe entre INSERT ... SELECT e ON CONFLICT
+SQL_CONSOLIDAR_RESPOSTAS = (
+    'INSERT INTO consolidado_respostas (questionario, balde, total) '
+    'SELECT questionario, substr(timestamp, 1, 13), COUNT(*) FROM respostas '
+    'WHERE timestamp < ? GROUP BY 1, 2 '
+    'ON CONFLICT (questionario, balde) DO UPDATE SET total = total + excluded.total'
+)
+SQL_CONSOLIDAR_ITENS = (
+    'INSERT INTO consolidado_itens (questionario, balde, pergunta, resposta, total) '
+    'SELECT questionario, substr(timestamp, 1, 13), pergunta, resposta, COUNT(*) FROM respostas_itens '
+    'WHERE timestamp < ? GROUP BY 1, 2, 3, 4 '
+    'ON CONFLICT (questionario, balde, pergunta, resposta) DO UPDATE SET total = total + excluded.total'
+)
+SQL_IMPORTAR_CONSOLIDADO_RESPOSTAS = (
+    'INSERT INTO consolidado_respostas (questionario, balde, total) VALUES (?, ?, ?) '
+    'ON CONFLICT (questionario, balde) DO UPDATE SET total = total + excluded.total'
+)
+SQL_IMPORTAR_CONSOLIDADO_ITENS = (
+    'INSERT INTO consolidado_itens (questionario, balde, pergunta, resposta, total) VALUES (?, ?, ?, ?, ?) '
+    'ON CONFLICT (questionario, balde, pergunta, resposta) DO UPDATE SET total = total + excluded.total'
+)
+SQL_REMOVER_ITENS = 'DELETE FROM respostas_itens WHERE timestamp < ?'
+SQL_REMOVER_RESPOSTAS = 'DELETE FROM respostas WHERE timestamp < ?'
+SQL_VERSAO = "SELECT seq FROM sqlite_sequence WHERE name = 'respostas'"
+# Ids já usados em outro armazenamento: o próximo id (e a versão) continuam a partir deles
+SQL_CRIAR_SEQUENCIA = (
+    "INSERT INTO sqlite_sequence (name, seq) SELECT 'respostas', 0 "
+    "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'respostas')"
+)
+SQL_AVANCAR_SEQUENCIA = "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'respostas'"
+SQL_TODAS_RESPOSTAS = (
+    f'SELECT id, timestamp, respostas, questionario FROM respostas WHERE {SQL_FILTRO_VERSOES} ORDER BY id'
+)
+SQL_RESPOSTAS_INTERVALO = f'SELECT timestamp, respostas FROM respostas {SQL_FILTRO_INTERVALO} ORDER BY id'
+SQL_RECURSOS_ESTADO = (
+    f"SELECT {', '.join(CAMPOS_RECURSO)} FROM recursos_apoio "
+    "WHERE estado IN (?, 'BR') ORDER BY id"
+)
+SQL_RECURSOS_ESTADO_TIPO = (
+    f"SELECT {', '.join(CAMPOS_RECURSO)} FROM recursos_apoio "
+    "WHERE estado IN (?, 'BR') AND tipo = ? ORDER BY id"
+)
+SQL_RECURSO_POR_ID = f"SELECT {', '.join(CAMPOS_RECURSO)} FROM recursos_apoio WHERE id = ?"
+SQL_TODOS_RECURSOS = f"SELECT {', '.join(CAMPOS_RECURSO)} FROM recursos_apoio ORDER BY id"
+
+# Recursos por executemany durante uma importação
+TAMANHO_LOTE_IMPORTACAO = 5000
+
+# user_version conta as alterações em recursos_apoio, para invalidar o índice de busca
+SQL_VERSAO_RECURSOS = 'PRAGMA user_version'
+
+# Limites que cobrem qualquer timestamp ISO gravado pela aplicação
+INICIO_ABERTO = ''
+FIM_ABERTO = '\uffff'
+
+# Prefixo do timestamp ISO que identifica cada balde da série
+TAMANHO_BALDE = {'hora': 13, 'dia': 10}
+SUFIXO_BALDE = {'hora': ':00:00', 'dia': 'T00:00:00'}
+
+
+class SQLiteDatabase(Armazenamento):
+    """
+    Backend SQLite com os mesmos métodos de `Database`.
+
+    Usa WAL para que vários workers leiam enquanto um escreve, uma conexão
+    por thread e agregação feita pelo próprio SQLite (GROUP BY sobre a
+    tabela `respostas_itens`, indexada por timestamp).
+    """
+
+    def __init__(self, filename='junta_ai.db'):
+        self.filename = filename
+        self._local = threading.local()
+        self._catalogo: Optional[CatalogoRecursos] = None
+        self._versao_catalogo = None
+        self._lock_catalogo = threading.Lock()
+
+        conn = self._conexao()
+        with conn:
+            conn.executescript(SCHEMA)
+            self._atualizar_schema(conn)
+            conn.executescript(INDICES_ADICIONAIS)
+            if conn.execute('SELECT COUNT(*) FROM recursos_apoio').fetchone()[0] == 0:
+                self.importar_recursos(RECURSOS_APOIO_PADRAO, conn)
+
+    @staticmethod
+    def _atualizar_schema(conn: sqlite3.Connection):
+        for tabela, colunas in COLUNAS_ADICIONAIS.items():
+            existentes = {linha[1] for linha in conn.execute(f'PRAGMA table_info({tabela})')}
+            for coluna, tipo in colunas.items():
+                if coluna not in existentes:
+                    conn.execute(f'ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo}')
+
+        # A versão do questionário faz parte da chave dos contadores consolidados,
+        # então as tabelas anteriores a ela são recriadas (ALTER não muda a chave)
+        for tabela, (ddl, colunas) in TABELAS_CONSOLIDADO.items():
+            existentes = {linha[1] for linha in conn.execute(f'PRAGMA table_info({tabela})')}
+            if 'questionario' in existentes:
+                continue
+            conn.executescript(f'''
+                BEGIN;
+                ALTER TABLE {tabela} RENAME TO {tabela}_anterior;
+                {ddl}
+                INSERT INTO {tabela} (questionario, {colunas})
+                    SELECT {VERSAO_INICIAL}, {colunas} FROM {tabela}_anterior;
+                DROP TABLE {tabela}_anterior;
+                COMMIT;
+            ''')
+
+    def _conexao(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.filename, timeout=30, cached_statements=64)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
+        return conn
+
+    def preparar_fork(self):
+        # Uma conexão SQLite não pode ser usada dos dois lados de um fork;
+        # os filhos abrem as suas no primeiro uso
+        self._fechar_conexao()
+
+    def fechar(self):
+        super().fechar()
+        self._fechar_conexao()
+
+    def _fechar_conexao(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @staticmethod
+    def _inserir(conn: sqlite3.Connection, entrada: Dict) -> int:
+        respostas_json = json.dumps(entrada['respostas'], ensure_ascii=False, separators=(',', ':'))
+        questionario = entrada.get('questionario', VERSAO_INICIAL)
+        if entrada.get('id') is None:
+            cursor = conn.execute(SQL_INSERIR_RESPOSTA, (entrada['timestamp'], respostas_json, questionario))
+        else:
+            cursor = conn.execute(SQL_INSERIR_RESPOSTA_COM_ID,
+                                  (entrada['id'], entrada['timestamp'], respostas_json, questionario))
+        resposta_id = cursor.lastrowid
+        conn.executemany(SQL_INSERIR_ITEM, [
+            (resposta_id, entrada['timestamp'], str(pergunta), resposta, questionario)
+            for pergunta, resposta in entrada['respostas'].items()
+        ])
+        return resposta_id
+
+    def _gravar_lote(self, entradas: List[Dict]):
+        conn = self._conexao()
+        with conn:
+            for entrada in entradas:
+                self._inserir(conn, entrada)
+
+    def importar_respostas(self, entradas: Iterable[Dict]) -> int:
+        """Insere respostas já existentes (com id e timestamp) numa única transação"""
+        conn = self._conexao()
+        total = 0
+        with conn:
+            for entrada in entradas:
+                self._inserir(conn, entrada)
+                total += 1
+        return total
+
+    def importar_consolidado(self, consolidado: Dict[int, Dict[datetime, Estatistica]],
+                             ultimo_id: int = 0) -> int:
+        """
+        Soma contadores por versão e hora de respostas que não serão inseridas
+
+        Usado na migração de dados que já passaram pela retenção. `ultimo_id`
+        é o maior id já usado na origem: novas respostas continuam depois dele.
+        Retorna o total de respostas consolidadas.
+        """
+        respostas, itens = [], []
+        for versao, por_hora in consolidado.items():
+            for hora, balde in por_hora.items():
+                chave = truncar_hora(hora).isoformat()[:13]
+                respostas.append((versao, chave, balde.total_respostas))
+                itens.extend(
+                    (versao, chave, str(pergunta), resposta, contagem)
+                    for pergunta, contagens in balde.analise.items()
+                    for resposta, contagem in contagens.items()
+                )
+
+        with self._conexao() as conn:
+            conn.executemany(SQL_IMPORTAR_CONSOLIDADO_RESPOSTAS, respostas)
+            conn.executemany(SQL_IMPORTAR_CONSOLIDADO_ITENS, itens)
+            conn.execute(SQL_CRIAR_SEQUENCIA)
+            conn.execute(SQL_AVANCAR_SEQUENCIA, (ultimo_id,))
+        return sum(total for _, _, total in respostas)
+
+    def importar_recursos(self, recursos: Iterable[Dict], conn: sqlite3.Connection = None) -> int:
+        """Insere ou substitui recursos de apoio pelo id"""
+        linhas = [tuple(r.get(campo) for campo in CAMPOS_RECURSO) for r in recursos]
+        if conn is not None:
+            self._inserir_recursos(conn, linhas)
+        else:
+            with self._conexao() as conn:
+                self._inserir_recursos(conn, linhas)
+        return len(linhas)
+
+    @staticmethod
+    def _inserir_recursos(conn: sqlite3.Connection, linhas: List[tuple]):
+        conn.executemany(SQL_INSERIR_RECURSO, linhas)
+        versao = conn.execute(SQL_VERSAO_RECURSOS).fetchone()[0]
+        conn.execute(f'PRAGMA user_version = {versao + 1}')
+
+    def _limites(self, inicio: Optional[datetime], fim: Optional[datetime],
+                 versoes: Optional[Tuple[int, ...]] = None):
+        return (
+            inicio.isoformat() if inicio else INICIO_ABERTO,
+            fim.isoformat() if fim else FIM_ABERTO,
+            json.dumps(self._versoes_consultadas(versoes))
+        )
+
+    @staticmethod
+    def _em_horas(inicio: Optional[datetime], fim: Optional[datetime]):
+        """Intervalo com a precisão de uma hora do backend JSON: início para baixo, fim para cima"""
+        return truncar_hora(inicio) if inicio else None, teto_hora(fim) if fim else None
+
+    def _limites_consolidado(self, inicio: Optional[datetime], fim: Optional[datetime],
+                             versoes: Optional[Tuple[int, ...]] = None):
+        # Mesma precisão de uma hora dos baldes de `AgregadosTemporais`
+        return (
+            truncar_hora(inicio).isoformat()[:13] if inicio else INICIO_ABERTO,
+            teto_hora(fim).isoformat()[:13] if fim else FIM_ABERTO,
+            json.dumps(self._versoes_consultadas(versoes))
+        )
+
+    def obter_estatisticas(self, inicio: Optional[datetime] = None, fim: Optional[datetime] = None,
+                           versoes: Optional[Tuple[int, ...]] = None) -> Dict:
+        conn = self._conexao()
+        inicio, fim = self._em_horas(inicio, fim)
+        limites = self._limites(inicio, fim, versoes)
+
+        limites_consolidado = self._limites_consolidado(inicio, fim, versoes)
+
+        total = (conn.execute(SQL_TOTAL, limites).fetchone()[0]
+                 + conn.execute(SQL_TOTAL_CONSOLIDADO, limites_consolidado).fetchone()[0])
+        analise = {}
+        for sql, parametros in ((SQL_ANALISE, limites), (SQL_ANALISE_CONSOLIDADA, limites_consolidado)):
+            for pergunta, resposta, count in conn.execute(sql, parametros):
+                contagens = analise.setdefault(pergunta, {})
+                contagens[resposta] = contagens.get(resposta, 0) + count
+
+        return {
+            'total_respostas': total,
+            'analise': analise
+        }
+
+    def obter_serie(self, granularidade: str = 'dia', inicio: Optional[datetime] = None,
+                    fim: Optional[datetime] = None, versoes: Optional[Tuple[int, ...]] = None) -> List[Dict]:
+        if granularidade not in GRANULARIDADES:
+            raise ValueError(f"Granularidade inválida: {granularidade}")
+
+        conn = self._conexao()
+        inicio, fim = self._em_horas(inicio, fim)
+        tamanho = (TAMANHO_BALDE[granularidade],)
+        totais = {}
+        for sql, parametros in (
+            (SQL_SERIE, tamanho + self._limites(inicio, fim, versoes)),
+            (SQL_SERIE_CONSOLIDADA, tamanho + self._limites_consolidado(inicio, fim, versoes))
+        ):
+            for balde, count in conn.execute(sql, parametros):
+                totais[balde] = totais.get(balde, 0) + count
+
+        return [
+            {'periodo': balde + SUFIXO_BALDE[granularidade], 'total_respostas': totais[balde]}
+            for balde in sorted(totais)
+        ]
+
+    def obter_versao(self) -> int:
+        # O contador do AUTOINCREMENT cresce a cada resposta gravada, em qualquer worker
+        linha = self._conexao().execute(SQL_VERSAO).fetchone()
+        return linha[0] if linha else 0
+
+    def obter_colunas(self) -> ArmazemColunar:
+        armazem = ArmazemColunar(REGISTRO.atual.perguntas)
+        versoes = json.dumps(self._versoes_consultadas(None))
+        for resposta_id, timestamp, respostas_json, questionario in self._conexao().execute(
+            SQL_TODAS_RESPOSTAS, (versoes,)
+        ):
+            armazem.adicionar(resposta_id, datetime.fromisoformat(timestamp),
+                              json.loads(respostas_json), questionario)
+        return armazem
+
+    def iterar_respostas(self, inicio: Optional[datetime] = None,
+                         fim: Optional[datetime] = None) -> Iterator[Tuple[datetime, List[int]]]:
+        armazem = ArmazemColunar(REGISTRO.atual.perguntas)
+        # O cursor entrega as linhas conforme são lidas, sem carregar o resultado inteiro
+        for timestamp, respostas_json in self._conexao().execute(
+            SQL_RESPOSTAS_INTERVALO, self._limites(inicio, fim)
+        ):
+            yield datetime.fromisoformat(timestamp), armazem.codificar(json.loads(respostas_json))
+
+    def aplicar_retencao(self, dias: int) -> Dict:
+        # Soma as respostas antigas aos contadores por hora e as remove, numa só transação.
+        # As consultas por intervalo já têm a precisão de uma hora, então o resultado não muda.
+        limite = limite_retencao(dias)
+        parametros = (limite.isoformat(),)
+        conn = self._conexao()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(SQL_CONSOLIDAR_RESPOSTAS, parametros)
+            conn.execute(SQL_CONSOLIDAR_ITENS, parametros)
+            conn.execute(SQL_REMOVER_ITENS, parametros)
+            removidas = conn.execute(SQL_REMOVER_RESPOSTAS, parametros).rowcount
+
+        return {'limite': limite.isoformat(), 'removidas': removidas}
+
+    @staticmethod
+    def _recurso(linha) -> Dict:
+        return {campo: valor for campo, valor in zip(CAMPOS_RECURSO, linha) if valor is not None}
+
+    def obter_recursos_apoio(self, estado: Optional[str] = None,
+                             tipo: Optional[str] = None) -> List[Dict]:
+        conn = self._conexao()
+        if tipo:
+            linhas = conn.execute(SQL_RECURSOS_ESTADO_TIPO, (estado or 'BR', tipo))
+        else:
+            linhas = conn.execute(SQL_RECURSOS_ESTADO, (estado or 'BR',))
+        return [self._recurso(linha) for linha in linhas]
+
+    def obter_recurso_apoio(self, recurso_id: int) -> Optional[Dict]:
+        linha = self._conexao().execute(SQL_RECURSO_POR_ID, (recurso_id,)).fetchone()
+        return self._recurso(linha) if linha else None
+
+    def _catalogo_atual(self) -> CatalogoRecursos:
+        """Catálogo em memória com o índice de busca, recarregado quando outro processo importa recursos"""
+        conn = self._conexao()
+        versao = conn.execute(SQL_VERSAO_RECURSOS).fetchone()[0]
+        with self._lock_catalogo:
+            if self._catalogo is None or versao != self._versao_catalogo:
+                self._catalogo = CatalogoRecursos(
+                    self._recurso(linha) for linha in conn.execute(SQL_TODOS_RECURSOS)
+                )
+                self._versao_catalogo = versao
+            return self._catalogo
+
+    def importar_recursos_apoio(self, recursos: Iterable[Dict]) -> Dict:
+        conn = self._conexao()
+        pendentes = []
+
+        def gravar(recurso):
+            pendentes.append(tuple(recurso.get(campo) for campo in CAMPOS_RECURSO))
+            if len(pendentes) >= TAMANHO_LOTE_IMPORTACAO:
+                conn.executemany(SQL_INSERIR_RECURSO, pendentes)
+                pendentes.clear()
+
+        with conn:
+            # Trava de escrita desde o início: os ids são calculados sobre o catálogo lido aqui
+            conn.execute('BEGIN IMMEDIATE')
+            catalogo = CatalogoRecursos(self._recurso(linha) for linha in conn.execute(SQL_TODOS_RECURSOS))
+            resultado = catalogo.importar(recursos, ao_gravar=gravar)
+            self._inserir_recursos(conn, pendentes)
+            versao = conn.execute(SQL_VERSAO_RECURSOS).fetchone()[0]
+
+        with self._lock_catalogo:
+            self._catalogo, self._versao_catalogo = catalogo, versao
+        return resultado
+
+    def buscar_recursos_apoio(self, termo: str, estado: Optional[str] = None,
+                              tipo: Optional[str] = None, limite: Optional[int] = None,
+                              deslocamento: int = 0) -> Dict:
+        return self._catalogo_atual().buscar(termo, estado, tipo, limite, deslocamento)
+
+    def obter_recursos_proximos(self, latitude: float, longitude: float, raio_km: float,
+                                tipo: Optional[str] = None, limite: int = 10) -> List[Dict]:
+        return self._catalogo_atual().proximos(latitude, longitude, raio_km, tipo, limite)
@@ -0,0 +1,81 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Tuple
+
+# Sinaliza para a thread de escrita que não haverá novos pedidos
+_PARAR = object()
+
+
+class EscritorEmLote:
+    """
+    Thread de escrita que agrupa respostas pendentes em um único commit (group commit).
+
+    Cada pedido fica na fila até que o lote atinja `tamanho_lote` registros ou
+    até que `espera_maxima_ms` tenha passado desde o primeiro pedido do lote.
+    O lote inteiro é então persistido por `gravar_lote` (uma escrita e um fsync)
+    e só depois disso cada requisição recebe a confirmação.
+    """
+
+    def __init__(self, gravar_lote: Callable[[List[Dict]], None],
+                 tamanho_lote: int = 64, espera_maxima_ms: float = 2.0):
+        if tamanho_lote < 1:
+            raise ValueError("tamanho_lote deve ser maior que zero")
+
+        self.gravar_lote = gravar_lote
+        self.tamanho_lote = tamanho_lote
+        self.espera_maxima = espera_maxima_ms / 1000
+        self._fila = queue.Queue()
+        self._thread = threading.Thread(target=self._executar, name='escritor-lote', daemon=True)
+        self._thread.start()
+
+    def enviar(self, entrada: Dict) -> Future:
+        """Enfileira uma entrada; o Future é resolvido quando o lote estiver gravado"""
+        pedido = Future()
+        self._fila.put((entrada, pedido))
+        return pedido
+
+    def gravar(self, entrada: Dict, timeout: float = None):
+        """Enfileira uma entrada e bloqueia até que ela esteja persistida"""
+        return self.enviar(entrada).result(timeout)
+
+    def parar(self):
+        """Grava o que ainda estiver na fila e encerra a thread"""
+        if self._thread.is_alive():
+            self._fila.put(_PARAR)
+            self._thread.join()
+
+    def _coletar_lote(self, primeiro) -> Tuple[List, bool]:
+        lote = [primeiro]
+        limite = time.monotonic() + self.espera_maxima
+
+        while len(lote) < self.tamanho_lote:
+            restante = limite - time.monotonic()
+            try:
+                item = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if item is _PARAR:
+                return lote, True
+            lote.append(item)
+
+        return lote, False
+
+    def _executar(self):
+        parar = False
+        while not parar:
+            item = self._fila.get()
+            if item is _PARAR:
+                break
+
+            lote, parar = self._coletar_lote(item)
+            entradas = [entrada for entrada, _ in lote]
+            try:
+                self.gravar_lote(entradas)
+            except Exception as e:
+                for _, pedido in lote:
+                    pedido.set_exception(e)
+            else:
+                for entrada, pedido in lote:
+                    pedido.set_result(entrada)
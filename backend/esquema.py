@@ -0,0 +1,60 @@
+from typing import Dict, List, Optional, Tuple
+from models import PONTOS_POR_RESPOSTA
+
+
+class EsquemaQuestionario:
+    """
+    Validação das respostas do questionário, montada uma vez a partir das perguntas.
+
+    Cada pergunta vira um dict opção → código (o índice da opção, o mesmo de
+    `ArmazemColunar`), então validar uma resposta é uma busca por hash em vez
+    de percorrer a lista de opções. Um conjunto válido sai já codificado: o
+    vetor de códigos serve para a pontuação e para reconstruir o dict
+    canônico que vai para o armazenamento (só perguntas conhecidas, na ordem
+    do questionário).
+    """
+
+    def __init__(self, perguntas: List[Dict]):
+        self.chaves = [str(p['id']) for p in perguntas]
+        self.opcoes = [tuple(p['opcoes']) for p in perguntas]
+        self._codigos = [{opcao: i for i, opcao in enumerate(opcoes)} for opcoes in self.opcoes]
+        self._itens = list(zip(self.chaves, self._codigos))
+        self._pontos = [tuple(PONTOS_POR_RESPOSTA.get(opcao, 0) for opcao in opcoes) for opcoes in self.opcoes]
+
+    def __len__(self) -> int:
+        return len(self.chaves)
+
+    def validar(self, respostas) -> Tuple[Optional[List[int]], Optional[str]]:
+        """
+        Verifica se o conjunto responde todas as perguntas com opções válidas
+
+        Returns:
+            (códigos, None) se o conjunto for válido, ou (None, mensagem de erro)
+        """
+        if not isinstance(respostas, dict):
+            return None, 'Dados inválidos'
+        if len(respostas) != len(self.chaves):
+            return None, f'Esperado {len(self.chaves)} respostas, recebido {len(respostas)}'
+
+        try:
+            return [codigos[respostas[chave]] for chave, codigos in self._itens], None
+        except (KeyError, TypeError):
+            pass
+
+        # Caminho de erro: descobre qual pergunta falhou, na ordem do questionário
+        for chave, codigos in self._itens:
+            if chave not in respostas:
+                return None, f'Falta resposta para pergunta {chave}'
+            valor = respostas[chave]
+            if not isinstance(valor, str) or valor not in codigos:
+                return None, f'Resposta inválida para pergunta {chave}'
+        return None, 'Dados inválidos'
+
+    def decodificar(self, codigos: List[int]) -> Dict[str, str]:
+        """Dict {pergunta_id: opção} de um vetor de códigos válido"""
+        return {chave: opcoes[codigo] for chave, opcoes, codigo in zip(self.chaves, self.opcoes, codigos)}
+
+    def pontuar(self, codigos: List[int]) -> int:
+        """Mesma pontuação de `Resposta.calcular_pontuacao`, a partir dos códigos"""
+        return sum(pontos[codigo] for pontos, codigo in zip(self._pontos, codigos))
+
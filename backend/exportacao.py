@@ -0,0 +1,169 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from colunar import SEM_RESPOSTA, para_microssegundos
+from leitor_colunar import ASSINATURA, PREAMBULO, VERSAO_FORMATO, alinhar
+from pontuacao import TABELAS_PONTOS, pontuar_codigos, tabela_pontos
+from questionarios import REGISTRO
+
+FORMATOS_EXPORTACAO = ('ndjson', 'csv', 'colunar')
+
+TIPOS_CONTEUDO = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+    'colunar': 'application/octet-stream'
+}
+
+EXTENSOES = {'ndjson': 'ndjson', 'csv': 'csv', 'colunar': 'jcol'}
+
+MICROSSEGUNDOS_POR_DIA = 86_400_000_000
+
+# Registros agrupados em cada pedaço entregue ao cliente (uma escrita por bloco)
+REGISTROS_POR_BLOCO = 1000
+
+# Por mapeamento do questionário: (chaves, opções, pontos por pergunta e código).
+# Nos pontos, o índice -1 (SEM_RESPOSTA) cai na coluna zerada.
+LAYOUTS = {
+    mapeamento: (
+        [str(p['id']) for p in perguntas],
+        [list(p['opcoes']) for p in perguntas],
+        TABELAS_PONTOS[mapeamento].tolist()
+    )
+    for mapeamento, perguntas in REGISTRO.mapeamentos().items()
+}
+
+
+def _layout_exportado() -> Tuple[List[str], List[List[str]], List[List[int]]]:
+    # `iterar_respostas` devolve os códigos do mapeamento da versão atual
+    return LAYOUTS[REGISTRO.atual.mapeamento]
+
+
+def registros_anonimos(armazenamento, inicio: Optional[datetime] = None,
+                       fim: Optional[datetime] = None) -> Iterator[Dict]:
+    """
+    Respostas individuais sem id nem horário: a data (só o dia), a pontuação e as respostas
+
+    Um registro por vez, lido do armazenamento em fluxo.
+    """
+    chaves, opcoes_por_pergunta, pontos_por_pergunta = _layout_exportado()
+    for momento, codigos in armazenamento.iterar_respostas(inicio, fim):
+        yield {
+            'data': momento.date().isoformat(),
+            'pontuacao': sum(pontos[codigo] for pontos, codigo in zip(pontos_por_pergunta, codigos)),
+            'respostas': {
+                chave: opcoes[codigo] if codigo != SEM_RESPOSTA else None
+                for chave, opcoes, codigo in zip(chaves, opcoes_por_pergunta, codigos)
+            }
+        }
+
+
+def _em_blocos(linhas: Iterator[str]) -> Iterator[str]:
+    bloco: List[str] = []
+    for linha in linhas:
+        bloco.append(linha)
+        if len(bloco) >= REGISTROS_POR_BLOCO:
+            yield ''.join(bloco)
+            bloco.clear()
+    if bloco:
+        yield ''.join(bloco)
+
+
+def gerar_ndjson(registros: Iterator[Dict]) -> Iterator[str]:
+    return _em_blocos(
+        json.dumps(registro, ensure_ascii=False, separators=(',', ':')) + '\n'
+        for registro in registros
+    )
+
+
+def gerar_csv(registros: Iterator[Dict]) -> Iterator[str]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator='\n')
+
+    def linha(valores) -> str:
+        escritor.writerow(valores)
+        texto = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return texto
+
+    chaves = _layout_exportado()[0]
+
+    def linhas():
+        yield linha(['data', 'pontuacao'] + [f'pergunta_{chave}' for chave in chaves])
+        for registro in registros:
+            yield linha(
+                [registro['data'], registro['pontuacao']]
+                + [registro['respostas'][chave] or '' for chave in chaves]
+            )
+
+    return _em_blocos(linhas())
+
+
+GERADORES = {'ndjson': gerar_ndjson, 'csv': gerar_csv}
+
+
+def gerar_colunar(armazenamento, inicio: Optional[datetime] = None,
+                  fim: Optional[datetime] = None) -> Iterator[bytes]:
+    """
+    Exportação anônima no formato colunar binário (ver `leitor_colunar`)
+
+    Parte da cópia colunar do armazenamento: cada pergunta vira uma coluna
+    uint8 sem decodificar nenhuma resposta (o código -1 em int8 é o byte 255).
+    """
+    armazem = armazenamento.obter_colunas()
+    timestamps = np.frombuffer(armazem.timestamps, dtype=np.int64)
+    colunas = [np.frombuffer(coluna, dtype=np.int8) for coluna in armazem.colunas]
+
+    if inicio or fim:
+        mascara = np.ones(len(timestamps), dtype=bool)
+        if inicio:
+            mascara &= timestamps >= para_microssegundos(inicio)
+        if fim:
+            mascara &= timestamps < para_microssegundos(fim)
+        timestamps = timestamps[mascara]
+        colunas = [coluna[mascara] for coluna in colunas]
+
+    matriz = np.column_stack(colunas) if len(timestamps) else np.empty((0, len(colunas)), dtype=np.int8)
+    dados = {
+        'dia': (timestamps // MICROSSEGUNDOS_POR_DIA).astype('<i4'),
+        'pontuacao': pontuar_codigos(matriz, tabela_pontos(armazem.perguntas)).astype(np.uint8),
+        **{chave: coluna.view(np.uint8) for chave, coluna in zip(armazem.chaves, colunas)}
+    }
+
+    descricao_colunas, deslocamento = [], 0
+    for nome, valores in dados.items():
+        descricao_colunas.append({'nome': nome, 'dtype': valores.dtype.str, 'deslocamento': deslocamento})
+        deslocamento += alinhar(valores.nbytes)
+
+    cabecalho = json.dumps({
+        'versao_formato': VERSAO_FORMATO,
+        'linhas': len(timestamps),
+        'exportado_em': datetime.now().isoformat(timespec='seconds'),
+        'perguntas': [
+            {'id': p['id'], 'texto': p['texto'], 'opcoes': list(p['opcoes'])}
+            for p in armazem.perguntas
+        ],
+        'colunas': descricao_colunas
+    }, ensure_ascii=False).encode('utf-8')
+
+    inicio_cabecalho = PREAMBULO.pack(ASSINATURA, VERSAO_FORMATO, len(cabecalho)) + cabecalho
+    yield inicio_cabecalho + bytes(alinhar(len(inicio_cabecalho)) - len(inicio_cabecalho))
+    for valores in dados.values():
+        yield valores.tobytes() + bytes(alinhar(valores.nbytes) - valores.nbytes)
+
+
+def exportar(armazenamento, formato: str, inicio: Optional[datetime] = None,
+             fim: Optional[datetime] = None) -> Iterator:
+    """
+    Exportação anônima como um gerador de pedaços (texto em NDJSON/CSV, bytes no colunar)
+
+    Em NDJSON e CSV a memória usada não depende do número de respostas exportadas.
+    """
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError(f"Formato de exportação inválido: {formato}")
+    if formato == 'colunar':
+        return gerar_colunar(armazenamento, inicio, fim)
+    return GERADORES[formato](registros_anonimos(armazenamento, inicio, fim))
@@ -0,0 +1,46 @@
+"""
+Exportação das respostas individuais anônimas (data, pontuação e respostas)
+
+Uso:
+    python exportar_respostas.py [--formato ndjson|csv|colunar] [--inicio 2024-01-01] [--fim 2024-02-01] [--saida arquivo]
+
+O formato 'colunar' é binário e deve ser lido com leitor_colunar.py.
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import db
+from exportacao import FORMATOS_EXPORTACAO, exportar
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exporta respostas anônimas em NDJSON, CSV ou colunar')
+    parser.add_argument('--formato', choices=FORMATOS_EXPORTACAO, default='ndjson')
+    parser.add_argument('--inicio', type=datetime.fromisoformat, help='data/hora ISO 8601 (inclusiva)')
+    parser.add_argument('--fim', type=datetime.fromisoformat, help='data/hora ISO 8601 (exclusiva)')
+    parser.add_argument('--saida', help='arquivo de destino (padrão: saída padrão)')
+    args = parser.parse_args()
+
+    binario = args.formato == 'colunar'
+    if args.saida:
+        saida = open(args.saida, 'wb' if binario else 'w', encoding=None if binario else 'utf-8',
+                     newline=None if binario else '')
+    else:
+        saida = sys.stdout.buffer if binario else sys.stdout
+
+    try:
+        for bloco in exportar(db, args.formato, args.inicio, args.fim):
+            saida.write(bloco)
+    finally:
+        if args.saida:
+            saida.close()
+        db.fechar()
+
+
+if __name__ == '__main__':
+    main()
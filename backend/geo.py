@@ -0,0 +1,131 @@
+import heapq
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+RAIO_TERRA_KM = 6371.0088
+KM_POR_GRAU = math.pi * RAIO_TERRA_KM / 180
+
+# Lado de cada célula da grade, em graus (~28 km no equador)
+TAMANHO_CELULA = 0.25
+
+# Acima disso o cosseno da latitude tende a zero e os anéis não terminam
+LATITUDE_MAXIMA_GRADE = 89.0
+
+
+def coordenadas_validas(latitude, longitude) -> bool:
+    return (
+        isinstance(latitude, (int, float)) and isinstance(longitude, (int, float))
+        and -90 <= latitude <= 90 and -180 <= longitude <= 180
+    )
+
+
+def distancia_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distância pela fórmula de haversine"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * RAIO_TERRA_KM * math.asin(math.sqrt(a))
+
+
+def _celula(latitude: float, longitude: float) -> Tuple[int, int]:
+    return math.floor(latitude / TAMANHO_CELULA), math.floor(longitude / TAMANHO_CELULA)
+
+
+class IndiceEspacial:
+    """
+    Grade regular de células de `TAMANHO_CELULA` graus com os recursos georreferenciados.
+
+    A busca pelos k mais próximos percorre anéis de células em volta do ponto
+    consultado e para assim que o anel seguinte não pode conter nada mais
+    perto que o k-ésimo candidato (ou que o raio pedido). Recursos sem
+    latitude/longitude não entram no índice.
+    """
+
+    def __init__(self, recursos: Iterable[Dict] = ()):
+        self._celulas: Dict[Tuple[int, int], Dict[int, Tuple[float, float]]] = {}
+        self._celula_por_recurso: Dict[int, Tuple[int, int]] = {}
+        for recurso in recursos:
+            self.indexar(recurso)
+
+    def __len__(self) -> int:
+        return len(self._celula_por_recurso)
+
+    def indexar(self, recurso: Dict):
+        """Adiciona ou move o recurso; sem coordenadas válidas ele apenas sai do índice"""
+        recurso_id = recurso['id']
+        self.remover(recurso_id)
+
+        latitude, longitude = recurso.get('latitude'), recurso.get('longitude')
+        if not coordenadas_validas(latitude, longitude):
+            return
+
+        celula = _celula(latitude, longitude)
+        self._celulas.setdefault(celula, {})[recurso_id] = (latitude, longitude)
+        self._celula_por_recurso[recurso_id] = celula
+
+    def remover(self, recurso_id: int) -> bool:
+        celula = self._celula_por_recurso.pop(recurso_id, None)
+        if celula is None:
+            return False
+
+        pontos = self._celulas[celula]
+        del pontos[recurso_id]
+        if not pontos:
+            del self._celulas[celula]
+        return True
+
+    @staticmethod
+    def _anel(centro: Tuple[int, int], distancia: int) -> Iterable[Tuple[int, int]]:
+        """Células a exatamente `distancia` células (distância de Chebyshev) do centro"""
+        i, j = centro
+        if distancia == 0:
+            yield centro
+            return
+        for dj in range(-distancia, distancia + 1):
+            yield i - distancia, j + dj
+            yield i + distancia, j + dj
+        for di in range(-distancia + 1, distancia):
+            yield i + di, j - distancia
+            yield i + di, j + distancia
+
+    def proximos(self, latitude: float, longitude: float, raio_km: float, limite: int = 10,
+                 filtro: Optional[Callable[[int], bool]] = None) -> List[Tuple[int, float]]:
+        """
+        Até `limite` recursos a no máximo `raio_km` do ponto, do mais perto ao mais longe
+
+        Returns:
+            [(id, distância em km), ...]; empates são desfeitos pelo id
+        """
+        if not self._celula_por_recurso or limite < 1:
+            return []
+
+        centro = _celula(latitude, longitude)
+        # Menor lado de uma célula (em km) na faixa de latitudes que o raio pode alcançar
+        latitude_extrema = min(abs(latitude) + raio_km / KM_POR_GRAU, LATITUDE_MAXIMA_GRADE)
+        lado_minimo_km = TAMANHO_CELULA * KM_POR_GRAU * math.cos(math.radians(latitude_extrema))
+
+        # Heap de máximo (distâncias negativas) com os `limite` melhores candidatos
+        melhores: List[Tuple[float, int]] = []
+        anel = 0
+        while True:
+            # Nenhum ponto do anel fica mais perto que (anel - 1) células inteiras
+            distancia_minima = max(anel - 1, 0) * lado_minimo_km
+            if distancia_minima > raio_km:
+                break
+            if len(melhores) == limite and distancia_minima > -melhores[0][0]:
+                break
+
+            for celula in self._anel(centro, anel):
+                for recurso_id, (lat, lon) in self._celulas.get(celula, {}).items():
+                    distancia = distancia_km(latitude, longitude, lat, lon)
+                    if distancia > raio_km or (filtro is not None and not filtro(recurso_id)):
+                        continue
+                    candidato = (-distancia, -recurso_id)
+                    if len(melhores) < limite:
+                        heapq.heappush(melhores, candidato)
+                    elif candidato > melhores[0]:
+                        heapq.heapreplace(melhores, candidato)
+            anel += 1
+
+        return sorted(((-i, -d) for d, i in melhores), key=lambda item: (item[1], item[0]))
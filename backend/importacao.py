@@ -0,0 +1,166 @@
+import csv
+import io
+import json
+import time
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+from geo import coordenadas_validas
+from models import RecursoApoio, TIPOS_RECURSO_APOIO
+
+FORMATOS_IMPORTACAO = ('csv', 'ndjson')
+
+# Campos de `RecursoApoio` aceitos na importação; o id é atribuído pela chave natural
+CAMPOS_TEXTO = ('nome', 'descricao', 'tipo', 'estado', 'telefone', 'endereco', 'site', 'horario')
+CAMPOS_OBRIGATORIOS = ('nome', 'tipo')
+
+UFS = frozenset((
+    'AC', 'AL', 'AP', 'AM', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MT', 'MS', 'MG', 'PA',
+    'PB', 'PR', 'PE', 'PI', 'RJ', 'RN', 'RS', 'RO', 'RR', 'SC', 'SP', 'SE', 'TO', 'BR'
+))
+
+# Quantos erros de validação são devolvidos no relatório (os demais só são contados)
+MAXIMO_ERROS_RELATORIO = 50
+
+
+class ErroValidacao(ValueError):
+    pass
+
+
+def ler_csv(arquivo: BinaryIO) -> Iterator[Tuple[Optional[Dict], Optional[str]]]:
+    """Linhas do CSV (com cabeçalho) como dicts, uma por vez"""
+    texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+    for linha in csv.DictReader(texto):
+        yield linha, None
+
+
+def ler_ndjson(arquivo: BinaryIO) -> Iterator[Tuple[Optional[Dict], Optional[str]]]:
+    """Um objeto JSON por linha; linhas em branco são ignoradas"""
+    for linha in arquivo:
+        if not linha.strip():
+            continue
+        try:
+            objeto = json.loads(linha)
+        except ValueError:
+            yield None, 'JSON inválido'
+            continue
+        if not isinstance(objeto, dict):
+            yield None, 'cada linha deve ser um objeto JSON'
+            continue
+        yield objeto, None
+
+
+LEITORES = {'csv': ler_csv, 'ndjson': ler_ndjson}
+
+
+def _coordenada(valor) -> Optional[float]:
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, bool):
+        raise ErroValidacao('coordenada inválida')
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        raise ErroValidacao(f'coordenada inválida: {valor!r}')
+
+
+def validar_recurso(bruto: Dict) -> Dict:
+    """
+    Normaliza e valida uma linha importada com os campos de `RecursoApoio`
+
+    Colunas desconhecidas são ignoradas e campos vazios omitidos.
+
+    Raises:
+        ErroValidacao: se faltar campo obrigatório ou algum valor for inválido
+    """
+    campos = {}
+    for campo in CAMPOS_TEXTO:
+        valor = bruto.get(campo)
+        if valor is None:
+            continue
+        if not isinstance(valor, str):
+            raise ErroValidacao(f'{campo} deve ser texto')
+        valor = valor.strip()
+        if valor:
+            campos[campo] = valor
+
+    faltando = [campo for campo in CAMPOS_OBRIGATORIOS if campo not in campos]
+    if faltando:
+        raise ErroValidacao(f"campos obrigatórios ausentes: {', '.join(faltando)}")
+
+    campos['tipo'] = campos['tipo'].lower()
+    if campos['tipo'] not in TIPOS_RECURSO_APOIO:
+        raise ErroValidacao(f"tipo inválido: {campos['tipo']}")
+
+    campos['estado'] = campos.get('estado', 'BR').upper()
+    if campos['estado'] not in UFS:
+        raise ErroValidacao(f"estado inválido: {campos['estado']}")
+
+    latitude, longitude = _coordenada(bruto.get('latitude')), _coordenada(bruto.get('longitude'))
+    if (latitude is None) != (longitude is None):
+        raise ErroValidacao('latitude e longitude devem ser informadas juntas')
+    if latitude is not None:
+        if not coordenadas_validas(latitude, longitude):
+            raise ErroValidacao('coordenadas fora do intervalo válido')
+        campos['latitude'], campos['longitude'] = latitude, longitude
+
+    # id provisório: o definitivo vem da chave natural no catálogo
+    recurso = RecursoApoio(id=None, descricao=campos.pop('descricao', None), **campos).to_dict()
+    return {campo: valor for campo, valor in recurso.items() if campo != 'id' and valor is not None}
+
+
+class ImportacaoRecursos:
+    """
+    Importação em fluxo de um arquivo CSV ou NDJSON de recursos de apoio.
+
+    As linhas são lidas, validadas e entregues ao armazenamento uma a uma
+    (`recursos()` é um gerador), então a memória usada pela leitura não
+    depende do tamanho do arquivo. Linhas inválidas são contadas e as
+    primeiras `MAXIMO_ERROS_RELATORIO` entram no relatório.
+    """
+
+    def __init__(self, arquivo: BinaryIO, formato: str):
+        if formato not in FORMATOS_IMPORTACAO:
+            raise ValueError(f"Formato de importação inválido: {formato}")
+        self.arquivo = arquivo
+        self.formato = formato
+        self.lidas = 0
+        self.rejeitadas = 0
+        self.erros = []
+
+    def _rejeitar(self, erro: str):
+        self.rejeitadas += 1
+        if len(self.erros) < MAXIMO_ERROS_RELATORIO:
+            self.erros.append({'linha': self.lidas, 'erro': erro})
+
+    def recursos(self) -> Iterator[Dict]:
+        for bruto, erro in LEITORES[self.formato](self.arquivo):
+            self.lidas += 1
+            if erro:
+                self._rejeitar(erro)
+                continue
+            try:
+                yield validar_recurso(bruto)
+            except ErroValidacao as e:
+                self._rejeitar(str(e))
+
+    def executar(self, armazenamento) -> Dict:
+        """
+        Importa o arquivo no armazenamento e devolve o relatório
+
+        Returns:
+            Totais de linhas lidas, inseridas, atualizadas e rejeitadas, os
+            primeiros erros e a vazão em linhas por segundo
+        """
+        inicio = time.perf_counter()
+        resultado = armazenamento.importar_recursos_apoio(self.recursos())
+        segundos = time.perf_counter() - inicio
+
+        return {
+            'formato': self.formato,
+            'linhas_lidas': self.lidas,
+            'inseridos': resultado['inseridos'],
+            'atualizados': resultado['atualizados'],
+            'rejeitadas': self.rejeitadas,
+            'erros': self.erros,
+            'segundos': round(segundos, 3),
+            'linhas_por_segundo': round(self.lidas / segundos) if segundos > 0 else self.lidas
+        }
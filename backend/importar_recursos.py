@@ -0,0 +1,49 @@
+"""
+Importação em massa de recursos de apoio a partir de CSV ou NDJSON
+
+Uso:
+    python importar_recursos.py servicos.csv [--formato csv|ndjson]
+
+Colunas/chaves aceitas: nome, tipo (obrigatórias), descricao, estado, telefone,
+endereco, site, horario, latitude, longitude. Recursos já existentes com o
+mesmo estado, nome e endereço são atualizados em vez de duplicados.
+"""
+
+import argparse
+import sys
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import db
+from importacao import FORMATOS_IMPORTACAO, ImportacaoRecursos
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Importa recursos de apoio de CSV/NDJSON')
+    parser.add_argument('arquivo')
+    parser.add_argument('--formato', choices=FORMATOS_IMPORTACAO,
+                        help='padrão: deduzido da extensão do arquivo')
+    args = parser.parse_args()
+
+    formato = args.formato or ('ndjson' if args.arquivo.endswith(('.ndjson', '.jsonl')) else 'csv')
+
+    try:
+        with open(args.arquivo, 'rb') as arquivo:
+            relatorio = ImportacaoRecursos(arquivo, formato).executar(db)
+    except FileNotFoundError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        db.fechar()
+
+    for erro in relatorio['erros']:
+        print(f"linha {erro['linha']}: {erro['erro']}", file=sys.stderr)
+
+    print(f"{relatorio['linhas_lidas']} linhas lidas em {relatorio['segundos']}s "
+          f"({relatorio['linhas_por_segundo']} linhas/s): {relatorio['inseridos']} inseridos, "
+          f"{relatorio['atualizados']} atualizados, {relatorio['rejeitadas']} rejeitadas")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Leitor do formato colunar binário de exportação das respostas (.jcol)
+
+Arquivo independente (só depende de NumPy) para ser distribuído junto com os
+dados a parceiros de pesquisa:
+
+    from leitor_colunar import ConjuntoColunar
+
+    with ConjuntoColunar('junta-ai-respostas.jcol') as dados:
+        dados.linhas                 # número de respostas
+        dados.coluna('pontuacao')    # np.ndarray uint8, sem cópia
+        dados.dias()                 # np.ndarray datetime64[D]
+        dados.contagens(3)           # {'Nunca': 120, 'Sempre': 40, ...}
+
+Layout (inteiros little-endian):
+    - 8 bytes: assinatura b'JUNTACOL'
+    - uint16: versão do formato; uint32: tamanho do cabeçalho em bytes
+    - cabeçalho JSON (UTF-8): perguntas com as opções, número de linhas e,
+      para cada coluna, nome, dtype NumPy e deslocamento a partir do início dos dados
+    - dados: uma coluna contígua após a outra, cada uma alinhada a 64 bytes
+
+Colunas: 'dia' (int32, dias desde 1970-01-01), 'pontuacao' (uint8) e uma
+coluna uint8 por pergunta, nomeada pelo id, com o índice da opção escolhida
+(255 quando a pergunta não foi respondida).
+"""
+
+import json
+import mmap
+import struct
+from typing import Dict, List
+
+import numpy as np
+
+ASSINATURA = b'JUNTACOL'
+VERSAO_FORMATO = 1
+PREAMBULO = struct.Struct('<8sHI')
+ALINHAMENTO = 64
+SEM_RESPOSTA_UINT8 = 255
+
+
+def alinhar(tamanho: int) -> int:
+    return -(-tamanho // ALINHAMENTO) * ALINHAMENTO
+
+
+class ConjuntoColunar:
+    """Arquivo .jcol mapeado em memória; as colunas são views NumPy sobre o mmap"""
+
+    def __init__(self, caminho: str):
+        self._arquivo = open(caminho, 'rb')
+        self._mmap = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+        assinatura, versao, tamanho_cabecalho = PREAMBULO.unpack_from(self._mmap, 0)
+        if assinatura != ASSINATURA:
+            raise ValueError(f"{caminho} não é um arquivo colunar do Junta AÍ")
+        if versao > VERSAO_FORMATO:
+            raise ValueError(f"Versão de formato não suportada: {versao}")
+
+        inicio_cabecalho = PREAMBULO.size
+        self.cabecalho = json.loads(self._mmap[inicio_cabecalho:inicio_cabecalho + tamanho_cabecalho])
+        self.linhas: int = self.cabecalho['linhas']
+        self.perguntas: List[Dict] = self.cabecalho['perguntas']
+
+        inicio_dados = alinhar(inicio_cabecalho + tamanho_cabecalho)
+        self._colunas = {
+            coluna['nome']: np.frombuffer(
+                self._mmap, dtype=np.dtype(coluna['dtype']), count=self.linhas,
+                offset=inicio_dados + coluna['deslocamento']
+            )
+            for coluna in self.cabecalho['colunas']
+        }
+
+    def __enter__(self) -> 'ConjuntoColunar':
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+    def fechar(self):
+        self._colunas = {}
+        self._arquivo.close()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Ainda há arrays obtidos de `coluna()` em uso; o mmap é liberado junto com eles
+            pass
+
+    @property
+    def nomes_colunas(self) -> List[str]:
+        return list(self._colunas)
+
+    def coluna(self, nome) -> np.ndarray:
+        return self._colunas[str(nome)]
+
+    def dias(self) -> np.ndarray:
+        return self._colunas['dia'].astype('datetime64[D]')
+
+    def matriz(self) -> np.ndarray:
+        """Códigos de todas as perguntas como matriz (respostas × perguntas), copiada"""
+        return np.column_stack([self.coluna(p['id']) for p in self.perguntas])
+
+    def opcoes(self, pergunta_id) -> List[str]:
+        for pergunta in self.perguntas:
+            if str(pergunta['id']) == str(pergunta_id):
+                return pergunta['opcoes']
+        raise KeyError(f"Pergunta inexistente: {pergunta_id}")
+
+    def contagens(self, pergunta_id) -> Dict[str, int]:
+        opcoes = self.opcoes(pergunta_id)
+        contagens = np.bincount(self.coluna(pergunta_id), minlength=SEM_RESPOSTA_UINT8 + 1)
+        return {opcao: int(n) for opcao, n in zip(opcoes, contagens) if n}
@@ -0,0 +1,75 @@
+"""
+Migração única dos dados JSON (data.json + log de respostas) para SQLite
+
+Uso:
+    python migrar_para_sqlite.py [--json data.json] [--log respostas.log] [--destino junta_ai.db]
+"""
+
+import argparse
+import os
+import sys
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import Database
+from database_sqlite import SQLiteDatabase
+
+
+def migrar(json_filename: str, log_filename: Optional[str], destino: str) -> Dict:
+    """
+    Copia respostas, contadores consolidados e recursos de apoio para um banco SQLite novo
+
+    Args:
+        json_filename: Arquivo JSON legado (semente)
+        log_filename: Log de respostas do modo 'log', se existir
+        destino: Arquivo SQLite a criar
+
+    Returns:
+        Dicionário com o total de registros migrados
+    """
+    if os.path.exists(destino):
+        raise FileExistsError(f"O destino {destino} já existe")
+
+    origem = Database(filename=json_filename, modo='log', log_filename=log_filename)
+    try:
+        sqlite_db = SQLiteDatabase(destino)
+        total_respostas = sqlite_db.importar_respostas(
+            entrada for armazem in origem.armazens.values() for entrada in armazem
+        )
+        # Respostas já removidas pela retenção seguem nos contadores consolidados
+        total_consolidadas = sqlite_db.importar_consolidado(
+            origem.contadores_consolidados(), origem.obter_versao()
+        )
+        total_recursos = sqlite_db.importar_recursos(origem.catalogo.todos())
+        sqlite_db.fechar()
+    finally:
+        origem.fechar()
+
+    return {
+        'respostas': total_respostas,
+        'consolidadas': total_consolidadas,
+        'recursos_apoio': total_recursos
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Migra data.json para SQLite')
+    parser.add_argument('--json', default=os.getenv('DATABASE_JSON', 'data.json'))
+    parser.add_argument('--log', default=os.getenv('DATABASE_LOG'))
+    parser.add_argument('--destino', default=os.getenv('DATABASE_FILE', 'junta_ai.db'))
+    args = parser.parse_args()
+
+    try:
+        resultado = migrar(args.json, args.log, args.destino)
+    except FileExistsError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Migradas {resultado['respostas']} respostas, {resultado['consolidadas']} consolidadas "
+          f"pela retenção e {resultado['recursos_apoio']} recursos de apoio para {args.destino}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,41 @@ from typing import Dict, List, Optional
 import json
 
 
+# Pontos atribuídos a cada resposta; as demais (ex: 'Nunca') valem zero
+PONTOS_POR_RESPOSTA = {
+    'Sempre': 4,
+    'Constantemente': 4,
+    'Frequentemente': 3,
+    'Várias vezes': 3,
+    'Às vezes': 2,
+    'Poucas vezes': 2,
+    'Raramente': 1,
+    'Uma vez': 1
+}
+
+
+def avaliar_pontuacao(pontos: int) -> Dict:
+    """Converte uma pontuação no nível de risco e na mensagem correspondente"""
+    if pontos >= 30:
+        return {
+            'nivel_risco': 'alto',
+            'mensagem': 'Seus resultados indicam sinais significativos de violência. Considere buscar ajuda imediatamente.',
+            'pontuacao': pontos
+        }
+    elif pontos >= 15:
+        return {
+            'nivel_risco': 'medio',
+            'mensagem': 'Seus resultados indicam alguns sinais preocupantes. Recomendamos conversar com alguém de confiança.',
+            'pontuacao': pontos
+        }
+    else:
+        return {
+            'nivel_risco': 'baixo',
+            'mensagem': 'Seus resultados indicam sinais baixos de violência.',
+            'pontuacao': pontos
+        }
+
+
 class Resposta:
     """Model para respostas do questionário"""
 
@@ -20,40 +55,15 @@ class Resposta:
 
     def calcular_pontuacao(self) -> int:
         """Calcula pontuação baseada nas respostas"""
-        pontos = 0
-        for resposta in self.respostas.values():
-            if resposta in ['Sempre', 'Constantemente']:
-                pontos += 4
-            elif resposta in ['Frequentemente', 'Várias vezes']:
-                pontos += 3
-            elif resposta in ['Às vezes', 'Poucas vezes']:
-                pontos += 2
-            elif resposta in ['Raramente', 'Uma vez']:
-                pontos += 1
-        return pontos
+        return sum(PONTOS_POR_RESPOSTA.get(resposta, 0) for resposta in self.respostas.values())
 
     def avaliar_risco(self) -> Dict:
         """Avalia nível de risco baseado na pontuação"""
-        pontos = self.calcular_pontuacao()
-
-        if pontos >= 30:
-            return {
-                'nivel_risco': 'alto',
-                'mensagem': 'Seus resultados indicam sinais significativos de violência. Considere buscar ajuda imediatamente.',
-                'pontuacao': pontos
-            }
-        elif pontos >= 15:
-            return {
-                'nivel_risco': 'medio',
-                'mensagem': 'Seus resultados indicam alguns sinais preocupantes. Recomendamos conversar com alguém de confiança.',
-                'pontuacao': pontos
-            }
-        else:
-            return {
-                'nivel_risco': 'baixo',
-                'mensagem': 'Seus resultados indicam sinais baixos de violência.',
-                'pontuacao': pontos
-            }
+        return avaliar_pontuacao(self.calcular_pontuacao())
+
+
+# Tipos aceitos em `RecursoApoio.tipo`
+TIPOS_RECURSO_APOIO = ('emergencia', 'policial', 'apoio')
 
 
 class RecursoApoio:
@@ -61,7 +71,8 @@ class RecursoApoio:
 
     def __init__(self, id: int, nome: str, descricao: str, tipo: str,
                  estado: str = 'BR', telefone: str = None, endereco: str = None,
-                 site: str = None, horario: str = None):
+                 site: str = None, horario: str = None, latitude: float = None,
+                 longitude: float = None):
         self.id = id
         self.nome = nome
         self.descricao = descricao
@@ -71,6 +82,8 @@ class RecursoApoio:
         self.endereco = endereco
         self.site = site
         self.horario = horario
+        self.latitude = latitude  # opcionais, usados na busca por proximidade
+        self.longitude = longitude
 
     def to_dict(self) -> Dict:
         return {
@@ -82,7 +95,9 @@ class RecursoApoio:
             'telefone': self.telefone,
             'endereco': self.endereco,
             'site': self.site,
-            'horario': self.horario
+            'horario': self.horario,
+            'latitude': self.latitude,
+            'longitude': self.longitude
         }
 
 
@@ -107,15 +122,19 @@ class Pergunta:
 class Estatistica:
     """Model para estatísticas agregadas"""
 
-    def __init__(self, total_respostas: int, analise: Dict = None):
+    def __init__(self, total_respostas: int, analise: Dict = None, serie: List[Dict] = None):
         self.total_respostas = total_respostas
         self.analise = analise or {}
+        self.serie = serie
 
     def to_dict(self) -> Dict:
-        return {
+        dados = {
             'total_respostas': self.total_respostas,
             'analise': self.analise
         }
+        if self.serie is not None:
+            dados['serie'] = self.serie
+        return dados
 
     def adicionar_analise_pergunta(self, pergunta_id: str, resposta: str):
         """Adiciona uma resposta à análise agregada"""
@@ -127,6 +146,14 @@ class Estatistica:
 
         self.analise[pergunta_id][resposta] += 1
 
+    def mesclar(self, outra: 'Estatistica'):
+        """Soma os contadores de outra estatística (ex: um balde temporal) a esta"""
+        self.total_respostas += outra.total_respostas
+        for pergunta_id, contagens in outra.analise.items():
+            destino = self.analise.setdefault(pergunta_id, {})
+            for resposta, count in contagens.items():
+                destino[resposta] = destino.get(resposta, 0) + count
+
     def calcular_percentual(self, pergunta_id: str, resposta: str) -> float:
         """Calcula percentual de uma resposta específica"""
         if pergunta_id not in self.analise or self.total_respostas == 0:
@@ -0,0 +1,111 @@
+"""
+Definição das perguntas do questionário, compartilhada por rotas e armazenamento
+"""
+
+# Versão das respostas gravadas antes de o questionário ser versionado
+VERSAO_INICIAL = 1
+
+# Perguntas da versão atual do questionário
+PERGUNTAS = [
+    {
+        'id': 1,
+        'texto': 'Seu parceiro(a) te critica constantemente ou diminui suas conquistas?',
+        'tipo': 'multipla',
+        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
+    },
+    {
+        'id': 2,
+        'texto': 'Você sente medo de expressar suas opiniões ou vontades?',
+        'tipo': 'multipla',
+        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
+    },
+    {
+        'id': 3,
+        'texto': 'Seu parceiro(a) controla suas redes sociais, mensagens ou quem você pode ver?',
+        'tipo': 'multipla',
+        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
+    },
+    {
+        'id': 4,
+        'texto': 'Já sofreu agressão física (empurrões, tapas, socos)?',
+        'tipo': 'multipla',
+        'opcoes': ['Nunca', 'Uma vez', 'Poucas vezes', 'Várias vezes', 'Constantemente']
+    },
+    {
+        'id': 5,
+        'texto': 'Seu parceiro(a) controla o dinheiro que você ganha ou impede que trabalhe?',
+        'tipo': 'multipla',
+        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
+    },
+    {
+        'id': 6,
+        'texto': 'Você já foi forçada(o) a ter relações sexuais contra sua vontade?',
+        'tipo': 'multipla',
+        'opcoes': ['Nunca', 'Uma vez', 'Poucas vezes', 'Várias vezes', 'Constantemente']
+    },
+    {
+        'id': 7,
+        'texto': 'Seu parceiro(a) te ameaça ou ameaça pessoas próximas a você?',
+        'tipo': 'multipla',
+        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
+    },
+    {
+        'id': 8,
+        'texto': 'Você se sente isolada(o) de amigos e familiares por causa do relacionamento?',
+        'tipo': 'multipla',
+        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
+    },
+    {
+        'id': 9,
+        'texto': 'Seu parceiro(a) culpa você pelos problemas do relacionamento ou por suas atitudes violentas?',
+        'tipo': 'multipla',
+        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
+    },
+    {
+        'id': 10,
+        'texto': 'Você tem ferimentos físicos que tenta esconder dos outros?',
+        'tipo': 'multipla',
+        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
+    },
+    {
+        'id': 11,
+        'texto': 'Sente que está "pisando em ovos" ao redor de seu parceiro(a)?',
+        'tipo': 'multipla',
+        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
+    },
+    {
+        'id': 12,
+        'texto': 'Já pensou em pedir ajuda mas teve medo das consequências?',
+        'tipo': 'multipla',
+        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
+    }
+]
+
+# IDs das perguntas relacionadas a cada tipo de violência
+CATEGORIAS_VIOLENCIA = {
+    'psicologica': [1, 2, 9, 11],
+    'fisica': [4, 10],
+    'controle': [3, 5, 8],
+    'sexual': [6],
+    'ameaca': [7, 12]
+}
+
+# Respostas que indicam frequência preocupante
+RESPOSTAS_PREOCUPANTES = ('Sempre', 'Constantemente', 'Frequentemente', 'Várias vezes')
+
+# Definições publicadas do questionário, registradas em `questionarios.REGISTRO`.
+#
+# Uma versão publicada nunca é alterada: cada resposta gravada guarda o número
+# da versão que respondeu. Para mudar o questionário, acrescente uma versão
+# (e faça PERGUNTAS e CATEGORIAS_VIOLENCIA apontarem para a nova). Versões com
+# o mesmo `mapeamento` têm as mesmas perguntas e opções (ex: só os textos foram
+# revistos), então suas estatísticas podem ser somadas; mudar perguntas ou
+# opções exige um mapeamento novo.
+QUESTIONARIOS = [
+    {
+        'versao': VERSAO_INICIAL,
+        'mapeamento': 'original',
+        'perguntas': PERGUNTAS,
+        'categorias': CATEGORIAS_VIOLENCIA
+    }
+]
@@ -0,0 +1,109 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from questionarios import REGISTRO, DefinicaoQuestionario
+from models import PONTOS_POR_RESPOSTA, avaliar_pontuacao
+
+# A partir deste tamanho o lote é pontuado com NumPy em vez de um laço Python
+LIMIAR_VETORIZADO = 256
+
+
+def tabela_pontos(perguntas: List[Dict]) -> np.ndarray:
+    """
+    Pontos por pergunta e código de opção, pré-calculados a partir de PONTOS_POR_RESPOSTA
+
+    A última coluna fica zerada para que o código SEM_RESPOSTA (-1) valha zero.
+    """
+    maximo_opcoes = max(len(p['opcoes']) for p in perguntas)
+    tabela = np.zeros((len(perguntas), maximo_opcoes + 1), dtype=np.int16)
+    for i, pergunta in enumerate(perguntas):
+        for codigo, opcao in enumerate(pergunta['opcoes']):
+            tabela[i, codigo] = PONTOS_POR_RESPOSTA.get(opcao, 0)
+    return tabela
+
+
+# Uma tabela por mapeamento do questionário: os códigos de cada armazém colunar
+# seguem as perguntas e opções do seu mapeamento
+TABELAS_PONTOS = {
+    mapeamento: tabela_pontos(perguntas)
+    for mapeamento, perguntas in REGISTRO.mapeamentos().items()
+}
+
+
+def pontuar_codigos(codigos: np.ndarray, tabela: np.ndarray) -> np.ndarray:
+    """Pontuação de cada linha de uma matriz de códigos (respostas × perguntas)"""
+    return tabela[np.arange(tabela.shape[0]), codigos].sum(axis=1, dtype=np.int64)
+
+
+def _avaliar(conjuntos: List[Dict], definicao: DefinicaoQuestionario) -> Tuple[List[Dict], List[List[int]]]:
+    """Resultados por conjunto e os códigos dos conjuntos válidos, na ordem enviada"""
+    esquema = definicao.esquema
+    resultados: List[Optional[Dict]] = [None] * len(conjuntos)
+    validos, codigos_validos = [], []
+    for indice, respostas in enumerate(conjuntos):
+        if isinstance(respostas, dict) and 'versao' in respostas:
+            # A versão vale para o lote inteiro; um conjunto não pode escolher outra
+            codigos, erro = None, 'A versão do questionário é informada para o lote, não por conjunto'
+        else:
+            codigos, erro = esquema.validar(respostas)
+        if erro:
+            resultados[indice] = {'indice': indice, 'valido': False, 'erro': erro}
+        else:
+            validos.append(indice)
+            codigos_validos.append(codigos)
+
+    if len(validos) >= LIMIAR_VETORIZADO:
+        pontuacoes = pontuar_codigos(
+            np.array(codigos_validos, dtype=np.int8), TABELAS_PONTOS[definicao.mapeamento]
+        ).tolist()
+    else:
+        pontuacoes = [esquema.pontuar(codigos) for codigos in codigos_validos]
+
+    for indice, pontos in zip(validos, pontuacoes):
+        resultados[indice] = {'indice': indice, 'valido': True, **avaliar_pontuacao(int(pontos))}
+
+    return resultados, codigos_validos
+
+
+def avaliar_lote(conjuntos: List[Dict], definicao: Optional[DefinicaoQuestionario] = None) -> List[Dict]:
+    """
+    Valida e avalia o risco de vários conjuntos de respostas
+
+    Os resultados dos conjuntos válidos são idênticos a `Resposta.avaliar_risco`.
+
+    Args:
+        conjuntos: Lista de dicts {pergunta_id: resposta}
+        definicao: versão do questionário respondida (padrão: a atual)
+
+    Returns:
+        Um resultado por conjunto, na mesma ordem: {'indice', 'valido', ...avaliação}
+        ou {'indice', 'valido': False, 'erro'}
+    """
+    return _avaliar(conjuntos, definicao or REGISTRO.atual)[0]
+
+
+def avaliar_e_salvar_lote(conjuntos: List[Dict], armazenamento,
+                          definicao: Optional[DefinicaoQuestionario] = None) -> Dict:
+    """
+    Avalia um lote e persiste, numa única escrita, apenas os conjuntos válidos
+
+    Args:
+        conjuntos: Lista de dicts {pergunta_id: resposta}
+        armazenamento: Backend com `salvar_respostas` (ex: `database.db`)
+        definicao: versão do questionário respondida (padrão: a atual)
+
+    Returns:
+        Dicionário com totais, resultados por conjunto e se a gravação ocorreu
+    """
+    definicao = definicao or REGISTRO.atual
+    resultados, codigos_validos = _avaliar(conjuntos, definicao)
+    validos = [definicao.esquema.decodificar(codigos) for codigos in codigos_validos]
+
+    salvo = armazenamento.salvar_respostas(validos, definicao.versao) if validos else True
+
+    return {
+        'total': len(conjuntos),
+        'validos': len(validos),
+        'invalidos': len(conjuntos) - len(validos),
+        'salvo': salvo,
+        'resultados': resultados
+    }
@@ -0,0 +1,111 @@
+from typing import Dict, List, Tuple
+from esquema import EsquemaQuestionario
+from perguntas import QUESTIONARIOS
+
+
+class DefinicaoQuestionario:
+    """Uma versão publicada do questionário, com o esquema de validação já compilado"""
+
+    def __init__(self, versao: int, mapeamento: str, perguntas: List[Dict], categorias: Dict[str, List[int]]):
+        self.versao = versao
+        self.mapeamento = mapeamento
+        self.perguntas = perguntas
+        self.categorias = categorias
+        self.ids = frozenset(p['id'] for p in perguntas)
+        self.esquema = EsquemaQuestionario(perguntas)
+
+    def tem_pergunta(self, pergunta_id: int) -> bool:
+        return pergunta_id in self.ids
+
+    def estrutura(self) -> List[Tuple]:
+        """Perguntas e opções, o que precisa coincidir entre versões do mesmo mapeamento"""
+        return [(p['id'], tuple(p['opcoes'])) for p in self.perguntas]
+
+    def to_dict(self) -> Dict:
+        return {
+            'versao': self.versao,
+            'mapeamento': self.mapeamento,
+            'total_perguntas': len(self.perguntas)
+        }
+
+
+class RegistroQuestionarios:
+    """
+    Versões do questionário, na ordem em que foram publicadas.
+
+    A última registrada é a atual (usada por quem não informa a versão). As
+    estatísticas somam por padrão as versões do mesmo mapeamento da atual, e
+    nunca misturam mapeamentos diferentes.
+    """
+
+    def __init__(self, definicoes: List[Dict]):
+        self._versoes: Dict[int, DefinicaoQuestionario] = {}
+        self._por_mapeamento: Dict[str, List[int]] = {}
+        for definicao in definicoes:
+            self.registrar(definicao)
+
+    def registrar(self, definicao: Dict) -> DefinicaoQuestionario:
+        """
+        Raises:
+            ValueError: versão repetida ou fora de ordem, categoria com pergunta
+                inexistente ou mapeamento reaproveitado com outras perguntas/opções
+        """
+        nova = DefinicaoQuestionario(
+            definicao['versao'], definicao['mapeamento'],
+            definicao['perguntas'], definicao.get('categorias', {})
+        )
+        if self._versoes and nova.versao <= max(self._versoes):
+            raise ValueError(f"Versão do questionário repetida ou fora de ordem: {nova.versao}")
+
+        for categoria, ids in nova.categorias.items():
+            if not nova.ids.issuperset(ids):
+                raise ValueError(f"Categoria {categoria} usa perguntas inexistentes na versão {nova.versao}")
+
+        versoes_mapeamento = self._por_mapeamento.setdefault(nova.mapeamento, [])
+        if versoes_mapeamento and self._versoes[versoes_mapeamento[0]].estrutura() != nova.estrutura():
+            raise ValueError(
+                f"A versão {nova.versao} muda perguntas ou opções do mapeamento "
+                f"{nova.mapeamento}; use um mapeamento novo"
+            )
+
+        versoes_mapeamento.append(nova.versao)
+        self._versoes[nova.versao] = nova
+        return nova
+
+    @property
+    def atual(self) -> DefinicaoQuestionario:
+        return self._versoes[max(self._versoes)]
+
+    def obter(self, versao: int) -> DefinicaoQuestionario:
+        """
+        Raises:
+            ValueError: se a versão não existir
+        """
+        try:
+            return self._versoes[versao]
+        except KeyError:
+            raise ValueError(f"Versão do questionário inexistente: {versao}")
+
+    def compativeis(self, versao: int) -> Tuple[int, ...]:
+        """Versões com o mesmo mapeamento de `versao` (incluindo ela)"""
+        return tuple(self._por_mapeamento[self.obter(versao).mapeamento])
+
+    def mapeamentos(self) -> Dict[str, List[Dict]]:
+        """Perguntas de cada mapeamento (as da primeira versão dele)"""
+        return {
+            mapeamento: self._versoes[versoes[0]].perguntas
+            for mapeamento, versoes in self._por_mapeamento.items()
+        }
+
+    def listar(self) -> List[Dict]:
+        atual = self.atual.versao
+        return [
+            {**definicao.to_dict(), 'atual': versao == atual}
+            for versao, definicao in sorted(self._versoes.items())
+        ]
+
+
+REGISTRO = RegistroQuestionarios(QUESTIONARIOS)
+
+# Esquema da versão atual: o que novos envios respondem
+ESQUEMA = REGISTRO.atual.esquema
@@ -1,9 +1,104 @@
+import hmac
+import os
 from flask import Blueprint, request, jsonify
 from database import db
+from geo import coordenadas_validas
+from importacao import FORMATOS_IMPORTACAO, ImportacaoRecursos
 from models import RecursoApoio
+from .cache import resposta_estatica
 
 apoio_bp = Blueprint('apoio', __name__)
 
+# Paginação da busca de recursos
+POR_PAGINA_PADRAO = 20
+POR_PAGINA_MAXIMO = 100
+
+# Busca por proximidade: raio em km e quantidade de recursos retornados
+RAIO_PADRAO_KM = 50
+RAIO_MAXIMO_KM = 500
+LIMITE_PROXIMOS_PADRAO = 10
+LIMITE_PROXIMOS_MAXIMO = 50
+
+# Tipos de recurso exibidos no filtro da rede de apoio
+TIPOS_RECURSO = [
+    {
+        'tipo': 'emergencia',
+        'nome': 'Emergência',
+        'descricao': 'Linhas telefônicas de atendimento imediato 24h',
+        'icon': '🚨'
+    },
+    {
+        'tipo': 'policial',
+        'nome': 'Policial',
+        'descricao': 'Delegacias e serviços policiais especializados',
+        'icon': '👮'
+    },
+    {
+        'tipo': 'apoio',
+        'nome': 'Apoio',
+        'descricao': 'Centros de apoio psicológico, social e jurídico',
+        'icon': '🤝'
+    }
+]
+
+# Dicas de segurança para pessoas em situação de violência
+DICAS_SEGURANCA = {
+    'dicas_gerais': [
+        'Mantenha documentos importantes em lugar seguro (RG, CPF, certidões)',
+        'Tenha um plano de saída caso precise sair rapidamente de casa',
+        'Confie em amigos ou familiares de confiança sobre sua situação',
+        'Registre evidências (fotos de lesões, mensagens ameaçadoras)',
+        'Saiba que você pode solicitar medidas protetivas na delegacia',
+        'Não se culpe - a violência nunca é culpa da vítima'
+    ],
+    'em_caso_emergencia': [
+        'Se estiver em perigo imediato, ligue 190 (Polícia Militar)',
+        'Ligue 180 para orientações e denúncias (Central da Mulher)',
+        'Procure um lugar seguro com pessoas que possam te ajudar',
+        'Se possível, grave ou fotografe evidências da violência',
+        'Não hesite em pedir ajuda - sua segurança é prioridade'
+    ],
+    'planejamento_saida': [
+        'Tenha sempre um telefone carregado',
+        'Guarde uma quantia de dinheiro em local seguro',
+        'Prepare uma mala com itens essenciais (se possível)',
+        'Identifique rotas de saída seguras da residência',
+        'Combine sinais de alerta com vizinhos ou amigos de confiança',
+        'Conheça os endereços de casas de acolhimento próximas'
+    ],
+    'direitos': [
+        'Você tem direito a medidas protetivas de urgência',
+        'Atendimento pela Polícia e Delegacia da Mulher é seu direito',
+        'Acompanhamento psicológico e social gratuito está disponível',
+        'Acesso à Defensoria Pública gratuita é garantido',
+        'Você pode solicitar abrigo em casas de proteção'
+    ]
+}
+
+# Informações sobre a Lei Maria da Penha
+INFO_LEI_MARIA_PENHA = {
+    'titulo': 'Lei Maria da Penha',
+    'numero': 'Lei 11.340/2006',
+    'descricao': 'Lei brasileira que cria mecanismos para coibir a violência doméstica e familiar contra a mulher',
+    'principais_pontos': [
+        'Define os tipos de violência: física, psicológica, sexual, patrimonial e moral',
+        'Cria mecanismos de proteção à mulher vítima de violência',
+        'Estabelece medidas protetivas de urgência',
+        'Proíbe a aplicação de penas pecuniárias (cestas básicas) aos agressores',
+        'Permite a prisão preventiva do agressor',
+        'Garante atendimento especializado e humanizado'
+    ],
+    'medidas_protetivas': [
+        'Afastamento do agressor do lar',
+        'Proibição de aproximação da vítima e familiares',
+        'Proibição de contato por qualquer meio',
+        'Restrição ou suspensão de visitas aos dependentes',
+        'Prestação de alimentos provisionais'
+    ],
+    'como_solicitar': 'As medidas protetivas podem ser solicitadas na Delegacia da Mulher, Delegacia comum, Defensoria Pública ou diretamente no Juizado.',
+    'link_oficial': 'http://www.planalto.gov.br/ccivil_03/_ato2004-2006/2006/lei/l11340.htm'
+}
+
 
 @apoio_bp.route('/recursos-apoio', methods=['GET'])
 def obter_recursos():
@@ -21,11 +116,7 @@ def obter_recursos():
         estado = request.args.get('estado')
         tipo = request.args.get('tipo')
 
-        recursos = db.obter_recursos_apoio(estado)
-
-        # Filtrar por tipo se especificado
-        if tipo:
-            recursos = [r for r in recursos if r.get('tipo') == tipo]
+        recursos = db.obter_recursos_apoio(estado, tipo)
 
         return jsonify(recursos), 200
 
@@ -45,9 +136,7 @@ def obter_recurso_especifico(recurso_id):
         JSON com dados do recurso
     """
     try:
-        recursos = db.obter_recursos_apoio()
-
-        recurso = next((r for r in recursos if r.get('id') == recurso_id), None)
+        recurso = db.obter_recurso_apoio(recurso_id)
 
         if not recurso:
             return jsonify({'erro': 'Recurso não encontrado'}), 404
@@ -67,8 +156,7 @@ def obter_recursos_emergencia():
         JSON com recursos de emergência
     """
     try:
-        recursos = db.obter_recursos_apoio()
-        recursos_emergencia = [r for r in recursos if r.get('tipo') == 'emergencia']
+        recursos_emergencia = db.obter_recursos_apoio(tipo='emergencia')
 
         return jsonify({
             'recursos': recursos_emergencia,
@@ -95,13 +183,8 @@ def obter_recursos_por_estado(estado):
         # Normalizar código do estado
         estado_upper = estado.upper()
 
-        recursos = db.obter_recursos_apoio(estado_upper)
-
-        # Sempre incluir recursos nacionais (BR)
-        recursos_nacionais = db.obter_recursos_apoio('BR')
-
-        # Combinar recursos do estado com recursos nacionais
-        todos_recursos = recursos + [r for r in recursos_nacionais if r not in recursos]
+        # Recursos do estado já combinados com os nacionais (BR), sem duplicatas
+        todos_recursos = db.obter_recursos_apoio(estado_upper)
 
         return jsonify({
             'estado': estado_upper,
@@ -113,7 +196,102 @@ def obter_recursos_por_estado(estado):
         return jsonify({'erro': f'Erro ao obter recursos do estado: {str(e)}'}), 500
 
 
+@apoio_bp.route('/recursos-apoio/proximos', methods=['GET'])
+def obter_recursos_proximos():
+    """
+    Retorna os recursos mais próximos de um ponto, do mais perto ao mais longe
+
+    Query params:
+        - lat, lon: Coordenadas do ponto (graus decimais)
+        - raio: Distância máxima em km (padrão: 50, máximo: 500)
+        - tipo: Tipo de recurso ('emergencia', 'policial', 'apoio')
+        - limite: Quantidade máxima de recursos (padrão: 10, máximo: 50)
+
+    Returns:
+        JSON com recursos georreferenciados e a distância de cada um em km
+    """
+    try:
+        try:
+            latitude = float(request.args['lat'])
+            longitude = float(request.args['lon'])
+            raio = float(request.args.get('raio', RAIO_PADRAO_KM))
+            limite = int(request.args.get('limite', LIMITE_PROXIMOS_PADRAO))
+        except (KeyError, ValueError):
+            return jsonify({
+                'erro': 'Informe lat e lon numéricos (raio e limite são opcionais)'
+            }), 400
+
+        if not coordenadas_validas(latitude, longitude):
+            return jsonify({'erro': 'Coordenadas fora do intervalo válido'}), 400
+
+        if not 0 < raio <= RAIO_MAXIMO_KM or not 1 <= limite <= LIMITE_PROXIMOS_MAXIMO:
+            return jsonify({
+                'erro': f'raio deve estar entre 0 e {RAIO_MAXIMO_KM} km e limite entre 1 e {LIMITE_PROXIMOS_MAXIMO}'
+            }), 400
+
+        recursos = db.obter_recursos_proximos(
+            latitude, longitude, raio, tipo=request.args.get('tipo'), limite=limite
+        )
+
+        return jsonify({
+            'lat': latitude,
+            'lon': longitude,
+            'raio_km': raio,
+            'recursos': recursos,
+            'total': len(recursos)
+        }), 200
+
+    except Exception as e:
+        return jsonify({'erro': f'Erro ao obter recursos próximos: {str(e)}'}), 500
+
+
+def _importacao_autorizada() -> bool:
+    token = os.getenv('IMPORTACAO_TOKEN')
+    if not token:
+        return False
+    enviado = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    return hmac.compare_digest(enviado.encode(), token.encode())
+
+
+@apoio_bp.route('/recursos-apoio/importar', methods=['POST'])
+def importar_recursos():
+    """
+    Importa recursos de apoio em massa a partir de CSV ou NDJSON
+
+    Requer o header `Authorization: Bearer <IMPORTACAO_TOKEN>`; sem a variável
+    de ambiente configurada a importação fica desabilitada.
+
+    Query params:
+        - formato: 'csv' ou 'ndjson' (padrão: deduzido do Content-Type)
+
+    Body:
+        O arquivo, como corpo da requisição ou no campo 'arquivo' de um multipart
+
+    Returns:
+        JSON com o relatório da importação (inseridos, atualizados, rejeitados, linhas/s)
+    """
+    try:
+        if not _importacao_autorizada():
+            return jsonify({'erro': 'Importação não autorizada'}), 403
+
+        formato = request.args.get('formato')
+        if not formato:
+            formato = 'ndjson' if 'ndjson' in (request.mimetype or '') else 'csv'
+        if formato not in FORMATOS_IMPORTACAO:
+            return jsonify({'erro': f"Formato inválido. Use: {', '.join(FORMATOS_IMPORTACAO)}"}), 400
+
+        # O corpo é lido em fluxo, sem carregar o arquivo inteiro na memória
+        arquivo = request.files['arquivo'].stream if 'arquivo' in request.files else request.stream
+        relatorio = ImportacaoRecursos(arquivo, formato).executar(db)
+
+        return jsonify(relatorio), 200
+
+    except Exception as e:
+        return jsonify({'erro': f'Erro ao importar recursos: {str(e)}'}), 500
+
+
 @apoio_bp.route('/recursos-apoio/tipos', methods=['GET'])
+@resposta_estatica(TIPOS_RECURSO)
 def listar_tipos():
     """
     Lista todos os tipos de recursos disponíveis
@@ -121,68 +299,58 @@ def listar_tipos():
     Returns:
         JSON com tipos de recursos
     """
-    try:
-        tipos = [
-            {
-                'tipo': 'emergencia',
-                'nome': 'Emergência',
-                'descricao': 'Linhas telefônicas de atendimento imediato 24h',
-                'icon': '🚨'
-            },
-            {
-                'tipo': 'policial',
-                'nome': 'Policial',
-                'descricao': 'Delegacias e serviços policiais especializados',
-                'icon': '👮'
-            },
-            {
-                'tipo': 'apoio',
-                'nome': 'Apoio',
-                'descricao': 'Centros de apoio psicológico, social e jurídico',
-                'icon': '🤝'
-            }
-        ]
-
-        return jsonify(tipos), 200
-
-    except Exception as e:
-        return jsonify({'erro': f'Erro ao listar tipos: {str(e)}'}), 500
+    return jsonify(TIPOS_RECURSO), 200
 
 
 @apoio_bp.route('/recursos-apoio/buscar', methods=['GET'])
 def buscar_recursos():
     """
-    Busca recursos por palavra-chave
+    Busca recursos por palavra-chave, ignorando acentos e tolerando erros de digitação
 
     Query params:
-        - q: Termo de busca
+        - q: Termo de busca (prefixos também casam: 'viol' encontra 'violência')
+        - estado: Restringe a busca ao estado informado e aos recursos nacionais
+        - tipo: Tipo de recurso ('emergencia', 'policial', 'apoio')
+        - pagina: Página de resultados, a partir de 1 (padrão: 1)
+        - por_pagina: Resultados por página (padrão: 20, máximo: 100)
 
     Returns:
-        JSON com recursos que correspondem à busca
+        JSON com os recursos da página, do mais ao menos relevante
     """
     try:
-        termo = request.args.get('q', '').lower()
+        termo = request.args.get('q', '').strip()
 
         if not termo or len(termo) < 2:
             return jsonify({
                 'erro': 'Termo de busca muito curto (mínimo 2 caracteres)'
             }), 400
 
-        recursos = db.obter_recursos_apoio()
+        try:
+            pagina = int(request.args.get('pagina', 1))
+            por_pagina = int(request.args.get('por_pagina', POR_PAGINA_PADRAO))
+        except ValueError:
+            return jsonify({'erro': 'pagina e por_pagina devem ser números inteiros'}), 400
 
-        # Buscar em nome e descrição
-        resultados = []
-        for recurso in recursos:
-            nome = recurso.get('nome', '').lower()
-            descricao = recurso.get('descricao', '').lower()
+        if pagina < 1 or not 1 <= por_pagina <= POR_PAGINA_MAXIMO:
+            return jsonify({
+                'erro': f'pagina deve ser >= 1 e por_pagina entre 1 e {POR_PAGINA_MAXIMO}'
+            }), 400
 
-            if termo in nome or termo in descricao:
-                resultados.append(recurso)
+        estado = request.args.get('estado')
+        busca = db.buscar_recursos_apoio(
+            termo,
+            estado=estado.upper() if estado else None,
+            tipo=request.args.get('tipo'),
+            limite=por_pagina,
+            deslocamento=(pagina - 1) * por_pagina
+        )
 
         return jsonify({
             'termo': termo,
-            'resultados': resultados,
-            'total': len(resultados)
+            'resultados': busca['resultados'],
+            'total': busca['total'],
+            'pagina': pagina,
+            'por_pagina': por_pagina
         }), 200
 
     except Exception as e:
@@ -190,6 +358,7 @@ def buscar_recursos():
 
 
 @apoio_bp.route('/recursos-apoio/dicas-seguranca', methods=['GET'])
+@resposta_estatica(DICAS_SEGURANCA)
 def obter_dicas_seguranca():
     """
     Retorna dicas de segurança para pessoas em situação de violência
@@ -197,47 +366,11 @@ def obter_dicas_seguranca():
     Returns:
         JSON com dicas de segurança
     """
-    try:
-        dicas = {
-            'dicas_gerais': [
-                'Mantenha documentos importantes em lugar seguro (RG, CPF, certidões)',
-                'Tenha um plano de saída caso precise sair rapidamente de casa',
-                'Confie em amigos ou familiares de confiança sobre sua situação',
-                'Registre evidências (fotos de lesões, mensagens ameaçadoras)',
-                'Saiba que você pode solicitar medidas protetivas na delegacia',
-                'Não se culpe - a violência nunca é culpa da vítima'
-            ],
-            'em_caso_emergencia': [
-                'Se estiver em perigo imediato, ligue 190 (Polícia Militar)',
-                'Ligue 180 para orientações e denúncias (Central da Mulher)',
-                'Procure um lugar seguro com pessoas que possam te ajudar',
-                'Se possível, grave ou fotografe evidências da violência',
-                'Não hesite em pedir ajuda - sua segurança é prioridade'
-            ],
-            'planejamento_saida': [
-                'Tenha sempre um telefone carregado',
-                'Guarde uma quantia de dinheiro em local seguro',
-                'Prepare uma mala com itens essenciais (se possível)',
-                'Identifique rotas de saída seguras da residência',
-                'Combine sinais de alerta com vizinhos ou amigos de confiança',
-                'Conheça os endereços de casas de acolhimento próximas'
-            ],
-            'direitos': [
-                'Você tem direito a medidas protetivas de urgência',
-                'Atendimento pela Polícia e Delegacia da Mulher é seu direito',
-                'Acompanhamento psicológico e social gratuito está disponível',
-                'Acesso à Defensoria Pública gratuita é garantido',
-                'Você pode solicitar abrigo em casas de proteção'
-            ]
-        }
-
-        return jsonify(dicas), 200
-
-    except Exception as e:
-        return jsonify({'erro': f'Erro ao obter dicas: {str(e)}'}), 500
+    return jsonify(DICAS_SEGURANCA), 200
 
 
 @apoio_bp.route('/recursos-apoio/lei-maria-penha', methods=['GET'])
+@resposta_estatica(INFO_LEI_MARIA_PENHA)
 def obter_info_lei():
     """
     Retorna informações sobre a Lei Maria da Penha
@@ -245,31 +378,4 @@ def obter_info_lei():
     Returns:
         JSON com informações sobre a lei
     """
-    try:
-        info = {
-            'titulo': 'Lei Maria da Penha',
-            'numero': 'Lei 11.340/2006',
-            'descricao': 'Lei brasileira que cria mecanismos para coibir a violência doméstica e familiar contra a mulher',
-            'principais_pontos': [
-                'Define os tipos de violência: física, psicológica, sexual, patrimonial e moral',
-                'Cria mecanismos de proteção à mulher vítima de violência',
-                'Estabelece medidas protetivas de urgência',
-                'Proíbe a aplicação de penas pecuniárias (cestas básicas) aos agressores',
-                'Permite a prisão preventiva do agressor',
-                'Garante atendimento especializado e humanizado'
-            ],
-            'medidas_protetivas': [
-                'Afastamento do agressor do lar',
-                'Proibição de aproximação da vítima e familiares',
-                'Proibição de contato por qualquer meio',
-                'Restrição ou suspensão de visitas aos dependentes',
-                'Prestação de alimentos provisionais'
-            ],
-            'como_solicitar': 'As medidas protetivas podem ser solicitadas na Delegacia da Mulher, Delegacia comum, Defensoria Pública ou diretamente no Juizado.',
-            'link_oficial': 'http://www.planalto.gov.br/ccivil_03/_ato2004-2006/2006/lei/l11340.htm'
-        }
-
-        return jsonify(info), 200
-
-    except Exception as e:
-        return jsonify({'erro': f'Erro ao obter informações da lei: {str(e)}'}), 500
+    return jsonify(INFO_LEI_MARIA_PENHA), 200
@@ -0,0 +1,203 @@
+"""
+Cache de respostas HTTP para as rotas GET
+
+- Conteúdo estático (perguntas, tipos, dicas, lei) é serializado em JSON e
+  comprimido (gzip/brotli) uma única vez, na importação das rotas.
+- Estatísticas têm o corpo serializado guardado por versão dos dados: enquanto
+  nenhuma resposta nova chega, os mesmos bytes são servidos sem executar a rota.
+
+Ambos usam ETags fortes, Last-Modified, Cache-Control e respondem 304 a
+requisições condicionais.
+"""
+
+import gzip
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache, wraps
+from threading import Lock
+from flask import Response, request
+from werkzeug.http import http_date, parse_date
+from database import db
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele, apenas gzip
+    brotli = None
+
+# Conteúdo fixo entre deploys: navegadores e CDNs podem guardar por um dia
+POLITICA_ESTATICA = 'public, max-age=86400'
+# Estatísticas: cache curto e revalidação por ETag (resposta 304 quando nada mudou)
+POLITICA_ESTATISTICAS = 'public, max-age=15, must-revalidate'
+
+# Corpos menores que isto não compensam a compressão
+TAMANHO_MINIMO_COMPRESSAO = 256
+# Máximo de variações (rota + query string) de estatísticas guardadas por processo
+MAXIMO_ENTRADAS_VERSIONADAS = 256
+
+# Momento em que o processo subiu: Last-Modified do conteúdo estático
+_INICIO_PROCESSO = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+@lru_cache(maxsize=256)
+def _codificacoes_aceitas(accept_encoding: str) -> frozenset:
+    """Codificações aceitas num cabeçalho Accept-Encoding (ignora as com q=0)"""
+    aceitas = set()
+    for item in accept_encoding.split(','):
+        nome, _, parametros = item.strip().partition(';')
+        if parametros.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        aceitas.add(nome.strip().lower())
+    return frozenset(aceitas)
+
+
+class CorpoSerializado:
+    """
+    Corpo JSON já codificado, com as variantes comprimidas e os cabeçalhos de cada uma
+
+    Tudo que não depende da requisição (bytes, ETag, Last-Modified,
+    Cache-Control) é montado na construção; responder só escolhe a variante.
+    """
+
+    __slots__ = ('etag', 'ultima_modificacao', '_variantes')
+
+    def __init__(self, dados: bytes, politica: str, etag: str = None,
+                 ultima_modificacao: datetime = None, compressao_maxima: bool = False):
+        self.etag = etag or hashlib.sha1(dados).hexdigest()[:20]
+        self.ultima_modificacao = ultima_modificacao or _INICIO_PROCESSO
+
+        # Compressão máxima só para o que é comprimido uma vez por processo;
+        # estatísticas são recomprimidas a cada nova versão dos dados
+        variantes = {'identity': dados}
+        if len(dados) >= TAMANHO_MINIMO_COMPRESSAO:
+            if brotli:
+                variantes['br'] = brotli.compress(dados, quality=11 if compressao_maxima else 5)
+            variantes['gzip'] = gzip.compress(dados, compresslevel=9 if compressao_maxima else 6)
+
+        data_http = http_date(self.ultima_modificacao)
+        self._variantes = {}
+        for codificacao, corpo in variantes.items():
+            sufixo = '' if codificacao == 'identity' else f'-{codificacao}'
+            cabecalhos = [
+                ('Content-Type', 'application/json'),
+                ('ETag', f'"{self.etag}{sufixo}"'),
+                ('Last-Modified', data_http),
+                ('Cache-Control', politica)
+            ]
+            if len(variantes) > 1:
+                cabecalhos.append(('Vary', 'Accept-Encoding'))
+            if codificacao != 'identity':
+                cabecalhos.append(('Content-Encoding', codificacao))
+            self._variantes[codificacao] = (corpo, cabecalhos)
+
+    @classmethod
+    def de_payload(cls, payload, politica: str) -> 'CorpoSerializado':
+        # Mesmo formato produzido por jsonify em produção
+        dados = json.dumps(payload, ensure_ascii=True, sort_keys=True, separators=(',', ':'))
+        return cls(dados.encode('utf-8'), politica, compressao_maxima=True)
+
+    def _nao_modificado(self, etag: str) -> bool:
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            # Comparação fraca (RFC 9110): W/"x" também casa com "x"
+            return if_none_match.strip() == '*' or etag in if_none_match
+
+        if_modified_since = request.headers.get('If-Modified-Since')
+        if if_modified_since is not None:
+            data = parse_date(if_modified_since)
+            return data is not None and data >= self.ultima_modificacao
+        return False
+
+    def responder(self) -> Response:
+        aceitas = _codificacoes_aceitas(request.headers.get('Accept-Encoding', ''))
+        for codificacao in ('br', 'gzip', 'identity'):
+            if codificacao in self._variantes and (codificacao == 'identity' or codificacao in aceitas):
+                corpo, cabecalhos = self._variantes[codificacao]
+                break
+
+        etag = cabecalhos[1][1]
+        if self._nao_modificado(etag):
+            return Response(status=304, headers=[c for c in cabecalhos if c[0] != 'Content-Type'])
+        return Response(corpo, status=200, headers=cabecalhos)
+
+
+def resposta_estatica(payload, politica: str = POLITICA_ESTATICA):
+    """
+    Serve `payload` pré-serializado; a rota decorada não é executada
+
+    Args:
+        payload: Conteúdo fixo da rota (serializado uma vez, na decoração)
+        politica: Valor do cabeçalho Cache-Control
+    """
+    corpo = CorpoSerializado.de_payload(payload, politica)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            return corpo.responder()
+        return wrapper
+    return decorator
+
+
+# Corpos das estatísticas por chave de requisição: {chave: CorpoSerializado}
+_corpos_versionados = OrderedDict()
+_corpos_lock = Lock()
+
+
+def _etag_versionada(chave: str, versao: int) -> str:
+    partes = [chave, str(versao)]
+
+    # Períodos relativos (ex: última semana) mudam com o tempo mesmo sem novas respostas;
+    # os baldes têm precisão de uma hora, então a hora atual entra na ETag
+    if request.args.get('periodo', 'total') != 'total':
+        partes.append(datetime.now().strftime('%Y%m%d%H'))
+
+    return hashlib.sha1('|'.join(partes).encode('utf-8')).hexdigest()[:20]
+
+
+def cache_versionado(politica: str):
+    """
+    Guarda o corpo serializado da rota enquanto a versão dos dados não mudar
+
+    A ETag deriva da rota, da query string e do contador de versão do banco, então
+    é calculada sem executar a rota. Respostas diferentes de 200 não são guardadas.
+
+    Args:
+        politica: Valor do cabeçalho Cache-Control
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            chave = f"{request.path}?{request.query_string.decode('latin-1')}"
+            etag = _etag_versionada(chave, db.obter_versao())
+
+            with _corpos_lock:
+                corpo = _corpos_versionados.get(chave)
+                if corpo is not None:
+                    _corpos_versionados.move_to_end(chave)
+
+            if corpo is not None and corpo.etag == etag:
+                return corpo.responder()
+
+            resposta = view(*args, **kwargs)
+            resposta, status = resposta if isinstance(resposta, tuple) else (resposta, 200)
+            if status != 200:
+                return resposta, status
+
+            corpo = CorpoSerializado(
+                resposta.get_data(),
+                politica,
+                etag=etag,
+                ultima_modificacao=datetime.now(timezone.utc).replace(microsecond=0)
+            )
+            with _corpos_lock:
+                _corpos_versionados[chave] = corpo
+                _corpos_versionados.move_to_end(chave)
+                while len(_corpos_versionados) > MAXIMO_ENTRADAS_VERSIONADAS:
+                    _corpos_versionados.popitem(last=False)
+
+            return corpo.responder()
+
+        return wrapper
+    return decorator
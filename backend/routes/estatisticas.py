@@ -1,26 +1,109 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from database import db
 from models import Estatistica
+from agregados import GRANULARIDADES
+from analitica import Analise
+from exportacao import EXTENSOES, FORMATOS_EXPORTACAO, TIPOS_CONTEUDO, exportar
+from perguntas import RESPOSTAS_PREOCUPANTES
+from questionarios import REGISTRO
 from datetime import datetime, timedelta
+from .cache import cache_versionado, POLITICA_ESTATISTICAS
 
 estatisticas_bp = Blueprint('estatisticas', __name__)
 
+# Janela de cada período, contada a partir do momento da requisição
+PERIODOS = {
+    'semana': timedelta(days=7),
+    'mes': timedelta(days=30),
+    'ano': timedelta(days=365),
+    'total': None
+}
+
+
+def _data_da_requisicao(valor: str) -> datetime:
+    """
+    Converte uma data ISO 8601 para o horário local sem fuso, como são gravadas as respostas
+
+    Datas com fuso (ex: `2024-01-01T00:00:00Z`) são convertidas para o fuso local.
+    """
+    data = datetime.fromisoformat(valor)
+    if data.tzinfo is not None:
+        data = data.astimezone().replace(tzinfo=None)
+    return data
+
+
+def _intervalo_da_requisicao():
+    """
+    Lê `periodo` ou `inicio`/`fim` (ISO 8601) da query string
+
+    Returns:
+        Tupla (inicio, fim), com None para limites abertos
+
+    Raises:
+        ValueError: período ou data inválidos
+    """
+    inicio = request.args.get('inicio')
+    fim = request.args.get('fim')
+
+    if inicio or fim:
+        return (
+            _data_da_requisicao(inicio) if inicio else None,
+            _data_da_requisicao(fim) if fim else None
+        )
+
+    periodo = request.args.get('periodo', 'total')
+    if periodo not in PERIODOS:
+        raise ValueError(f"Período inválido: {periodo}")
+
+    janela = PERIODOS[periodo]
+    return (datetime.now() - janela if janela else None, None)
+
+
+def _questionario_da_requisicao():
+    """
+    Lê `versao` da query string
+
+    Returns:
+        Tupla (definição, versões consultadas): sem `versao`, a definição atual e
+        todas as versões com o mesmo mapeamento dela (None, o padrão do banco)
+
+    Raises:
+        ValueError: versão inválida ou inexistente
+    """
+    versao = request.args.get('versao')
+    if versao is None:
+        return REGISTRO.atual, None
+
+    try:
+        definicao = REGISTRO.obter(int(versao))
+    except ValueError:
+        raise ValueError(f"Versão do questionário inexistente: {versao}")
+    return definicao, (definicao.versao,)
+
 
 @estatisticas_bp.route('/estatisticas', methods=['GET'])
+@cache_versionado(POLITICA_ESTATISTICAS)
 def obter_estatisticas():
     """
     Retorna estatísticas agregadas e anônimas das respostas
 
     Query params opcionais:
         - periodo: 'semana', 'mes', 'ano', 'total' (default: 'total')
+        - inicio, fim: datas ISO 8601 (têm precedência sobre periodo)
+        - versao: só as respostas dessa versão do questionário (default: todas
+          as versões compatíveis com a atual)
 
     Returns:
         JSON com estatísticas agregadas
     """
     try:
-        periodo = request.args.get('periodo', 'total')
+        try:
+            inicio, fim = _intervalo_da_requisicao()
+            definicao, versoes = _questionario_da_requisicao()
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
 
-        stats = db.obter_estatisticas()
+        stats = db.obter_estatisticas(inicio, fim, versoes)
 
         # Adicionar métricas adicionais
         total = stats.get('total_respostas', 0)
@@ -29,17 +112,9 @@ def obter_estatisticas():
             analise = stats.get('analise', {})
 
             # Calcular estatísticas por tipo de violência
-            categorias_violencia = {
-                'psicologica': [1, 2, 9, 11],  # IDs das perguntas relacionadas
-                'fisica': [4, 10],
-                'controle': [3, 5, 8],
-                'sexual': [6],
-                'ameaca': [7, 12]
-            }
-
             stats['analise_categorias'] = {}
 
-            for categoria, perguntas_ids in categorias_violencia.items():
+            for categoria, perguntas_ids in definicao.categorias.items():
                 # Contar respostas preocupantes (Frequentemente, Sempre, etc)
                 count_preocupante = 0
 
@@ -47,10 +122,8 @@ def obter_estatisticas():
                     pergunta_key = str(pid)
                     if pergunta_key in analise:
                         respostas_perguntas = analise[pergunta_key]
-                        count_preocupante += respostas_perguntas.get('Sempre', 0)
-                        count_preocupante += respostas_perguntas.get('Constantemente', 0)
-                        count_preocupante += respostas_perguntas.get('Frequentemente', 0)
-                        count_preocupante += respostas_perguntas.get('Várias vezes', 0)
+                        for resposta in RESPOSTAS_PREOCUPANTES:
+                            count_preocupante += respostas_perguntas.get(resposta, 0)
 
                 percentual = (count_preocupante / (total * len(perguntas_ids))) * 100 if total > 0 else 0
 
@@ -65,7 +138,134 @@ def obter_estatisticas():
         return jsonify({'erro': f'Erro ao obter estatísticas: {str(e)}'}), 500
 
 
+@estatisticas_bp.route('/estatisticas/serie', methods=['GET'])
+@cache_versionado(POLITICA_ESTATISTICAS)
+def obter_serie():
+    """
+    Retorna a série temporal do total de respostas
+
+    Query params opcionais:
+        - granularidade: 'hora' ou 'dia' (default: 'dia')
+        - periodo, inicio, fim, versao: mesmo significado de /estatisticas
+
+    Returns:
+        JSON com a série em ordem cronológica
+    """
+    try:
+        granularidade = request.args.get('granularidade', 'dia')
+        if granularidade not in GRANULARIDADES:
+            return jsonify({'erro': f'Granularidade inválida: {granularidade}'}), 400
+
+        try:
+            inicio, fim = _intervalo_da_requisicao()
+            _, versoes = _questionario_da_requisicao()
+            serie = db.obter_serie(granularidade, inicio, fim, versoes)
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+
+        return jsonify({
+            'granularidade': granularidade,
+            'total_respostas': sum(ponto['total_respostas'] for ponto in serie),
+            'serie': serie
+        }), 200
+
+    except Exception as e:
+        return jsonify({'erro': f'Erro ao obter série: {str(e)}'}), 500
+
+
+@estatisticas_bp.route('/estatisticas/cruzamento', methods=['GET'])
+@cache_versionado(POLITICA_ESTATISTICAS)
+def obter_cruzamento():
+    """
+    Retorna a tabela de contingência entre duas perguntas
+
+    Query params:
+        - pergunta_a, pergunta_b: IDs das perguntas
+        - periodo, inicio, fim: mesmo significado de /estatisticas
+
+    Returns:
+        JSON com a tabela (linhas: opções de pergunta_a, colunas: opções de pergunta_b)
+    """
+    try:
+        pergunta_a = request.args.get('pergunta_a', type=int)
+        pergunta_b = request.args.get('pergunta_b', type=int)
+
+        if pergunta_a is None or pergunta_b is None:
+            return jsonify({'erro': 'Informe pergunta_a e pergunta_b'}), 400
+
+        try:
+            inicio, fim = _intervalo_da_requisicao()
+            tabela = Analise(db.obter_colunas(), inicio, fim).tabela_cruzada(pergunta_a, pergunta_b)
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+
+        return jsonify({
+            'pergunta_a': pergunta_a,
+            'pergunta_b': pergunta_b,
+            **tabela
+        }), 200
+
+    except Exception as e:
+        return jsonify({'erro': f'Erro ao obter cruzamento: {str(e)}'}), 500
+
+
+@estatisticas_bp.route('/estatisticas/pontuacao', methods=['GET'])
+@cache_versionado(POLITICA_ESTATISTICAS)
+def obter_distribuicao_pontuacao():
+    """
+    Retorna a distribuição da pontuação de risco das respostas
+
+    Query params opcionais:
+        - periodo, inicio, fim: mesmo significado de /estatisticas
+
+    Returns:
+        JSON com histograma, contagem por nível de risco, média e mediana
+    """
+    try:
+        try:
+            inicio, fim = _intervalo_da_requisicao()
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+
+        return jsonify(Analise(db.obter_colunas(), inicio, fim).histograma_pontuacao()), 200
+
+    except Exception as e:
+        return jsonify({'erro': f'Erro ao obter pontuação: {str(e)}'}), 500
+
+
+@estatisticas_bp.route('/estatisticas/categorias', methods=['GET'])
+@cache_versionado(POLITICA_ESTATISTICAS)
+def obter_categorias():
+    """
+    Retorna, por tipo de violência, quantos respondentes têm sinais preocupantes
+    e a coocorrência entre categorias
+
+    Query params opcionais:
+        - periodo, inicio, fim: mesmo significado de /estatisticas
+
+    Returns:
+        JSON com taxas por categoria e matriz de coocorrência
+    """
+    try:
+        try:
+            inicio, fim = _intervalo_da_requisicao()
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+
+        analise = Analise(db.obter_colunas(), inicio, fim)
+
+        return jsonify({
+            'total_respostas': analise.total,
+            'categorias': analise.taxas_categorias(),
+            'coocorrencia': analise.coocorrencia_categorias()
+        }), 200
+
+    except Exception as e:
+        return jsonify({'erro': f'Erro ao obter categorias: {str(e)}'}), 500
+
+
 @estatisticas_bp.route('/estatisticas/resumo', methods=['GET'])
+@cache_versionado(POLITICA_ESTATISTICAS)
 def obter_resumo():
     """
     Retorna um resumo simplificado das estatísticas principais
@@ -118,6 +318,7 @@ def obter_resumo():
 
 
 @estatisticas_bp.route('/estatisticas/exportar', methods=['GET'])
+@cache_versionado(POLITICA_ESTATISTICAS)
 def exportar_estatisticas():
     """
     Exporta estatísticas em formato adequado para pesquisa acadêmica
@@ -155,7 +356,43 @@ def exportar_estatisticas():
         return jsonify({'erro': f'Erro ao exportar: {str(e)}'}), 500
 
 
+@estatisticas_bp.route('/estatisticas/exportar/respostas', methods=['GET'])
+def exportar_respostas():
+    """
+    Exporta as respostas individuais anônimas, em fluxo, para pesquisa acadêmica
+
+    Cada registro traz apenas a data (sem horário), a pontuação e as 12 respostas.
+
+    Query params opcionais:
+        - formato: 'ndjson' (padrão), 'csv' ou 'colunar' (binário, lido com leitor_colunar.py)
+        - periodo ('semana', 'mes', 'ano', 'total') ou inicio/fim (ISO 8601)
+
+    Returns:
+        Corpo enviado em partes (chunked); NDJSON e CSV sem montar o arquivo na memória
+    """
+    try:
+        formato = request.args.get('formato', 'ndjson')
+        if formato not in FORMATOS_EXPORTACAO:
+            return jsonify({'erro': f"Formato inválido. Use: {', '.join(FORMATOS_EXPORTACAO)}"}), 400
+
+        try:
+            inicio, fim = _intervalo_da_requisicao()
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+
+        nome_arquivo = f"junta-ai-respostas-{datetime.now():%Y%m%d}.{EXTENSOES[formato]}"
+        return Response(
+            stream_with_context(exportar(db, formato, inicio, fim)),
+            mimetype=TIPOS_CONTEUDO[formato],
+            headers={'Content-Disposition': f'attachment; filename="{nome_arquivo}"'}
+        )
+
+    except Exception as e:
+        return jsonify({'erro': f'Erro ao exportar respostas: {str(e)}'}), 500
+
+
 @estatisticas_bp.route('/estatisticas/pergunta/<int:pergunta_id>', methods=['GET'])
+@cache_versionado(POLITICA_ESTATISTICAS)
 def obter_estatistica_pergunta(pergunta_id):
     """
     Retorna estatísticas específicas de uma pergunta
@@ -163,14 +400,22 @@ def obter_estatistica_pergunta(pergunta_id):
     Args:
         pergunta_id: ID da pergunta
 
+    Query params opcionais:
+        - versao: mesmo significado de /estatisticas
+
     Returns:
         JSON com estatísticas da pergunta específica
     """
     try:
-        if pergunta_id < 1 or pergunta_id > 12:
+        try:
+            definicao, versoes = _questionario_da_requisicao()
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+
+        if not definicao.tem_pergunta(pergunta_id):
             return jsonify({'erro': 'ID de pergunta inválido'}), 400
 
-        stats = db.obter_estatisticas()
+        stats = db.obter_estatisticas(versoes=versoes)
         analise = stats.get('analise', {})
 
         pergunta_key = str(pergunta_id)
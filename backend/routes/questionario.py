@@ -1,87 +1,19 @@
 from flask import Blueprint, request, jsonify
 from database import db
-from models import Resposta
+from questionarios import REGISTRO
+from models import avaliar_pontuacao
+from perguntas import PERGUNTAS
+from pontuacao import avaliar_lote, avaliar_e_salvar_lote
+from .cache import resposta_estatica
 
-questionario_bp = Blueprint('questionario', __name__)
+# Limite de conjuntos de respostas por requisição em /questionario/lote
+TAMANHO_MAXIMO_LOTE = 10000
 
-# Perguntas do questionário
-PERGUNTAS = [
-    {
-        'id': 1,
-        'texto': 'Seu parceiro(a) te critica constantemente ou diminui suas conquistas?',
-        'tipo': 'multipla',
-        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
-    },
-    {
-        'id': 2,
-        'texto': 'Você sente medo de expressar suas opiniões ou vontades?',
-        'tipo': 'multipla',
-        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
-    },
-    {
-        'id': 3,
-        'texto': 'Seu parceiro(a) controla suas redes sociais, mensagens ou quem você pode ver?',
-        'tipo': 'multipla',
-        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
-    },
-    {
-        'id': 4,
-        'texto': 'Já sofreu agressão física (empurrões, tapas, socos)?',
-        'tipo': 'multipla',
-        'opcoes': ['Nunca', 'Uma vez', 'Poucas vezes', 'Várias vezes', 'Constantemente']
-    },
-    {
-        'id': 5,
-        'texto': 'Seu parceiro(a) controla o dinheiro que você ganha ou impede que trabalhe?',
-        'tipo': 'multipla',
-        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
-    },
-    {
-        'id': 6,
-        'texto': 'Você já foi forçada(o) a ter relações sexuais contra sua vontade?',
-        'tipo': 'multipla',
-        'opcoes': ['Nunca', 'Uma vez', 'Poucas vezes', 'Várias vezes', 'Constantemente']
-    },
-    {
-        'id': 7,
-        'texto': 'Seu parceiro(a) te ameaça ou ameaça pessoas próximas a você?',
-        'tipo': 'multipla',
-        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
-    },
-    {
-        'id': 8,
-        'texto': 'Você se sente isolada(o) de amigos e familiares por causa do relacionamento?',
-        'tipo': 'multipla',
-        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
-    },
-    {
-        'id': 9,
-        'texto': 'Seu parceiro(a) culpa você pelos problemas do relacionamento ou por suas atitudes violentas?',
-        'tipo': 'multipla',
-        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
-    },
-    {
-        'id': 10,
-        'texto': 'Você tem ferimentos físicos que tenta esconder dos outros?',
-        'tipo': 'multipla',
-        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
-    },
-    {
-        'id': 11,
-        'texto': 'Sente que está "pisando em ovos" ao redor de seu parceiro(a)?',
-        'tipo': 'multipla',
-        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
-    },
-    {
-        'id': 12,
-        'texto': 'Já pensou em pedir ajuda mas teve medo das consequências?',
-        'tipo': 'multipla',
-        'opcoes': ['Nunca', 'Raramente', 'Às vezes', 'Frequentemente', 'Sempre']
-    }
-]
+questionario_bp = Blueprint('questionario', __name__)
 
 
 @questionario_bp.route('/perguntas', methods=['GET'])
+@resposta_estatica(PERGUNTAS)
 def obter_perguntas():
     """
     Retorna todas as perguntas do questionário
@@ -92,6 +24,33 @@ def obter_perguntas():
     return jsonify(PERGUNTAS), 200
 
 
+@questionario_bp.route('/questionario/versoes', methods=['GET'])
+@resposta_estatica(REGISTRO.listar())
+def obter_versoes():
+    """
+    Retorna as versões publicadas do questionário, indicando a atual
+
+    Returns:
+        JSON com lista de versões
+    """
+    return jsonify(REGISTRO.listar()), 200
+
+
+def _definicao_do_envio(data: dict):
+    """
+    Versão do questionário respondida: `versao` do corpo ou, sem ela, a atual
+
+    Raises:
+        ValueError: versão inexistente
+    """
+    versao = data.get('versao')
+    if versao is None:
+        return REGISTRO.atual
+    if not isinstance(versao, int) or isinstance(versao, bool):
+        raise ValueError(f"Versão do questionário inexistente: {versao}")
+    return REGISTRO.obter(versao)
+
+
 @questionario_bp.route('/questionario', methods=['POST'])
 def enviar_questionario():
     """
@@ -103,7 +62,8 @@ def enviar_questionario():
                 "1": "Nunca",
                 "2": "Às vezes",
                 ...
-            }
+            },
+            "versao": 1  (opcional, default: versão atual)
         }
 
     Returns:
@@ -115,26 +75,25 @@ def enviar_questionario():
         if not data or 'respostas' not in data:
             return jsonify({'erro': 'Dados inválidos'}), 400
 
-        respostas_dict = data['respostas']
-
-        # Validar que todas as perguntas foram respondidas
-        if len(respostas_dict) != len(PERGUNTAS):
-            return jsonify({'erro': 'Respostas incompletas'}), 400
+        try:
+            definicao = _definicao_do_envio(data)
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
 
-        # Criar objeto Resposta
-        resposta = Resposta(
-            id=None,  # Será definido pelo database
-            respostas=respostas_dict
-        )
+        # Validar que todas as perguntas foram respondidas com opções válidas
+        esquema = definicao.esquema
+        codigos, erro = esquema.validar(data['respostas'])
+        if erro:
+            return jsonify({'erro': erro}), 400
 
-        # Salvar no banco de dados
-        sucesso = db.salvar_resposta(respostas_dict)
+        # Salvar no banco de dados apenas as perguntas e opções do questionário
+        sucesso = db.salvar_resposta(esquema.decodificar(codigos), questionario=definicao.versao)
 
         if not sucesso:
             return jsonify({'erro': 'Erro ao salvar respostas'}), 500
 
         # Avaliar risco
-        avaliacao = resposta.avaliar_risco()
+        avaliacao = avaliar_pontuacao(esquema.pontuar(codigos))
 
         return jsonify({
             'sucesso': True,
@@ -145,11 +104,72 @@ def enviar_questionario():
         return jsonify({'erro': f'Erro interno: {str(e)}'}), 500
 
 
+@questionario_bp.route('/questionario/lote', methods=['POST'])
+def enviar_lote():
+    """
+    Valida, avalia e (opcionalmente) salva vários questionários de uma vez
+    (ex: pesquisas em papel digitadas por ONGs parceiras)
+
+    Expected JSON:
+        {
+            "respostas": [
+                {"1": "Nunca", "2": "Às vezes", ...},
+                ...
+            ],
+            "versao": 1,  (opcional, default: versão atual; vale para todos os conjuntos)
+            "salvar": true
+        }
+
+    Returns:
+        JSON com a avaliação de risco de cada conjunto, na ordem enviada
+    """
+    try:
+        data = request.get_json()
+
+        if not data or not isinstance(data.get('respostas'), list):
+            return jsonify({'erro': 'Dados inválidos'}), 400
+
+        conjuntos = data['respostas']
+
+        if len(conjuntos) > TAMANHO_MAXIMO_LOTE:
+            return jsonify({
+                'erro': f'Lote muito grande (máximo {TAMANHO_MAXIMO_LOTE} questionários)'
+            }), 400
+
+        try:
+            definicao = _definicao_do_envio(data)
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+
+        if not data.get('salvar', True):
+            resultados = avaliar_lote(conjuntos, definicao)
+            validos = sum(1 for r in resultados if r['valido'])
+            return jsonify({
+                'total': len(conjuntos),
+                'validos': validos,
+                'invalidos': len(conjuntos) - validos,
+                'salvo': False,
+                'resultados': resultados
+            }), 200
+
+        resultado = avaliar_e_salvar_lote(conjuntos, db, definicao)
+
+        if not resultado['salvo']:
+            return jsonify({'erro': 'Erro ao salvar respostas'}), 500
+
+        return jsonify(resultado), 200
+
+    except Exception as e:
+        return jsonify({'erro': f'Erro interno: {str(e)}'}), 500
+
+
 @questionario_bp.route('/questionario/validar', methods=['POST'])
 def validar_respostas():
     """
     Valida as respostas sem salvar (útil para validação frontend)
 
+    Aceita `versao` no corpo, como /questionario.
+
     Returns:
         JSON indicando se as respostas são válidas
     """
@@ -162,31 +182,17 @@ def validar_respostas():
                 'erro': 'Dados inválidos'
             }), 400
 
-        respostas_dict = data['respostas']
-
-        # Verificar quantidade de respostas
-        if len(respostas_dict) != len(PERGUNTAS):
+        # Mesma validação usada ao enviar (versão, quantidade, perguntas e opções)
+        try:
+            _, erro = _definicao_do_envio(data).esquema.validar(data['respostas'])
+        except ValueError as e:
+            erro = str(e)
+        if erro:
             return jsonify({
                 'valido': False,
-                'erro': f'Esperado {len(PERGUNTAS)} respostas, recebido {len(respostas_dict)}'
+                'erro': erro
             }), 200
 
-        # Verificar se todas as respostas são válidas
-        for pergunta in PERGUNTAS:
-            pergunta_id = str(pergunta['id'])
-            if pergunta_id not in respostas_dict:
-                return jsonify({
-                    'valido': False,
-                    'erro': f'Falta resposta para pergunta {pergunta_id}'
-                }), 200
-
-            resposta_valor = respostas_dict[pergunta_id]
-            if resposta_valor not in pergunta['opcoes']:
-                return jsonify({
-                    'valido': False,
-                    'erro': f'Resposta inválida para pergunta {pergunta_id}'
-                }), 200
-
         return jsonify({
             'valido': True,
             'mensagem': 'Todas as respostas são válidas'
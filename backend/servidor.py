@@ -0,0 +1,103 @@
+"""
+Servidor de produção: gunicorn com workers pré-criados (fork)
+
+O processo principal importa o app e carrega o armazenamento uma única vez;
+cada worker é um fork que herda os dados já em memória, em vez de reler o
+log (ou o data.json) por conta própria. Threads de segundo plano (escritor
+em lote, compactação, retenção) não sobrevivem ao fork, então só começam
+dentro de cada worker.
+
+Uso (a partir de backend/):
+    python servidor.py
+    gunicorn -c servidor.py            (equivalente; aceita as opções do gunicorn)
+
+Sinais para o processo principal:
+    HUP   recria os workers sem derrubar conexões (ex: após mudar o .env);
+          os novos herdam o estado atual, sem reler os dados
+    USR2  reexecuta o servidor para carregar código novo (depois, TERM no antigo)
+    TERM  desligamento gracioso: cada worker grava as respostas pendentes
+"""
+
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+# Com vários workers sobre o mesmo log, as estatísticas vêm do bloco de contadores
+# compartilhados (DATABASE_COMPARTILHADO=false desativa); ele é removido em on_exit
+os.environ.setdefault('DATABASE_COMPARTILHADO', 'true')
+
+from database import db
+
+
+def _nucleos() -> int:
+    """Núcleos disponíveis para este processo (respeita a afinidade de CPU)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+wsgi_app = 'app:app'
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5000')}"
+
+# SERVIDOR_WORKERS=0: um worker por núcleo. As leituras usam CPU (JSON,
+# numpy) e as esperas pelo fsync ficam com as threads de cada worker.
+workers = int(os.getenv('SERVIDOR_WORKERS', '0')) or _nucleos()
+worker_class = 'gthread'
+threads = int(os.getenv('SERVIDOR_THREADS', '8'))
+
+# No modo 'json' cada envio regrava o data.json inteiro e os demais processos
+# precisam relê-lo a cada mudança: só serve para um processo
+if (workers > 1 and os.getenv('DATABASE_BACKEND', 'json') == 'json'
+        and os.getenv('DATABASE_MODE', 'log') == 'json'):
+    sys.exit(f"DATABASE_MODE=json não suporta {workers} workers: "
+             f"use DATABASE_MODE=log ou SERVIDOR_WORKERS=1")
+
+# App e dados carregados antes do fork
+preload_app = True
+
+# Cada worker é substituído após SERVIDOR_MAX_REQUISICOES requisições (0 desativa);
+# a variação evita que todos sejam reciclados ao mesmo tempo
+max_requests = int(os.getenv('SERVIDOR_MAX_REQUISICOES', '10000'))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.getenv('SERVIDOR_TIMEOUT_S', '30'))
+graceful_timeout = timeout
+keepalive = 5
+
+
+def when_ready(server):
+    """Carrega o armazenamento no processo principal, antes do primeiro fork"""
+    inicio = time.perf_counter()
+    db.carregar()
+    print(f"Armazenamento carregado em {time.perf_counter() - inicio:.2f}s; "
+          f"iniciando {server.num_workers} workers")
+
+
+def pre_fork(server, worker):
+    # Também antes de cada worker reciclado ou recriado por HUP: o principal
+    # lê só o que os workers anexaram ao log desde o último fork
+    db.preparar_fork()
+
+
+def post_fork(server, worker):
+    db.aquecer()
+
+
+def worker_exit(server, worker):
+    db.fechar()
+
+
+def on_exit(server):
+    # Todos os workers já saíram
+    if db.inicializado:
+        db.carregar().remover_compartilhados()
+        db.fechar()
+
+
+if __name__ == '__main__':
+    from gunicorn.app.wsgiapp import run
+
+    sys.argv = [sys.argv[0], '--config', __file__, *sys.argv[1:]]
+    run()
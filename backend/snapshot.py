@@ -0,0 +1,227 @@
+import json
+import os
+import pickle
+import struct
+from array import array
+from typing import Dict, List, Optional, Tuple
+from agregados import AgregadosTemporais
+from colunar import ArmazemColunar
+from models import Estatistica
+from perguntas import VERSAO_INICIAL
+
+ASSINATURA = b'JUNTASNP'
+# 2: um armazém por mapeamento do questionário, coluna de versão e contadores por versão
+VERSAO_FORMATO = 2
+VERSOES_LIDAS = (1, 2)
+
+# assinatura, versão, inode do log, offset nesse log, inode do log compactado,
+# tamanho do cabeçalho JSON e tamanho dos contadores
+PREAMBULO = struct.Struct('<8sHQQQII')
+POSICAO_INODE_COMPACTADO = struct.calcsize('<8sHQQ')
+
+
+def _fsync_diretorio(caminho: str):
+    fd = os.open(os.path.dirname(os.path.abspath(caminho)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def serializar_contadores(estatisticas: Dict[int, Estatistica],
+                          temporais: Dict[int, AgregadosTemporais]) -> bytes:
+    """Contadores globais e baldes por hora/dia de cada versão do questionário, em pickle"""
+    def baldes(por_periodo):
+        return {chave: (e.total_respostas, e.analise) for chave, e in por_periodo.items()}
+
+    return pickle.dumps({
+        'versoes': {
+            versao: {
+                'estatistica': (estatistica.total_respostas, estatistica.analise),
+                'por_hora': baldes(temporais[versao].por_hora),
+                'por_dia': baldes(temporais[versao].por_dia)
+            }
+            for versao, estatistica in estatisticas.items()
+        }
+    }, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def restaurar_contadores(dados: bytes) -> Tuple[Dict[int, Estatistica], Dict[int, AgregadosTemporais]]:
+    contadores = pickle.loads(dados)
+    # Formato 1: contadores únicos, todos da versão inicial
+    por_versao = contadores['versoes'] if 'versoes' in contadores else {VERSAO_INICIAL: contadores}
+
+    estatisticas, temporais = {}, {}
+    for versao, dados_versao in por_versao.items():
+        estatisticas[versao] = Estatistica(*dados_versao['estatistica'])
+        temporais[versao] = AgregadosTemporais()
+        temporais[versao].por_hora = {k: Estatistica(*v) for k, v in dados_versao['por_hora'].items()}
+        temporais[versao].por_dia = {k: Estatistica(*v) for k, v in dados_versao['por_dia'].items()}
+    return estatisticas, temporais
+
+
+class Snapshot:
+    """
+    Estado completo de um `Database` no modo 'log' até um ponto do log.
+
+    Arquivo binário: preâmbulo de tamanho fixo, cabeçalho JSON (ids, esquema
+    das colunas e valores fora delas), contadores agregados em pickle e as colunas do
+    ArmazemColunar como bytes crus, lidos de volta com `array.frombytes`
+    (uma cópia de memória, sem decodificar nenhuma resposta).
+
+    Há um armazém colunar por mapeamento do questionário (ver `questionarios`).
+
+    O snapshot vale para o log de inode `inode_log` a partir de `offset_log`
+    e, depois de uma compactação, também para o log novo (`inode_compactado`)
+    a partir do início, já que ele contém exatamente o que vinha depois de
+    `offset_log`. Assim o estado é recuperável em qualquer ponto de uma queda
+    entre a troca do snapshot e a troca do log.
+    """
+
+    def __init__(self, cabecalho: Dict, estatisticas: Dict[int, Estatistica],
+                 temporais: Dict[int, AgregadosTemporais], armazens: Dict[str, ArmazemColunar],
+                 inode_log: int, offset_log: int, inode_compactado: int = 0):
+        self.cabecalho = cabecalho
+        self.estatisticas = estatisticas
+        self.temporais = temporais
+        self.armazens = armazens
+        self.inode_log = inode_log
+        self.offset_log = offset_log
+        self.inode_compactado = inode_compactado
+
+    def offset_para(self, inode: int) -> Optional[int]:
+        """Offset a partir do qual o log de `inode` deve ser reaplicado, ou None se não vale para ele"""
+        if inode == self.inode_log:
+            return self.offset_log
+        if self.inode_compactado and inode == self.inode_compactado:
+            return 0
+        return None
+
+
+def escrever_snapshot(caminho: str, cabecalho: Dict, contadores: bytes, armazens: Dict[str, ArmazemColunar],
+                      inode_log: int, offset_log: int):
+    """Grava o snapshot em `caminho` (normalmente um temporário) e faz fsync"""
+    cabecalho_json = json.dumps({
+        **cabecalho,
+        'versao_formato': VERSAO_FORMATO,
+        'armazens': [
+            {
+                'mapeamento': mapeamento,
+                'linhas': len(armazem),
+                'chaves': armazem.chaves,
+                'opcoes': armazem.opcoes,
+                'extras': {str(id): valores for id, valores in armazem.extras.items()}
+            }
+            for mapeamento, armazem in armazens.items()
+        ]
+    }, ensure_ascii=False).encode('utf-8')
+
+    with open(caminho, 'wb') as f:
+        f.write(PREAMBULO.pack(ASSINATURA, VERSAO_FORMATO, inode_log, offset_log, 0,
+                               len(cabecalho_json), len(contadores)))
+        f.write(cabecalho_json)
+        f.write(contadores)
+        for armazem in armazens.values():
+            for coluna in armazem.todas_colunas():
+                coluna.tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def marcar_compactacao(caminho: str, inode_compactado: int):
+    """Registra no snapshot o inode do log compactado que começa onde ele termina"""
+    with open(caminho, 'r+b') as f:
+        f.seek(POSICAO_INODE_COMPACTADO)
+        f.write(struct.pack('<Q', inode_compactado))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def publicar(temporario: str, caminho: str):
+    os.replace(temporario, caminho)
+    _fsync_diretorio(caminho)
+
+
+def ler_preambulo(caminho: str) -> Optional[Tuple[int, int, int]]:
+    """(inode do log, offset, inode do log compactado) sem carregar o snapshot"""
+    try:
+        with open(caminho, 'rb') as f:
+            dados = f.read(PREAMBULO.size)
+    except FileNotFoundError:
+        return None
+    if len(dados) < PREAMBULO.size:
+        return None
+    assinatura, versao, inode_log, offset_log, inode_compactado, _, _ = PREAMBULO.unpack(dados)
+    if assinatura != ASSINATURA or versao not in VERSOES_LIDAS:
+        return None
+    return inode_log, offset_log, inode_compactado
+
+
+def _colunas_lidas(armazem: ArmazemColunar, versao_formato: int) -> List[array]:
+    # O formato 1 não tinha a coluna de versão: todas as linhas são da versão inicial
+    if versao_formato == 1:
+        return [armazem.ids, armazem.timestamps, *armazem.colunas]
+    return armazem.todas_colunas()
+
+
+def ler_snapshot(caminho: str, mapeamentos: Dict[str, List[Dict]]) -> Optional[Snapshot]:
+    """
+    Carrega o snapshot, ou None se não existir, estiver corrompido ou for de outro esquema
+
+    Args:
+        mapeamentos: perguntas de cada mapeamento do questionário (`REGISTRO.mapeamentos()`)
+
+    Um snapshot inválido é simplesmente ignorado: o estado é refeito pelo log.
+    """
+    try:
+        with open(caminho, 'rb') as f:
+            dados = memoryview(f.read())
+    except FileNotFoundError:
+        return None
+
+    try:
+        (assinatura, versao, inode_log, offset_log, inode_compactado,
+         tamanho_cabecalho, tamanho_contadores) = PREAMBULO.unpack_from(dados, 0)
+        if assinatura != ASSINATURA or versao not in VERSOES_LIDAS:
+            return None
+
+        posicao = PREAMBULO.size
+        cabecalho = json.loads(bytes(dados[posicao:posicao + tamanho_cabecalho]))
+        posicao += tamanho_cabecalho
+        estatisticas, temporais = restaurar_contadores(dados[posicao:posicao + tamanho_contadores])
+        posicao += tamanho_contadores
+
+        descricoes = cabecalho['armazens'] if versao > 1 else [{**cabecalho, 'mapeamento': None}]
+        armazens = {}
+        for descricao in descricoes:
+            mapeamento = descricao['mapeamento']
+            if mapeamento is None:
+                # Formato 1: um único armazém, do mapeamento com as mesmas perguntas
+                mapeamento = next((
+                    nome for nome, perguntas in mapeamentos.items()
+                    if ArmazemColunar(perguntas).chaves == descricao['chaves']
+                ), None)
+            if mapeamento not in mapeamentos:
+                return None
+
+            armazem = ArmazemColunar(mapeamentos[mapeamento])
+            if descricao['chaves'] != armazem.chaves or descricao['opcoes'] != armazem.opcoes:
+                return None
+
+            linhas = descricao['linhas']
+            for coluna in _colunas_lidas(armazem, versao):
+                tamanho = linhas * coluna.itemsize
+                coluna.frombytes(dados[posicao:posicao + tamanho])
+                posicao += tamanho
+            if versao == 1:
+                armazem.questionarios.extend([VERSAO_INICIAL] * linhas)
+            armazem.extras = {int(id): valores for id, valores in descricao.get('extras', {}).items()}
+            armazens[mapeamento] = armazem
+
+        if posicao != len(dados):
+            return None
+    except (struct.error, ValueError, KeyError, pickle.UnpicklingError, EOFError):
+        return None
+
+    return Snapshot(cabecalho, estatisticas, temporais, armazens,
+                    inode_log, offset_log, inode_compactado)